@@ -33,6 +33,7 @@ import sys
 from core.services import email_api
 from core.triggers import api as triggers_api
 from core.services import api_keys_api
+from core.services import llm_transport
 
 
 if sys.platform == "win32":
@@ -76,10 +77,16 @@ async def lifespan(app: FastAPI):
         template_api.initialize(db)
         composio_api.initialize(db)
         
+        warmup_task = asyncio.create_task(llm_transport.warm_up())
+        
+        from core.sandbox.pool import sandbox_pool
+        sandbox_pool.start_maintenance()
+        
         yield
         
         logger.debug("Cleaning up agent resources")
         await core_api.cleanup()
+        await sandbox_pool.stop_maintenance()
         
         try:
             logger.debug("Closing Redis connection")
@@ -88,6 +95,16 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error closing Redis connection: {e}")
 
+        if not warmup_task.done():
+            warmup_task.cancel()
+        try:
+            await warmup_task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"LLM connection warmup failed: {e}")
+        await llm_transport.close()
+
         logger.debug("Disconnecting from database")
         await db.disconnect()
     except Exception as e:
@@ -12,7 +12,9 @@ from core.utils.logger import logger, structlog
 from core.billing.billing_integration import billing_integration
 from core.utils.config import config, EnvMode
 from core.services import redis
-from core.sandbox.sandbox import create_sandbox, delete_sandbox, get_or_start_sandbox
+from core.utils.cache import invalidate_thread_summary
+from core.sandbox.sandbox import delete_sandbox, get_or_start_sandbox
+from core.sandbox.pool import create_project_sandbox
 from core.utils.sandbox_utils import generate_unique_filename, get_uploads_directory
 from run_agent_background import run_agent_background
 
@@ -227,6 +229,8 @@ async def _create_agent_run_record(client, thread_id: str, agent_config: Optiona
     agent_run_id = agent_run.data[0]['id']
     structlog.contextvars.bind_contextvars(agent_run_id=agent_run_id)
     logger.debug(f"Created new agent run: {agent_run_id}")
+    # Covers the user message inserted just before the run as well
+    await invalidate_thread_summary(thread_id)
 
     # Register run in Redis
     instance_key = f"active_run:{utils.instance_id}:{agent_run_id}"
@@ -383,8 +387,7 @@ async def _ensure_sandbox_for_thread(client, project_id: str, files: List[Upload
     
     # Create new sandbox
     try:
-        sandbox_pass = str(uuid.uuid4())
-        sandbox = await create_sandbox(sandbox_pass, project_id)
+        sandbox, sandbox_pass = await create_project_sandbox(project_id, wait_ready=False)
         sandbox_id = sandbox.id
         logger.info(f"Created new sandbox {sandbox_id} for project {project_id}")
 
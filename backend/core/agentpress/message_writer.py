@@ -0,0 +1,120 @@
+"""
+Batched message persistence for AgentPress.
+
+Status and tool lifecycle messages are small, frequent and never read back by
+the LLM, so instead of one insert per message they are buffered and written
+with multi-row inserts. Every message gets its message_id and created_at on
+the client, which keeps returned message objects usable immediately and
+preserves ordering between buffered and directly written messages.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from core.services import metrics
+from core.services.supabase import DBConnection
+from core.utils.cache import invalidate_thread_summary
+from core.utils.logger import logger
+
+BATCHING_ENABLED = os.getenv("MESSAGE_WRITER_BATCHING", "true").lower() != "false"
+BUFFERED_MESSAGE_TYPES = {"status", "llm_response_start"}
+MAX_BUFFERED_MESSAGES = int(os.getenv("MESSAGE_WRITER_MAX_BUFFER", 50))
+FLUSH_INTERVAL_SECONDS = float(os.getenv("MESSAGE_WRITER_FLUSH_INTERVAL", 0.5))
+
+
+class MessageWriter:
+    """Writes thread messages, batching the non-critical ones.
+
+    Messages that the LLM or billing depend on are inserted right away. Buffered
+    messages are flushed when the buffer fills up, after FLUSH_INTERVAL_SECONDS,
+    and when flush() is called at the end of a run.
+    """
+
+    def __init__(self, db: DBConnection, batching: bool = BATCHING_ENABLED):
+        self.db = db
+        self.batching = batching
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_created_at: Optional[datetime] = None
+        # Number of insert round trips, used by the write benchmark
+        self.round_trips = 0
+
+    def is_bufferable(self, row: Dict[str, Any]) -> bool:
+        return self.batching and row.get('type') in BUFFERED_MESSAGE_TYPES and not row.get('is_llm_message')
+
+    def _stamp(self, row: Dict[str, Any]) -> None:
+        # Strictly increasing timestamps keep messages from the same run in order
+        # even when several of them land in one multi-row insert
+        now = datetime.now(timezone.utc)
+        if self._last_created_at and now <= self._last_created_at:
+            now = self._last_created_at + timedelta(microseconds=1)
+        self._last_created_at = now
+        row.setdefault('message_id', str(uuid.uuid4()))
+        row['created_at'] = now.isoformat()
+
+    async def write(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Persist a message row and return the saved message object."""
+        self._stamp(row)
+
+        if self.is_bufferable(row):
+            self._buffer.append(row)
+            if len(self._buffer) >= MAX_BUFFERED_MESSAGES:
+                await self.flush()
+            else:
+                self._schedule_flush()
+            return {**row, 'updated_at': row['created_at']}
+
+        saved = await self._insert([row])
+        return saved[0] if saved else None
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task and not self._flush_task.done():
+            return
+
+        async def _delayed_flush():
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            # Detach before flushing so close() never cancels an insert in flight
+            self._flush_task = None
+            await self.flush()
+
+        self._flush_task = asyncio.create_task(_delayed_flush())
+
+    async def flush(self) -> None:
+        """Write all buffered messages."""
+        async with self._lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+            try:
+                await self._insert(rows)
+            except Exception as e:
+                logger.warning(f"Batched insert of {len(rows)} messages failed, retrying individually: {e}")
+                for row in rows:
+                    try:
+                        await self._insert([row])
+                    except Exception as row_error:
+                        logger.error(f"Failed to save buffered {row['type']} message {row['message_id']}: {row_error}")
+
+    async def close(self) -> None:
+        """Flush remaining messages and stop the pending flush timer."""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        client = await self.db.client
+        save_start = time.monotonic()
+        result = await client.table('messages').insert(rows if len(rows) > 1 else rows[0]).execute()
+        self.round_trips += 1
+        message_type = rows[0]['type'] if len(rows) == 1 else 'batch'
+        metrics.message_save_latency.labels(message_type=message_type).observe(time.monotonic() - save_start)
+
+        for thread_id in {row['thread_id'] for row in rows}:
+            await invalidate_thread_summary(thread_id)
+        return result.data or []
@@ -12,16 +12,19 @@ import json
 import re
 import uuid
 import asyncio
+import time
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional, AsyncGenerator, Tuple, Union, Callable, Literal
 from dataclasses import dataclass
 from core.utils.logger import logger
 from core.agentpress.tool import ToolResult
 from core.agentpress.tool_registry import ToolRegistry
-from core.agentpress.xml_tool_parser import XMLToolParser
+from core.agentpress.tool_scheduler import ToolScheduler, DEFAULT_MAX_PARALLEL_TOOLS
+from core.agentpress.xml_tool_parser import XMLToolParser, LegacyTagMatcher
 from core.agentpress.error_processor import ErrorProcessor
 from langfuse.client import StatefulTraceClient
 from core.services.langfuse import langfuse
+from core.services import metrics
 from core.utils.json_helpers import (
     ensure_dict, ensure_list, safe_json_parse, 
     to_json_string, format_for_yield
@@ -60,6 +63,7 @@ class ProcessorConfig:
         execute_tools: Whether to automatically execute detected tool calls
         execute_on_stream: For streaming, execute tools as they appear vs. at the end
         tool_execution_strategy: How to execute multiple tools ("sequential" or "parallel")
+        max_parallel_tools: Maximum number of tool calls running at once with the "parallel" strategy
         xml_adding_strategy: How to add XML tool results to the conversation
         max_xml_tool_calls: Maximum number of XML tool calls to process (0 = no limit)
     """
@@ -70,6 +74,7 @@ class ProcessorConfig:
     execute_tools: bool = True
     execute_on_stream: bool = False
     tool_execution_strategy: ToolExecutionStrategy = "sequential"
+    max_parallel_tools: int = DEFAULT_MAX_PARALLEL_TOOLS
     xml_adding_strategy: XmlAddingStrategy = "assistant_message"
     max_xml_tool_calls: int = 0  # 0 means no limit
     
@@ -83,6 +88,9 @@ class ProcessorConfig:
         
         if self.max_xml_tool_calls < 0:
             raise ValueError("max_xml_tool_calls must be a non-negative integer (0 = no limit)")
+        
+        if self.max_parallel_tools < 1:
+            raise ValueError("max_parallel_tools must be a positive integer")
 
 class ResponseProcessor:
     """Processes LLM responses, extracting and executing tool calls."""
@@ -118,6 +126,11 @@ class ResponseProcessor:
             return format_for_yield(message_obj)
         return None
 
+    def _create_tool_scheduler(self, strategy: ToolExecutionStrategy, max_parallel_tools: int = DEFAULT_MAX_PARALLEL_TOOLS) -> ToolScheduler:
+        """Create a scheduler for one response; the sequential strategy runs one tool at a time."""
+        max_concurrency = 1 if strategy == "sequential" else max_parallel_tools
+        return ToolScheduler(self._execute_tool, self.tool_registry.get_concurrency, max_concurrency)
+
     def _estimate_token_usage(self, prompt_messages: List[Dict[str, Any]], accumulated_content: str, llm_model: str) -> Dict[str, Any]:
         """
         Estimate token usage when exact usage data is unavailable.
@@ -237,6 +250,7 @@ class ResponseProcessor:
         generation = None,
         estimated_total_tokens: Optional[int] = None,
         cancellation_event: Optional[asyncio.Event] = None,
+        llm_request_start: Optional[float] = None,
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Process a streaming LLM response, handling tool calls and execution.
         
@@ -249,11 +263,14 @@ class ResponseProcessor:
             can_auto_continue: Whether auto-continue is enabled
             auto_continue_count: Number of auto-continue cycles
             continuous_state: Previous state of the conversation
+            llm_request_start: Timestamp the LLM request was issued, for time-to-first-token
             
         Yields:
             Complete message objects matching the DB schema, except for content chunks.
         """
         logger.info(f"Starting streaming response processing for thread {thread_id}")
+        if llm_request_start is None:
+            llm_request_start = datetime.now(timezone.utc).timestamp()
         
         # Initialize cancellation event if not provided
         if cancellation_event is None:
@@ -266,6 +283,7 @@ class ResponseProcessor:
         current_xml_content = accumulated_content   # equal to accumulated_content if auto-continuing, else blank
         xml_chunks_buffer = []
         pending_tool_executions = []
+        tool_scheduler = self._create_tool_scheduler(config.tool_execution_strategy, config.max_parallel_tools)
         yielded_tool_indices = set() # Stores indices of tools whose *status* has been yielded
         tool_index = 0
         xml_tool_call_count = 0
@@ -339,6 +357,9 @@ class ResponseProcessor:
                 current_time = datetime.now(timezone.utc).timestamp()
                 if first_chunk_time is None:
                     first_chunk_time = current_time
+                    metrics.llm_time_to_first_token.labels(model=llm_model).observe(current_time - llm_request_start)
+                else:
+                    metrics.llm_inter_chunk_gap.labels(model=llm_model).observe(current_time - last_chunk_time)
                 last_chunk_time = current_time
                 
                 # Log info about chunks periodically for debugging
@@ -404,9 +425,9 @@ class ResponseProcessor:
 
                         # --- Process XML Tool Calls (if enabled and limit not reached) ---
                         if config.xml_tool_calling and not (config.max_xml_tool_calls > 0 and xml_tool_call_count >= config.max_xml_tool_calls):
-                            xml_chunks = self._extract_xml_chunks(current_xml_content)
+                            # Each <invoke> is dispatched as soon as it closes, without waiting for </function_calls>
+                            xml_chunks, current_xml_content = self._extract_streamed_xml_chunks(current_xml_content)
                             for xml_chunk in xml_chunks:
-                                current_xml_content = current_xml_content.replace(xml_chunk, "", 1)
                                 xml_chunks_buffer.append(xml_chunk)
                                 result = self._parse_xml_tool_call(xml_chunk)
                                 if result:
@@ -423,7 +444,7 @@ class ResponseProcessor:
                                         if started_msg_obj: yield format_for_yield(started_msg_obj)
                                         yielded_tool_indices.add(tool_index) # Mark status as yielded
 
-                                        execution_task = asyncio.create_task(self._execute_tool(tool_call))
+                                        execution_task = tool_scheduler.submit(tool_call, tool_index)
                                         pending_tool_executions.append({
                                             "task": execution_task, "tool_call": tool_call,
                                             "tool_index": tool_index, "context": context
@@ -493,7 +514,7 @@ class ResponseProcessor:
                                 if started_msg_obj: yield format_for_yield(started_msg_obj)
                                 yielded_tool_indices.add(tool_index) # Mark status as yielded
 
-                                execution_task = asyncio.create_task(self._execute_tool(tool_call_data))
+                                execution_task = tool_scheduler.submit(tool_call_data, tool_index)
                                 pending_tool_executions.append({
                                     "task": execution_task, "tool_call": tool_call_data,
                                     "tool_index": tool_index, "context": context
@@ -514,6 +535,10 @@ class ResponseProcessor:
             if first_chunk_time and last_chunk_time:
                 response_ms = (last_chunk_time - first_chunk_time) * 1000
             
+            completion_tokens = getattr(getattr(final_llm_response, 'usage', None), 'completion_tokens', None)
+            if response_ms and completion_tokens:
+                metrics.llm_tokens_per_second.labels(model=llm_model).observe(completion_tokens / (response_ms / 1000))
+            
             # Log what we captured
             if final_llm_response:
                 logger.info(f"✅ Captured complete LiteLLM response object")
@@ -527,10 +552,13 @@ class ResponseProcessor:
             if pending_tool_executions:
                 logger.info(f"Waiting for {len(pending_tool_executions)} pending streamed tool executions")
                 self.trace.event(name="waiting_for_pending_streamed_tool_executions", level="DEFAULT", status_message=(f"Waiting for {len(pending_tool_executions)} pending streamed tool executions"))
-                pending_tasks = [execution["task"] for execution in pending_tool_executions]
-                done, _ = await asyncio.wait(pending_tasks)
+                executions_by_index = {execution["tool_index"]: execution for execution in pending_tool_executions}
 
-                for execution in pending_tool_executions:
+                # Handle results in completion order so finished tools report back first
+                async for scheduled in tool_scheduler.as_completed():
+                    execution = executions_by_index.get(scheduled.tool_index)
+                    if execution is None:
+                        continue
                     tool_idx = execution.get("tool_index", -1)
                     context = execution["context"]
                     tool_name = context.function_name
@@ -603,10 +631,7 @@ class ResponseProcessor:
             if (accumulated_content or has_tool_calls) and not should_auto_continue and finish_reason != "cancelled":
                 # ... (Truncate accumulated_content logic) ...
                 if config.max_xml_tool_calls > 0 and xml_tool_call_count >= config.max_xml_tool_calls and xml_chunks_buffer:
-                    last_xml_chunk = xml_chunks_buffer[-1]
-                    last_chunk_end_pos = accumulated_content.find(last_xml_chunk) + len(last_xml_chunk)
-                    if last_chunk_end_pos > 0:
-                        accumulated_content = accumulated_content[:last_chunk_end_pos]
+                    accumulated_content = self._truncate_after_xml_chunk(accumulated_content, xml_chunks_buffer[-1])
 
                 # ... (Extract complete_native_tool_calls logic) ...
                 # Update complete_native_tool_calls from buffer (initialized earlier)
@@ -666,7 +691,7 @@ class ResponseProcessor:
                 parsed_xml_data = []
                 if config.xml_tool_calling:
                     # Reparse remaining content just in case (should be empty if processed correctly)
-                    xml_chunks = self._extract_xml_chunks(current_xml_content)
+                    xml_chunks, current_xml_content = self._extract_streamed_xml_chunks(current_xml_content)
                     xml_chunks_buffer.extend(xml_chunks)
                     # Process only chunks not already handled in the stream loop
                     remaining_limit = config.max_xml_tool_calls - xml_tool_call_count if config.max_xml_tool_calls > 0 else len(xml_chunks_buffer)
@@ -703,7 +728,7 @@ class ResponseProcessor:
                     all_tool_data_map[xml_tool_index_start + idx] = item
 
 
-                tool_results_map = {} # tool_index -> (tool_call, result, context)
+                tool_results_map = {} # tool_index -> (tool_call, result, context), in completion order
 
                 # Populate from buffer if executed on stream
                 if config.execute_on_stream and tool_results_buffer:
@@ -725,15 +750,18 @@ class ResponseProcessor:
                     self.trace.event(name="executing_tools_after_stream", level="DEFAULT", status_message=(f"Executing {len(final_tool_calls_to_process)} tools ({config.tool_execution_strategy}) after stream"))
 
                     try:
-                        results_list = await self._execute_tools(final_tool_calls_to_process, config.tool_execution_strategy)
+                        results_list = [
+                            item async for item in self._execute_tools_as_completed(
+                                final_tool_calls_to_process, config.tool_execution_strategy, config.max_parallel_tools
+                            )
+                        ]
                         logger.debug(f"✅ STREAMING: Tool execution after stream completed, got {len(results_list)} results")
                     except Exception as stream_exec_error:
                         logger.error(f"❌ STREAMING: Tool execution after stream failed: {str(stream_exec_error)}")
                         logger.error(f"❌ Error type: {type(stream_exec_error).__name__}")
                         logger.error(f"❌ Tool calls that failed: {final_tool_calls_to_process}")
                         raise
-                    current_tool_idx = 0
-                    for tc, res in results_list:
+                    for current_tool_idx, tc, res in results_list:
                        # Map back using all_tool_data_map which has correct indices
                        if current_tool_idx in all_tool_data_map:
                            tool_data = all_tool_data_map[current_tool_idx]
@@ -747,14 +775,13 @@ class ResponseProcessor:
                        else:
                            logger.warning(f"Could not map result for tool index {current_tool_idx}")
                            self.trace.event(name="could_not_map_result_for_tool_index", level="WARNING", status_message=(f"Could not map result for tool index {current_tool_idx}"))
-                       current_tool_idx += 1
 
                 # Save and Yield each result message
                 if tool_results_map:
                     logger.debug(f"Saving and yielding {len(tool_results_map)} final tool result messages")
                     self.trace.event(name="saving_and_yielding_final_tool_result_messages", level="DEFAULT", status_message=(f"Saving and yielding {len(tool_results_map)} final tool result messages"))
-                    for tool_idx in sorted(tool_results_map.keys()):
-                        tool_call, result, context = tool_results_map[tool_idx]
+                    # Completion order; context.tool_index keeps each result tied to its call
+                    for tool_idx, (tool_call, result, context) in tool_results_map.items():
                         context.result = result
                         if not context.assistant_message_id and last_assistant_message_object:
                             context.assistant_message_id = last_assistant_message_object['message_id']
@@ -1210,7 +1237,7 @@ class ResponseProcessor:
                 self.trace.event(name="executing_tools_with_strategy", level="DEFAULT", status_message=(f"Executing {len(tool_calls_to_execute)} tools with strategy: {config.tool_execution_strategy}"))
 
                 try:
-                    tool_results = await self._execute_tools(tool_calls_to_execute, config.tool_execution_strategy)
+                    tool_results = await self._execute_tools(tool_calls_to_execute, config.tool_execution_strategy, config.max_parallel_tools)
                     logger.debug(f"✅ NON-STREAMING: Tool execution completed, got {len(tool_results)} results")
                 except Exception as exec_error:
                     logger.error(f"❌ NON-STREAMING: Tool execution failed: {str(exec_error)}")
@@ -1359,63 +1386,9 @@ class ResponseProcessor:
             
             # If no new format found, fall back to old format for backwards compatibility
             if not chunks:
-                pos = 0
-                while pos < len(content):
-                    # Find the next tool tag
-                    next_tag_start = -1
-                    current_tag = None
-                    
-                    # Find the earliest occurrence of any registered tool function name
-                    # Check for available function names
-                    available_functions = self.tool_registry.get_available_functions()
-                    for func_name in available_functions.keys():
-                        # Convert function name to potential tag name (underscore to dash)
-                        tag_name = func_name.replace('_', '-')
-                        start_pattern = f'<{tag_name}'
-                        tag_pos = content.find(start_pattern, pos)
-                        
-                        if tag_pos != -1 and (next_tag_start == -1 or tag_pos < next_tag_start):
-                            next_tag_start = tag_pos
-                            current_tag = tag_name
-                    
-                    if next_tag_start == -1 or not current_tag:
-                        break
-                    
-                    # Find the matching end tag
-                    end_pattern = f'</{current_tag}>'
-                    tag_stack = []
-                    chunk_start = next_tag_start
-                    current_pos = next_tag_start
-                    
-                    while current_pos < len(content):
-                        # Look for next start or end tag of the same type
-                        next_start = content.find(f'<{current_tag}', current_pos + 1)
-                        next_end = content.find(end_pattern, current_pos)
-                        
-                        if next_end == -1:  # No closing tag found
-                            break
-                        
-                        if next_start != -1 and next_start < next_end:
-                            # Found nested start tag
-                            tag_stack.append(next_start)
-                            current_pos = next_start + 1
-                        else:
-                            # Found end tag
-                            if not tag_stack:  # This is our matching end tag
-                                chunk_end = next_end + len(end_pattern)
-                                chunk = content[chunk_start:chunk_end]
-                                chunks.append(chunk)
-                                pos = chunk_end
-                                break
-                            else:
-                                # Pop nested tag
-                                tag_stack.pop()
-                                current_pos = next_end + 1
-                    
-                    if current_pos >= len(content):  # Reached end without finding closing tag
-                        break
-                    
-                    pos = max(pos + 1, current_pos)
+                bundle = self.tool_registry.get_schema_bundle()
+                matcher = LegacyTagMatcher.for_functions(bundle.fingerprint, bundle.function_names)
+                chunks = matcher.extract_chunks(content)
         
         except Exception as e:
             logger.error(f"Error extracting XML chunks: {e}")
@@ -1424,6 +1397,76 @@ class ResponseProcessor:
         
         return chunks
 
+    def _extract_streamed_xml_chunks(self, content: str) -> Tuple[List[str], str]:
+        """Extract tool call chunks from partially streamed content.
+        
+        Every complete <invoke> is returned as its own <function_calls> chunk even
+        while the enclosing block is still open, so it can run before the model
+        finishes the rest of the block. Extracted invokes, and blocks whose invokes
+        have all been extracted, are removed from the returned remaining content.
+        
+        Returns:
+            Tuple of (chunks in stream order, remaining content)
+        """
+        start_tag, end_tag = '<function_calls>', '</function_calls>'
+        chunks = []
+        remaining = content
+        search_from = 0
+        
+        try:
+            while True:
+                block_start = remaining.find(start_tag, search_from)
+                if block_start == -1:
+                    break
+                body_start = block_start + len(start_tag)
+                block_end = remaining.find(end_tag, body_start)
+                body_end = block_end if block_end != -1 else len(remaining)
+                
+                invoke_match = self.xml_parser.INVOKE_PATTERN.search(remaining, body_start, body_end)
+                if invoke_match:
+                    chunks.append(f"{start_tag}\n{invoke_match.group(0)}\n{end_tag}")
+                    remaining = remaining[:invoke_match.start()] + remaining[invoke_match.end():]
+                    continue
+                
+                if block_end == -1:
+                    # Block still open; wait for more content
+                    break
+                
+                leftover = remaining[body_start:block_end]
+                remaining = remaining[:block_start] + remaining[block_end + len(end_tag):]
+                if leftover.strip():
+                    logger.warning(f"Discarding unparseable content in function_calls block: {leftover[:200]}")
+                search_from = block_start
+            
+            # Legacy tag format only applies when there is no new-format block at all
+            if not chunks and start_tag not in content:
+                for xml_chunk in self._extract_xml_chunks(remaining):
+                    chunks.append(xml_chunk)
+                    remaining = remaining.replace(xml_chunk, "", 1)
+        
+        except Exception as e:
+            logger.error(f"Error extracting streamed XML chunks: {e}")
+            self.trace.event(name="error_extracting_streamed_xml_chunks", level="ERROR", status_message=(f"Error extracting streamed XML chunks: {e}"))
+        
+        return chunks, remaining
+
+    def _truncate_after_xml_chunk(self, content: str, xml_chunk: str) -> str:
+        """Cut content right after the given tool call chunk.
+        
+        Chunks extracted per <invoke> are not verbatim substrings of the content; in
+        that case the content is cut after the invoke and its block is closed.
+        """
+        chunk_pos = content.find(xml_chunk)
+        if chunk_pos != -1:
+            return content[:chunk_pos + len(xml_chunk)]
+        
+        invoke_match = self.xml_parser.INVOKE_PATTERN.search(xml_chunk)
+        if invoke_match:
+            invoke_pos = content.find(invoke_match.group(0))
+            if invoke_pos != -1:
+                return content[:invoke_pos + len(invoke_match.group(0))] + "\n</function_calls>"
+        return content
+
     def _parse_xml_tool_call(self, xml_chunk: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
         """Parse XML chunk into tool call format and return parsing details.
         
@@ -1500,6 +1543,7 @@ class ResponseProcessor:
         """Execute a single tool call and return the result."""
         span = self.trace.span(name=f"execute_tool.{tool_call['function_name']}", input=tool_call["arguments"])
         function_name = "unknown"
+        tool_start = time.monotonic()
         try:
             function_name = tool_call["function_name"]
             arguments = tool_call["arguments"]
@@ -1573,6 +1617,7 @@ class ResponseProcessor:
                     result = ToolResult(success=False, output=f"Tool returned invalid result type: {type(result)}")
 
             span.end(status_message="tool_executed", output=str(result))
+            metrics.tool_execution_latency.labels(tool_name=function_name, success=str(result.success).lower()).observe(time.monotonic() - tool_start)
             return result
 
         except Exception as e:
@@ -1581,12 +1626,14 @@ class ResponseProcessor:
             logger.error(f"❌ Tool call data: {tool_call}")
             logger.error(f"❌ Full traceback:", exc_info=True)
             span.end(status_message="critical_error", output=str(e), level="ERROR")
+            metrics.tool_execution_latency.labels(tool_name=function_name, success="false").observe(time.monotonic() - tool_start)
             return ToolResult(success=False, output=f"Critical error executing tool: {str(e)}")
 
     async def _execute_tools(
         self,
         tool_calls: List[Dict[str, Any]],
-        execution_strategy: ToolExecutionStrategy = "sequential"
+        execution_strategy: ToolExecutionStrategy = "sequential",
+        max_parallel_tools: int = DEFAULT_MAX_PARALLEL_TOOLS
     ) -> List[Tuple[Dict[str, Any], ToolResult]]:
         """Execute tool calls with the specified strategy.
 
@@ -1597,7 +1644,8 @@ class ResponseProcessor:
             tool_calls: List of tool calls to execute
             execution_strategy: Strategy for executing tools:
                 - "sequential": Execute tools one after another, waiting for each to complete
-                - "parallel": Execute all tools simultaneously for better performance
+                - "parallel": Execute independent tools concurrently, serializing conflicting ones
+            max_parallel_tools: Maximum number of tools running at once with the parallel strategy
 
         Returns:
             List of tuples containing the original tool call and its result
@@ -1627,7 +1675,7 @@ class ResponseProcessor:
                 return await self._execute_tools_sequentially(tool_calls)
             elif execution_strategy == "parallel":
                 logger.debug("🔄 Dispatching to parallel execution")
-                return await self._execute_tools_in_parallel(tool_calls)
+                return await self._execute_tools_in_parallel(tool_calls, max_parallel_tools)
             else:
                 logger.warning(f"⚠️ Unknown execution strategy: {execution_strategy}, falling back to sequential")
                 return await self._execute_tools_sequentially(tool_calls)
@@ -1730,14 +1778,16 @@ class ResponseProcessor:
 
             return completed_results + error_results
 
-    async def _execute_tools_in_parallel(self, tool_calls: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], ToolResult]]:
+    async def _execute_tools_in_parallel(self, tool_calls: List[Dict[str, Any]], max_parallel_tools: int = DEFAULT_MAX_PARALLEL_TOOLS) -> List[Tuple[Dict[str, Any], ToolResult]]:
         """Execute tool calls in parallel and return results.
 
-        This method executes all tool calls simultaneously using asyncio.gather, which
-        can significantly improve performance when executing multiple independent tools.
+        Calls go through a ToolScheduler: independent tools run concurrently (up to
+        max_parallel_tools at once) while calls that conflict on a declared resource,
+        e.g. writes to the same sandbox path, run in the order they were issued.
 
         Args:
             tool_calls: List of tool calls to execute
+            max_parallel_tools: Maximum number of tools running at once
 
         Returns:
             List of tuples containing the original tool call and its result
@@ -1752,15 +1802,15 @@ class ResponseProcessor:
             logger.debug(f"📋 Tool calls data: {tool_calls}")
             self.trace.event(name="executing_tools_in_parallel", level="DEFAULT", status_message=(f"Executing {len(tool_calls)} tools in parallel: {tool_names}"))
 
-            # Create tasks for all tool calls
-            logger.debug("🛠️ Creating async tasks for parallel execution")
+            # Schedule all tool calls
+            logger.debug("🛠️ Scheduling tasks for parallel execution")
+            scheduler = self._create_tool_scheduler("parallel", max_parallel_tools)
             tasks = []
             for i, tool_call in enumerate(tool_calls):
-                logger.debug(f"📋 Creating task {i+1} for tool: {tool_call.get('function_name', 'unknown')}")
-                task = self._execute_tool(tool_call)
-                tasks.append(task)
+                logger.debug(f"📋 Scheduling task {i+1} for tool: {tool_call.get('function_name', 'unknown')}")
+                tasks.append(scheduler.submit(tool_call, i))
 
-            logger.debug(f"✅ Created {len(tasks)} tasks for parallel execution")
+            logger.debug(f"✅ Scheduled {len(tasks)} tasks for parallel execution")
 
             # Execute all tasks concurrently with error handling
             logger.debug("🚀 Starting parallel execution with asyncio.gather")
@@ -1824,6 +1874,34 @@ class ResponseProcessor:
 
             return error_results
 
+    async def _execute_tools_as_completed(
+        self,
+        tool_calls: List[Dict[str, Any]],
+        execution_strategy: ToolExecutionStrategy = "sequential",
+        max_parallel_tools: int = DEFAULT_MAX_PARALLEL_TOOLS
+    ) -> AsyncGenerator[Tuple[int, Dict[str, Any], ToolResult], None]:
+        """Execute tool calls and yield (tool_index, tool_call, result) as each finishes.
+
+        The parallel strategy yields in completion order; the sequential strategy keeps
+        its existing behaviour (call order, stopping after a terminating tool).
+        """
+        if execution_strategy != "parallel":
+            for index, (tool_call, result) in enumerate(await self._execute_tools(tool_calls, execution_strategy)):
+                yield index, tool_call, result
+            return
+
+        scheduler = self._create_tool_scheduler("parallel", max_parallel_tools)
+        for index, tool_call in enumerate(tool_calls):
+            scheduler.submit(tool_call, index)
+
+        async for scheduled in scheduler.as_completed():
+            try:
+                result = scheduled.task.result()
+            except Exception as e:
+                logger.error(f"❌ EXCEPTION in parallel execution for tool {scheduled.tool_call.get('function_name', 'unknown')}: {str(e)}")
+                result = ToolResult(success=False, output=f"Error executing tool: {str(e)}")
+            yield scheduled.tool_index, scheduled.tool_call, result
+
     async def _add_tool_result(
         self, 
         thread_id: str, 
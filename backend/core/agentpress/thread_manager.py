@@ -4,7 +4,7 @@ Simplified conversation thread management system for AgentPress.
 
 import asyncio
 import json
-from typing import List, Dict, Any, Optional, Type, Union, AsyncGenerator, Literal, cast
+from typing import List, Dict, Any, Optional, Type, Union, AsyncGenerator, Literal, Callable, Awaitable, cast
 from core.services.llm import make_llm_api_call, LLMError
 from core.agentpress.prompt_caching import apply_anthropic_caching_strategy, validate_cache_blocks
 from core.agentpress.tool import Tool
@@ -16,6 +16,7 @@ from core.services.supabase import DBConnection
 from core.utils.logger import logger
 from langfuse.client import StatefulGenerationClient, StatefulTraceClient
 from core.services.langfuse import langfuse
+from core.agentpress.message_writer import MessageWriter
 from datetime import datetime, timezone
 from core.billing.billing_integration import billing_integration
 from litellm.utils import token_counter
@@ -27,7 +28,10 @@ class ThreadManager:
 
     def __init__(self, trace: Optional[StatefulTraceClient] = None, agent_config: Optional[dict] = None):
         self.db = DBConnection()
+        self.message_writer = MessageWriter(self.db)
         self.tool_registry = ToolRegistry()
+        # Tools that buffer state in memory register how to persist it at the end of a run
+        self._flush_callbacks: List[Callable[[], Awaitable[None]]] = []
         
         self.trace = trace
         if not self.trace:
@@ -41,6 +45,10 @@ class ThreadManager:
             agent_config=self.agent_config
         )
 
+    def add_flush_callback(self, callback: Callable[[], Awaitable[None]]):
+        """Register a coroutine function that persists buffered state when the run ends."""
+        self._flush_callbacks.append(callback)
+
     def add_tool(self, tool_class: Type[Tool], function_names: Optional[List[str]] = None, **kwargs):
         """Add a tool to the ThreadManager."""
         self.tool_registry.register_tool(tool_class, function_names, **kwargs)
@@ -84,7 +92,10 @@ class ThreadManager:
         agent_id: Optional[str] = None,
         agent_version_id: Optional[str] = None
     ):
-        """Add a message to the thread in the database."""
+        """Add a message to the thread in the database.
+
+        Status messages are buffered and written in batches by the MessageWriter;
+        the returned object already carries the final message_id."""
         # logger.debug(f"Adding message of type '{type}' to thread {thread_id}")
         client = await self.db.client
 
@@ -102,11 +113,9 @@ class ThreadManager:
             data_to_insert['agent_version_id'] = agent_version_id
 
         try:
-            result = await client.table('messages').insert(data_to_insert).execute()
+            saved_message = await self.message_writer.write(data_to_insert)
 
-            if result.data and len(result.data) > 0 and 'message_id' in result.data[0]:
-                saved_message = result.data[0]
-                
+            if saved_message and 'message_id' in saved_message:
                 if type == "llm_response_end" and isinstance(content, dict):
                     await self._handle_billing(thread_id, content, saved_message)
                 
@@ -118,6 +127,15 @@ class ThreadManager:
             logger.error(f"Failed to add message to thread {thread_id}: {str(e)}", exc_info=True)
             raise
 
+    async def flush_messages(self):
+        """Persist any buffered status messages and tool state; call when a run ends or is cancelled."""
+        await self.message_writer.close()
+        for callback in self._flush_callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"Failed to persist buffered state at the end of the run: {e}")
+
     async def _handle_billing(self, thread_id: str, content: dict, saved_message: dict):
         try:
             llm_response_id = content.get("llm_response_id", "unknown")
@@ -560,6 +578,7 @@ class ThreadManager:
                     # Non-fatal: just skip overrides
                     pass
 
+                llm_request_start = datetime.now(timezone.utc).timestamp()
                 llm_response = await make_llm_api_call(
                     prepared_messages, llm_model,
                     temperature=llm_temperature,
@@ -588,7 +607,8 @@ class ThreadManager:
                     cast(AsyncGenerator, llm_response), thread_id, prepared_messages,
                     llm_model, config, True,
                     auto_continue_state['count'], auto_continue_state['continuous_state'],
-                    generation, estimated_total_tokens, cancellation_event
+                    generation, estimated_total_tokens, cancellation_event,
+                    llm_request_start
                 )
             else:
                 return self.response_processor.process_non_streaming_response(
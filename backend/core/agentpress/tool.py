@@ -8,7 +8,7 @@ This module defines the base classes and decorators for creating tools:
 - Result containers for standardized tool outputs
 """
 
-from typing import Dict, Any, Union, Optional, List
+from typing import Dict, Any, Union, Optional, List, Callable, Tuple
 from dataclasses import dataclass, field
 from abc import ABC
 import json
@@ -78,6 +78,39 @@ class MethodMetadata:
     is_core: bool = False
     visible: bool = True
 
+@dataclass(frozen=True)
+class ToolConcurrency:
+    """Scheduling hints used to run tool calls concurrently.
+    
+    Two calls conflict when they claim the same resource, their keys overlap
+    (a call without a key claims the whole resource) and at least one of them
+    is not read-only. Conflicting calls run in the order they were issued;
+    everything else may run concurrently.
+    
+    Attributes:
+        read_only (bool): Whether the method leaves shared state unchanged
+        resource (Optional[str]): Shared resource the method touches, e.g. "sandbox" or "browser"
+        key_arg (Optional[str]): Argument that narrows the claim to part of the resource, e.g. a file path
+        normalize_key (Optional[Callable]): Normalizes the key argument before comparison
+    """
+    read_only: bool = False
+    resource: Optional[str] = None
+    key_arg: Optional[str] = None
+    normalize_key: Optional[Callable[[str], str]] = None
+
+    def claim(self, arguments: Any) -> Optional[Tuple[str, Optional[str]]]:
+        """Get the (resource, key) claimed by a call with these arguments."""
+        if not self.resource:
+            return None
+        key = None
+        if self.key_arg and isinstance(arguments, dict) and arguments.get(self.key_arg) is not None:
+            key = str(arguments[self.key_arg]).strip()
+            if self.normalize_key:
+                key = self.normalize_key(key)
+        return (self.resource, key)
+
+DEFAULT_CONCURRENCY = ToolConcurrency()
+
 class Tool(ABC):
     """Abstract base class for all tools.
     
@@ -102,6 +135,7 @@ class Tool(ABC):
         self._schemas: Dict[str, List[ToolSchema]] = {}
         self._metadata: Optional[ToolMetadata] = None
         self._method_metadata: Dict[str, MethodMetadata] = {}
+        self._concurrency: Dict[str, ToolConcurrency] = {}
         # logger.debug(f"Initializing tool class: {self.__class__.__name__}")
         self._register_metadata()
         self._register_schemas()
@@ -116,6 +150,8 @@ class Tool(ABC):
         for name, method in inspect.getmembers(self, predicate=inspect.ismethod):
             if hasattr(method, '__method_metadata__'):
                 self._method_metadata[name] = method.__method_metadata__
+            if hasattr(method, '__tool_concurrency__'):
+                self._concurrency[name] = method.__tool_concurrency__
 
     def _register_schemas(self):
         """Register schemas from all decorated methods."""
@@ -148,6 +184,16 @@ class Tool(ABC):
         """
         return self._method_metadata
 
+    def get_concurrency(self, method_name: str) -> ToolConcurrency:
+        """Get scheduling hints for a method.
+        
+        Method-level hints win over class-level ones; without either, the
+        method is treated as mutating but claims no shared resource.
+        """
+        if method_name in self._concurrency:
+            return self._concurrency[method_name]
+        return getattr(self.__class__, '__tool_concurrency__', DEFAULT_CONCURRENCY)
+
     def success_response(self, data: Union[Dict[str, Any], str]) -> ToolResult:
         """Create a successful tool result.
         
@@ -295,3 +341,37 @@ def method_metadata(
         return func
     return decorator
 
+def tool_concurrency(
+    read_only: bool = False,
+    resource: Optional[str] = None,
+    key_arg: Optional[str] = None,
+    normalize_key: Optional[Callable[[str], str]] = None
+):
+    """Decorator to declare how a tool class or method may run concurrently.
+    
+    Args:
+        read_only: Whether calls leave shared state unchanged
+        resource: Shared resource the calls touch (e.g. "sandbox", "browser")
+        key_arg: Argument that narrows the claim within the resource (e.g. "file_path")
+        normalize_key: Normalizes the key argument before comparison
+    
+    Usage:
+        @tool_concurrency(resource="sandbox", key_arg="file_path", normalize_key=clean_path)
+        @openapi_schema({...})
+        async def create_file(self, file_path: str, ...):
+            ...
+        
+        # Class-level default for every method of the tool
+        @tool_concurrency(resource="browser")
+        class BrowserTool(SandboxToolsBase):
+            ...
+    """
+    def decorator(target):
+        target.__tool_concurrency__ = ToolConcurrency(
+            read_only=read_only,
+            resource=resource,
+            key_arg=key_arg,
+            normalize_key=normalize_key
+        )
+        return target
+    return decorator
@@ -1,27 +1,54 @@
-from typing import Dict, Type, Any, List, Optional, Callable
-from core.agentpress.tool import Tool, SchemaType
+from typing import Dict, Type, Any, List, Optional, Callable, Tuple, FrozenSet
+from types import MappingProxyType
+from dataclasses import dataclass
+from core.agentpress.tool import Tool, SchemaType, ToolSchema, ToolConcurrency, DEFAULT_CONCURRENCY
 from core.utils.logger import logger
+import hashlib
 import json
 
 
+@dataclass(frozen=True)
+class ToolSchemaBundle:
+    """Immutable snapshot of the registry's callable surface.
+    
+    Attributes:
+        schemas (Tuple[Dict[str, Any], ...]): OpenAPI schemas in registration order
+        functions (MappingProxyType): Read-only mapping of function name to bound method
+        function_names (FrozenSet[str]): Names of all registered functions
+        fingerprint (str): Stable content hash of the schemas, suitable as a cache key
+    """
+    schemas: Tuple[Dict[str, Any], ...]
+    functions: MappingProxyType
+    function_names: FrozenSet[str]
+    fingerprint: str
+
+
 class ToolRegistry:
     """Registry for managing and accessing tools.
     
     Maintains a collection of tool instances and their schemas, allowing for
     selective registration of tool functions and easy access to tool capabilities.
     
+    Schemas and the function map are built once into a ToolSchemaBundle and
+    reused until the registry changes.
+    
     Attributes:
         tools (Dict[str, Dict[str, Any]]): OpenAPI-style tools and schemas
         
     Methods:
         register_tool: Register a tool with optional function filtering
+        register_function: Register a single function of an existing tool instance
         get_tool: Get a specific tool by name
         get_openapi_schemas: Get OpenAPI schemas for function calling
+        get_schema_bundle: Get the cached immutable schema bundle
+        get_fingerprint: Get the content fingerprint of the registered schemas
+        get_concurrency: Get the scheduling hints for a tool function
     """
     
     def __init__(self):
         """Initialize a new ToolRegistry instance."""
         self.tools = {}
+        self._bundle: Optional[ToolSchemaBundle] = None
         logger.debug("Initialized new ToolRegistry instance")
     
     def register_tool(self, tool_class: Type[Tool], function_names: Optional[List[str]] = None, **kwargs):
@@ -55,25 +82,73 @@ class ToolRegistry:
                         registered_openapi += 1
                         # logger.debug(f"Registered OpenAPI function {func_name} from {tool_class.__name__}")
         
+        self.invalidate_cache()
         # logger.debug(f"Tool registration complete for {tool_class.__name__}: {registered_openapi} OpenAPI functions")
 
+    def register_function(self, func_name: str, tool_instance: Tool, schema: ToolSchema):
+        """Register a single function of an already-initialized tool instance.
+        
+        Used for tools whose schemas are discovered at runtime (e.g. MCP wrappers).
+        
+        Args:
+            func_name: Name of the function on the tool instance
+            tool_instance: The tool instance that implements the function
+            schema: The schema describing the function
+        """
+        self.tools[func_name] = {
+            "instance": tool_instance,
+            "schema": schema
+        }
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        """Drop the cached schema bundle so it is rebuilt on next access."""
+        self._bundle = None
+
+    def get_schema_bundle(self) -> ToolSchemaBundle:
+        """Get the immutable schema bundle, building it if the registry changed.
+        
+        Returns:
+            ToolSchemaBundle with schemas, function map and fingerprint
+        """
+        if self._bundle is None:
+            self._bundle = self._build_bundle()
+        return self._bundle
+
+    def _build_bundle(self) -> ToolSchemaBundle:
+        schemas = []
+        functions = {}
+        for func_name, tool_info in self.tools.items():
+            functions[func_name] = getattr(tool_info['instance'], func_name)
+            if tool_info['schema'].schema_type == SchemaType.OPENAPI:
+                schemas.append(tool_info['schema'].schema)
+        
+        serialized = json.dumps(schemas, sort_keys=True, separators=(',', ':'), default=str)
+        fingerprint = hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:16]
+        
+        # logger.debug(f"Built tool schema bundle {fingerprint} with {len(functions)} functions")
+        return ToolSchemaBundle(
+            schemas=tuple(schemas),
+            functions=MappingProxyType(functions),
+            function_names=frozenset(functions),
+            fingerprint=fingerprint
+        )
+
+    def get_fingerprint(self) -> str:
+        """Get a stable content fingerprint of the registered schemas.
+        
+        Returns:
+            Hex digest that changes whenever the registered schemas change
+        """
+        return self.get_schema_bundle().fingerprint
+
     def get_available_functions(self) -> Dict[str, Callable]:
         """Get all available tool functions.
         
         Returns:
-            Dict mapping function names to their implementations
+            Read-only mapping of function names to their implementations
         """
-        available_functions = {}
-        
-        # Get OpenAPI tool functions
-        for tool_name, tool_info in self.tools.items():
-            tool_instance = tool_info['instance']
-            function_name = tool_name
-            function = getattr(tool_instance, function_name)
-            available_functions[function_name] = function
-            
-        # logger.debug(f"Retrieved {len(available_functions)} available functions")
-        return available_functions
+        return self.get_schema_bundle().functions
 
     def get_tool(self, tool_name: str) -> Dict[str, Any]:
         """Get a specific tool by name.
@@ -89,17 +164,25 @@ class ToolRegistry:
             logger.warning(f"Tool not found: {tool_name}")
         return tool
 
+    def get_concurrency(self, tool_name: str) -> ToolConcurrency:
+        """Get the scheduling hints for a tool function.
+        
+        Args:
+            tool_name: Name of the tool function
+            
+        Returns:
+            ToolConcurrency for the function (defaults if unknown)
+        """
+        tool = self.tools.get(tool_name)
+        if not tool:
+            return DEFAULT_CONCURRENCY
+        return tool['instance'].get_concurrency(tool_name)
+
     def get_openapi_schemas(self) -> List[Dict[str, Any]]:
         """Get OpenAPI schemas for function calling.
         
         Returns:
             List of OpenAPI-compatible schema definitions
         """
-        schemas = [
-            tool_info['schema'].schema 
-            for tool_info in self.tools.values()
-            if tool_info['schema'].schema_type == SchemaType.OPENAPI
-        ]
-        # logger.debug(f"Retrieved {len(schemas)} OpenAPI schemas")
-        return schemas
+        return list(self.get_schema_bundle().schemas)
 
@@ -0,0 +1,99 @@
+"""
+Dependency-aware scheduling of tool calls.
+
+Tools describe the shared resource a call touches through ToolConcurrency
+(see core.agentpress.tool). The scheduler starts independent calls right away,
+up to a concurrency limit, and holds a call back until every earlier call it
+conflicts with has finished, so e.g. a create_file and a later execute_command
+in the same sandbox still run in the order the model issued them. Results are
+reported in completion order together with their original tool index.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.agentpress.tool import ToolConcurrency, ToolResult
+from core.utils.json_helpers import safe_json_parse
+from core.utils.logger import logger
+
+DEFAULT_MAX_PARALLEL_TOOLS = int(os.getenv("MAX_PARALLEL_TOOL_CALLS", 8))
+
+
+@dataclass
+class ScheduledToolCall:
+    """A submitted tool call and the task executing it."""
+    tool_index: int
+    tool_call: Dict[str, Any]
+    concurrency: ToolConcurrency
+    claim: Optional[Tuple[str, Optional[str]]]
+    task: Optional["asyncio.Task[ToolResult]"] = None
+
+    def conflicts_with(self, other: "ScheduledToolCall") -> bool:
+        if self.claim is None or other.claim is None:
+            return False
+        if self.claim[0] != other.claim[0]:
+            return False
+        if self.concurrency.read_only and other.concurrency.read_only:
+            return False
+        # A call without a key claims the whole resource
+        return self.claim[1] is None or other.claim[1] is None or self.claim[1] == other.claim[1]
+
+
+class ToolScheduler:
+    """Runs tool calls concurrently while serializing conflicting ones."""
+
+    def __init__(
+        self,
+        execute: Callable[[Dict[str, Any]], Awaitable[ToolResult]],
+        get_concurrency: Callable[[str], ToolConcurrency],
+        max_concurrency: int = DEFAULT_MAX_PARALLEL_TOOLS
+    ):
+        self._execute = execute
+        self._get_concurrency = get_concurrency
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._in_flight: List[ScheduledToolCall] = []
+        self._unreported: List[ScheduledToolCall] = []
+
+    def submit(self, tool_call: Dict[str, Any], tool_index: int) -> "asyncio.Task[ToolResult]":
+        """Schedule a tool call and return the task that will hold its result."""
+        concurrency = self._get_concurrency(tool_call.get('function_name', ''))
+        arguments = safe_json_parse(tool_call.get('arguments'), {})
+        scheduled = ScheduledToolCall(
+            tool_index=tool_index,
+            tool_call=tool_call,
+            concurrency=concurrency,
+            claim=concurrency.claim(arguments)
+        )
+
+        self._in_flight = [s for s in self._in_flight if not s.task.done()]
+        dependencies = [s.task for s in self._in_flight if s.conflicts_with(scheduled)]
+        if dependencies:
+            logger.debug(f"Tool {tool_call.get('function_name')} (index {tool_index}) waits for {len(dependencies)} conflicting calls on {scheduled.claim}")
+
+        scheduled.task = asyncio.create_task(self._run(scheduled, dependencies))
+        self._in_flight.append(scheduled)
+        self._unreported.append(scheduled)
+        return scheduled.task
+
+    async def _run(self, scheduled: ScheduledToolCall, dependencies: List[asyncio.Task]) -> ToolResult:
+        if dependencies:
+            # Failures of earlier calls don't block this one; it only needs them finished
+            await asyncio.wait(dependencies)
+        async with self._semaphore:
+            return await self._execute(scheduled.tool_call)
+
+    async def as_completed(self) -> AsyncGenerator[ScheduledToolCall, None]:
+        """Yield submitted calls as they finish (ties in tool index order)."""
+        while self._unreported:
+            tasks = {s.task: s for s in self._unreported}
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for scheduled in sorted((tasks[task] for task in done), key=lambda s: s.tool_index):
+                self._unreported.remove(scheduled)
+                yield scheduled
+
+    async def gather(self) -> List[ScheduledToolCall]:
+        """Wait for every submitted call and return them in tool index order."""
+        finished = [scheduled async for scheduled in self.as_completed()]
+        return sorted(finished, key=lambda s: s.tool_index)
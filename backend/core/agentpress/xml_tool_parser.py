@@ -220,6 +220,108 @@ class XMLToolParser:
         return True, None
 
 
+class LegacyTagMatcher:
+    """
+    Single-pass matcher for legacy tool tags of the form:
+    
+    <tool-name ...>...</tool-name>
+    
+    All registered tag names are compiled into one alternation so the earliest
+    opening tag is found in a single scan instead of one ``find`` per tool.
+    Matchers are cached per tool registry fingerprint.
+    """
+    
+    _cache: Dict[str, "LegacyTagMatcher"] = {}
+    _cache_max_size = 64
+    
+    def __init__(self, tag_names: List[str]):
+        """
+        Build the matcher for a set of tag names.
+        
+        Args:
+            tag_names: Tag names to match (already converted from function names)
+        """
+        # Longest names first so a tag wins over any shorter tag that is its prefix
+        ordered = sorted(set(tag_names), key=lambda name: (-len(name), name))
+        self.tag_names = ordered
+        self._open_pattern = (
+            re.compile('<(' + '|'.join(re.escape(name) for name in ordered) + ')')
+            if ordered else None
+        )
+        self._nesting_patterns: Dict[str, re.Pattern] = {}
+    
+    @classmethod
+    def for_functions(cls, fingerprint: str, function_names) -> "LegacyTagMatcher":
+        """
+        Get the cached matcher for a registry fingerprint, building it if needed.
+        
+        Args:
+            fingerprint: Tool registry content fingerprint
+            function_names: Registered function names (underscores are converted to dashes)
+            
+        Returns:
+            LegacyTagMatcher for the given function names
+        """
+        matcher = cls._cache.get(fingerprint)
+        if matcher is None:
+            if len(cls._cache) >= cls._cache_max_size:
+                cls._cache.pop(next(iter(cls._cache)))
+            matcher = cls([name.replace('_', '-') for name in function_names])
+            cls._cache[fingerprint] = matcher
+        return matcher
+    
+    def _nesting_pattern(self, tag_name: str) -> re.Pattern:
+        pattern = self._nesting_patterns.get(tag_name)
+        if pattern is None:
+            escaped = re.escape(tag_name)
+            pattern = re.compile(rf'(</{escaped}>)|<{escaped}')
+            self._nesting_patterns[tag_name] = pattern
+        return pattern
+    
+    def extract_chunks(self, content: str) -> List[str]:
+        """
+        Extract complete legacy tool tag chunks, honouring nested tags of the same name.
+        
+        Args:
+            content: The text content potentially containing legacy tool tags
+            
+        Returns:
+            List of complete XML chunks in order of appearance
+        """
+        chunks = []
+        if self._open_pattern is None:
+            return chunks
+        
+        pos = 0
+        while pos < len(content):
+            open_match = self._open_pattern.search(content, pos)
+            if not open_match:
+                break
+            
+            tag_name = open_match.group(1)
+            chunk_start = open_match.start()
+            
+            # Walk same-name open/close tags after the opening tag with an explicit stack
+            tag_stack = []
+            chunk_end = -1
+            for match in self._nesting_pattern(tag_name).finditer(content, chunk_start + 1):
+                if match.group(1) is None:
+                    tag_stack.append(match.start())
+                elif tag_stack:
+                    tag_stack.pop()
+                else:
+                    chunk_end = match.end()
+                    break
+            
+            if chunk_end == -1:  # No closing tag found
+                break
+            
+            chunks.append(content[chunk_start:chunk_end])
+            pos = chunk_end
+        
+        return chunks
+
+
 # Convenience function for quick parsing
 def parse_xml_tool_calls(content: str) -> List[XMLToolCall]:
     """
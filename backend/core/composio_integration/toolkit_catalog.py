@@ -0,0 +1,245 @@
+"""
+Cached Composio toolkit catalog.
+
+The full toolkit list is mirrored into Redis and held in process with a local
+inverted index, so listing and searching integrations never waits on the
+Composio API. Stale snapshots are served while a single background refresh
+runs; a refresh or Redis reload that yields an unchanged catalog (same content
+hash) only bumps freshness instead of rebuilding the index. Toolkit details and
+tool schemas are cached per slug.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from core.services import redis
+from core.utils.logger import logger
+
+CATALOG_KEY = "composio:toolkit_catalog"
+CATALOG_REFRESH_LOCK_KEY = "composio:toolkit_catalog:refresh_lock"
+DETAIL_KEY_PREFIX = "composio:toolkit_detail:"
+TOOLS_KEY_PREFIX = "composio:toolkit_tools:"
+
+CATALOG_FRESH_SECONDS = int(os.getenv("COMPOSIO_CATALOG_TTL", 15 * 60))
+CATALOG_MAX_AGE_SECONDS = 7 * 24 * 3600
+DETAIL_TTL_SECONDS = int(os.getenv("COMPOSIO_DETAIL_TTL", 6 * 3600))
+TOOLS_TTL_SECONDS = int(os.getenv("COMPOSIO_TOOLS_TTL", 3600))
+REFRESH_LOCK_SECONDS = 120
+LOCAL_CACHE_SIZE = 512
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+@dataclass
+class CatalogSnapshot:
+    """A point-in-time view of the toolkit catalog with its search index."""
+    version: str
+    fetched_at: float
+    items: List[Dict[str, Any]]
+    by_slug: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    by_category: Dict[str, List[int]] = field(default_factory=dict)
+    _postings: Dict[str, Set[int]] = field(default_factory=dict)
+    _vocabulary: List[str] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, items: List[Dict[str, Any]], fetched_at: float, version: Optional[str] = None) -> "CatalogSnapshot":
+        snapshot = cls(
+            version=version or cls.compute_version(items),
+            fetched_at=fetched_at,
+            items=items,
+        )
+        for position, item in enumerate(items):
+            snapshot.by_slug[item["slug"]] = item
+            for category in item.get("catalog_categories", item.get("categories", [])):
+                snapshot.by_category.setdefault(category, []).append(position)
+
+            terms = set(_tokenize(item.get("name")))
+            terms.update(_tokenize(item.get("slug")))
+            terms.update(_tokenize(item.get("description")))
+            for tag in item.get("tags", []):
+                terms.update(_tokenize(tag))
+            for term in terms:
+                snapshot._postings.setdefault(term, set()).add(position)
+
+        snapshot._vocabulary = sorted(snapshot._postings)
+        return snapshot
+
+    @staticmethod
+    def compute_version(items: List[Dict[str, Any]]) -> str:
+        payload = json.dumps(items, sort_keys=True, default=str).encode()
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def _positions_for_prefix(self, prefix: str) -> Set[int]:
+        positions: Set[int] = set()
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            positions |= self._postings[term]
+        return positions
+
+    def filter(self, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        if not category:
+            return self.items
+        return [self.items[i] for i in self.by_category.get(category, [])]
+
+    def search(self, query: str, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Match every query term as a word prefix; name matches rank first."""
+        terms = _tokenize(query)
+        if not terms:
+            return self.filter(category)
+
+        candidates: Optional[Set[int]] = None
+        for term in terms:
+            positions = self._positions_for_prefix(term)
+            candidates = positions if candidates is None else candidates & positions
+            if not candidates:
+                return []
+
+        if category:
+            candidates &= set(self.by_category.get(category, []))
+
+        query_lower = query.lower().strip()
+
+        def rank(position: int):
+            name = (self.items[position].get("name") or "").lower()
+            return (0 if name.startswith(query_lower) else 1 if query_lower in name else 2, position)
+
+        return [self.items[i] for i in sorted(candidates, key=rank)]
+
+    def to_json(self) -> str:
+        return json.dumps({"version": self.version, "fetched_at": self.fetched_at, "items": self.items})
+
+
+CatalogLoader = Callable[[], Awaitable[List[Dict[str, Any]]]]
+
+
+class ToolkitCatalog:
+    """Process-wide toolkit catalog with Redis mirroring and stale-while-revalidate refresh."""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._load_lock = asyncio.Lock()
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get_snapshot(self, loader: CatalogLoader) -> CatalogSnapshot:
+        """Get the catalog, refreshing in the background when it is stale.
+
+        Only a cold start (nothing in memory or Redis) waits on the loader.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.age > CATALOG_FRESH_SECONDS:
+            async with self._load_lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.age > CATALOG_FRESH_SECONDS:
+                    # Another process may have refreshed Redis already
+                    snapshot = await self._load_mirror(snapshot)
+                    if snapshot is None:
+                        snapshot = await self.refresh(loader)
+
+        if snapshot.age > CATALOG_FRESH_SECONDS:
+            self._schedule_refresh(loader)
+        return snapshot
+
+    def _schedule_refresh(self, loader: CatalogLoader) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            return
+
+        async def _run():
+            try:
+                if await redis.set(CATALOG_REFRESH_LOCK_KEY, "1", ex=REFRESH_LOCK_SECONDS, nx=True):
+                    await self.refresh(loader)
+            except Exception as e:
+                logger.warning(f"Background Composio catalog refresh failed: {e}")
+
+        self._refresh_task = asyncio.create_task(_run())
+
+    async def refresh(self, loader: CatalogLoader) -> CatalogSnapshot:
+        start = time.monotonic()
+        items = await loader()
+        version = CatalogSnapshot.compute_version(items)
+        current = self._snapshot
+
+        if current and current.version == version:
+            # Unchanged; keep the index and only bump freshness
+            current.fetched_at = time.time()
+            snapshot = current
+        else:
+            snapshot = CatalogSnapshot.build(items, time.time(), version)
+            self._snapshot = snapshot
+        await self._write_mirror(snapshot)
+
+        logger.debug(f"Refreshed Composio toolkit catalog: {len(items)} toolkits, version {version} in {time.monotonic() - start:.2f}s")
+        return snapshot
+
+    async def _load_mirror(self, current: Optional[CatalogSnapshot]) -> Optional[CatalogSnapshot]:
+        try:
+            raw = await redis.get(CATALOG_KEY)
+            if not raw:
+                return current
+            data = json.loads(raw)
+            if current and data.get("version") == current.version:
+                current.fetched_at = max(current.fetched_at, data["fetched_at"])
+                return current
+            if current is None or data["fetched_at"] > current.fetched_at:
+                self._snapshot = CatalogSnapshot.build(data["items"], data["fetched_at"], data.get("version"))
+                return self._snapshot
+        except Exception as e:
+            logger.warning(f"Failed to read Composio catalog from Redis: {e}")
+        return current
+
+    async def _write_mirror(self, snapshot: CatalogSnapshot) -> None:
+        try:
+            await redis.set(CATALOG_KEY, snapshot.to_json(), ex=CATALOG_MAX_AGE_SECONDS)
+        except Exception as e:
+            logger.warning(f"Failed to mirror Composio catalog to Redis: {e}")
+
+    async def get_cached(self, key: str, ttl: int, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Read-through cache (process memory, then Redis) for JSON-serializable values."""
+        local = self._local.get(key)
+        if local and local[0] > time.time():
+            self._local.move_to_end(key)
+            return local[1]
+
+        value = None
+        try:
+            raw = await redis.get(key)
+            if raw:
+                value = json.loads(raw)
+        except Exception as e:
+            logger.warning(f"Failed to read {key} from Redis: {e}")
+
+        if value is None:
+            value = await fetch()
+            if value is None:
+                return None
+            try:
+                await redis.set(key, json.dumps(value, default=str), ex=ttl)
+            except Exception as e:
+                logger.warning(f"Failed to cache {key} in Redis: {e}")
+
+        self._local[key] = (time.time() + min(ttl, CATALOG_FRESH_SECONDS), value)
+        self._local.move_to_end(key)
+        while len(self._local) > LOCAL_CACHE_SIZE:
+            self._local.popitem(last=False)
+        return value
+
+
+toolkit_catalog = ToolkitCatalog()
@@ -1,7 +1,19 @@
+import asyncio
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from core.utils.logger import logger
 from .client import ComposioClient
+from .toolkit_catalog import (
+    toolkit_catalog,
+    CatalogSnapshot,
+    DETAIL_KEY_PREFIX,
+    DETAIL_TTL_SECONDS,
+    TOOLS_KEY_PREFIX,
+    TOOLS_TTL_SECONDS,
+)
+
+CATALOG_PAGE_SIZE = 500
+CATALOG_MAX_PAGES = 20
 
 
 class CategoryInfo(BaseModel):
@@ -73,6 +85,54 @@ class ToolsListResponse(BaseModel):
     total_pages: int = 1
 
 
+def _to_plain(value: Any) -> Any:
+    """Convert SDK response objects into JSON-serializable dicts and lists."""
+    if isinstance(value, dict):
+        return {k: _to_plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(v) for v in value]
+    if hasattr(value, 'model_dump'):
+        return _to_plain(value.model_dump())
+    if hasattr(value, '_asdict'):
+        return _to_plain(value._asdict())
+    if hasattr(value, '__dict__'):
+        return _to_plain(value.__dict__)
+    return value
+
+
+def _parse_toolkit_item(item: Any) -> Optional[ToolkitInfo]:
+    """Parse a toolkit list item, keeping only toolkits with Composio-managed OAUTH2."""
+    toolkit_data = _to_plain(item)
+    
+    auth_schemes = toolkit_data.get("auth_schemes") or []
+    composio_managed_auth_schemes = toolkit_data.get("composio_managed_auth_schemes") or []
+
+    if "OAUTH2" not in auth_schemes or "OAUTH2" not in composio_managed_auth_schemes:
+        return None
+    
+    meta = toolkit_data.get("meta") or {}
+    logo_url = meta.get("logo") or toolkit_data.get("logo")
+    
+    tags = []
+    categories = []
+    for cat in meta.get("categories") or []:
+        if isinstance(cat, dict):
+            tags.append(cat.get("name", ""))
+            categories.append(cat.get("id", ""))
+    
+    description = meta.get("description") or toolkit_data.get("description")
+    
+    return ToolkitInfo(
+        slug=toolkit_data.get("slug", ""),
+        name=toolkit_data.get("name", ""),
+        description=description,
+        logo=logo_url,
+        tags=tags,
+        auth_schemes=auth_schemes,
+        categories=categories
+    )
+
+
 class ToolkitService:
     def __init__(self, api_key: Optional[str] = None):
         self.client = ComposioClient.get_client(api_key)
@@ -105,98 +165,91 @@ class ToolkitService:
             logger.error(f"Failed to list categories: {e}", exc_info=True)
             raise
     
-    async def list_toolkits(self, limit: int = 500, cursor: Optional[str] = None, category: Optional[str] = None) -> Dict[str, Any]:
-        try:
-            logger.debug(f"Fetching toolkits with limit: {limit}, cursor: {cursor}, category: {category}")
+    async def _load_catalog(self) -> List[Dict[str, Any]]:
+        """Fetch every page of the toolkit list from Composio (SDK calls run in a thread)."""
+        toolkits: List[Dict[str, Any]] = []
+        cursor = None
+        for _ in range(CATALOG_MAX_PAGES):
             params = {
-                "limit": limit,
+                "limit": CATALOG_PAGE_SIZE,
                 "managed_by": "composio"
             }
-            
             if cursor:
                 params["cursor"] = cursor
-            if category:
-                params["category"] = category
             
-            toolkits_response = self.client.toolkits.list(**params)
+            toolkits_response = await asyncio.to_thread(self.client.toolkits.list, **params)
             
             if hasattr(toolkits_response, '__dict__'):
                 response_data = toolkits_response.__dict__
             else:
                 response_data = toolkits_response
             
-            items = response_data.get('items', [])
-            
-            toolkits = []
-            for item in items:
-                if hasattr(item, '__dict__'):
-                    toolkit_data = item.__dict__
-                elif hasattr(item, '_asdict'):
-                    toolkit_data = item._asdict()
-                else:
-                    toolkit_data = item
-                
-                auth_schemes = toolkit_data.get("auth_schemes", [])
-                composio_managed_auth_schemes = toolkit_data.get("composio_managed_auth_schemes", [])
-
-                if "OAUTH2" not in auth_schemes or "OAUTH2" not in composio_managed_auth_schemes:
-                    continue
-                
-                logo_url = None
-                meta = toolkit_data.get("meta", {})
-                if isinstance(meta, dict):
-                    logo_url = meta.get("logo")
-                elif hasattr(meta, '__dict__'):
-                    logo_url = meta.__dict__.get("logo")
-                
-                if not logo_url:
-                    logo_url = toolkit_data.get("logo")
-                
-                tags = []
-                categories = []
-                if isinstance(meta, dict) and "categories" in meta:
-                    category_list = meta.get("categories", [])
-                    for cat in category_list:
-                        if isinstance(cat, dict):
-                            cat_name = cat.get("name", "")
-                            cat_id = cat.get("id", "")
-                            tags.append(cat_name)
-                            categories.append(cat_id)
-                        elif hasattr(cat, '__dict__'):
-                            cat_name = cat.__dict__.get("name", "")
-                            cat_id = cat.__dict__.get("id", "")
-                            tags.append(cat_name)
-                            categories.append(cat_id)
-                
-                description = None
-                if isinstance(meta, dict):
-                    description = meta.get("description")
-                elif hasattr(meta, '__dict__'):
-                    description = meta.__dict__.get("description")
-                
-                if not description:
-                    description = toolkit_data.get("description")
-                
-                toolkit = ToolkitInfo(
-                    slug=toolkit_data.get("slug", ""),
-                    name=toolkit_data.get("name", ""),
-                    description=description,
-                    logo=logo_url,
-                    tags=tags,
-                    auth_schemes=auth_schemes,
-                    categories=categories
-                )
-                toolkits.append(toolkit)
-            
-            result = {
-                "items": toolkits,
-                "total_items": response_data.get("total_items", len(toolkits)),
-                "total_pages": response_data.get("total_pages", 1),
-                "current_page": response_data.get("current_page", 1),
-                "next_cursor": response_data.get("next_cursor")
+            for item in response_data.get('items', []):
+                toolkit = _parse_toolkit_item(item)
+                if toolkit:
+                    toolkits.append(toolkit.model_dump())
+            
+            cursor = response_data.get("next_cursor")
+            if not cursor:
+                break
+        
+        # Category listings are curated server-side, so record membership per category
+        by_slug = {toolkit["slug"]: toolkit for toolkit in toolkits}
+        for toolkit in toolkits:
+            toolkit["catalog_categories"] = list(toolkit.get("categories", []))
+        for category in await self.list_categories():
+            try:
+                for slug in await self._load_category_slugs(category.id):
+                    toolkit = by_slug.get(slug)
+                    if toolkit and category.id not in toolkit["catalog_categories"]:
+                        toolkit["catalog_categories"].append(category.id)
+            except Exception as e:
+                logger.warning(f"Failed to load Composio category {category.id}: {e}")
+        
+        logger.debug(f"Loaded {len(toolkits)} toolkits with OAUTH2 in both auth schemes from Composio")
+        return toolkits
+    
+    async def _load_category_slugs(self, category: str) -> List[str]:
+        slugs: List[str] = []
+        cursor = None
+        for _ in range(CATALOG_MAX_PAGES):
+            params = {
+                "limit": CATALOG_PAGE_SIZE,
+                "managed_by": "composio",
+                "category": category
             }
+            if cursor:
+                params["cursor"] = cursor
+            response_data = _to_plain(await asyncio.to_thread(self.client.toolkits.list, **params))
+            slugs.extend(item.get("slug", "") for item in response_data.get("items", []))
+            cursor = response_data.get("next_cursor")
+            if not cursor:
+                break
+        return slugs
+    
+    async def _get_catalog(self) -> CatalogSnapshot:
+        return await toolkit_catalog.get_snapshot(self._load_catalog)
+    
+    def _paginate(self, items: List[Dict[str, Any]], limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        # Cursors are offsets into the cached catalog
+        offset = int(cursor) if cursor and cursor.isdigit() else 0
+        page = items[offset:offset + limit]
+        next_offset = offset + len(page)
+        return {
+            "items": [ToolkitInfo(**item) for item in page],
+            "total_items": len(items),
+            "total_pages": max(1, -(-len(items) // limit)) if limit else 1,
+            "current_page": (offset // limit) + 1 if limit else 1,
+            "next_cursor": str(next_offset) if next_offset < len(items) else None
+        }
+    
+    async def list_toolkits(self, limit: int = 500, cursor: Optional[str] = None, category: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            logger.debug(f"Fetching toolkits with limit: {limit}, cursor: {cursor}, category: {category}")
+            catalog = await self._get_catalog()
+            result = self._paginate(catalog.filter(category), limit, cursor)
             
-            logger.debug(f"Successfully fetched {len(toolkits)} toolkits with OAUTH2 in both auth schemes" + (f" for category {category}" if category else ""))
+            logger.debug(f"Successfully fetched {len(result['items'])} toolkits with OAUTH2 in both auth schemes" + (f" for category {category}" if category else ""))
             return result
             
         except Exception as e:
@@ -205,65 +258,44 @@ class ToolkitService:
     
     async def get_toolkit_by_slug(self, slug: str) -> Optional[ToolkitInfo]:
         try:
-            toolkits_response = await self.list_toolkits()
-            toolkits = toolkits_response.get("items", [])
-            for toolkit in toolkits:
-                if toolkit.slug == slug:
-                    return toolkit
-            return None
+            catalog = await self._get_catalog()
+            toolkit = catalog.by_slug.get(slug)
+            return ToolkitInfo(**toolkit) if toolkit else None
         except Exception as e:
             logger.error(f"Failed to get toolkit {slug}: {e}", exc_info=True)
             raise
     
     async def search_toolkits(self, query: str, category: Optional[str] = None, limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
         try:
-            all_toolkits_response = await self.list_toolkits(limit=500, cursor=cursor, category=category)
-            toolkits = all_toolkits_response.get("items", [])
-            query_lower = query.lower()
-            
-            filtered_toolkits = [
-                toolkit for toolkit in toolkits
-                if query_lower in toolkit.name.lower() 
-                or (toolkit.description and query_lower in toolkit.description.lower())
-                or any(query_lower in tag.lower() for tag in toolkit.tags)
-            ]
+            catalog = await self._get_catalog()
+            matches = catalog.search(query, category=category)
+            result = self._paginate(matches, limit, cursor)
             
-            limited_results = filtered_toolkits[:limit]
-            
-            result = {
-                "items": limited_results,
-                "total_items": len(filtered_toolkits),
-                "total_pages": 1,
-                "current_page": 1,
-                "next_cursor": None
-            }
-            
-            logger.debug(f"Found {len(filtered_toolkits)} toolkits with OAUTH2 in both auth schemes matching query: {query}" + (f" in category {category}" if category else ""))
+            logger.debug(f"Found {len(matches)} toolkits with OAUTH2 in both auth schemes matching query: {query}" + (f" in category {category}" if category else ""))
             return result
             
         except Exception as e:
             logger.error(f"Failed to search toolkits: {e}", exc_info=True)
             raise
     
+    async def _get_toolkit_raw(self, toolkit_slug: str) -> Optional[Dict[str, Any]]:
+        async def fetch():
+            toolkit_response = await asyncio.to_thread(self.client.toolkits.retrieve, toolkit_slug)
+            return _to_plain(toolkit_response)
+        
+        return await toolkit_catalog.get_cached(f"{DETAIL_KEY_PREFIX}{toolkit_slug}", DETAIL_TTL_SECONDS, fetch)
+    
     async def get_toolkit_icon(self, toolkit_slug: str) -> Optional[str]:
         try:
             # logger.debug(f"Fetching toolkit icon for: {toolkit_slug}")
-            toolkit_response = self.client.toolkits.retrieve(toolkit_slug)
+            catalog = await self._get_catalog()
+            toolkit = catalog.by_slug.get(toolkit_slug)
+            if toolkit and toolkit.get('logo'):
+                return toolkit['logo']
             
-            if hasattr(toolkit_response, 'model_dump'):
-                toolkit_dict = toolkit_response.model_dump()
-            elif hasattr(toolkit_response, '__dict__'):
-                toolkit_dict = toolkit_response.__dict__
-            else:
-                toolkit_dict = dict(toolkit_response)
-            
-            meta = toolkit_dict.get('meta', {})
-            if isinstance(meta, dict):
-                logo = meta.get('logo')
-            elif hasattr(meta, '__dict__'):
-                logo = meta.__dict__.get('logo')
-            else:
-                logo = None
+            toolkit_dict = await self._get_toolkit_raw(toolkit_slug) or {}
+            meta = toolkit_dict.get('meta') or {}
+            logo = meta.get('logo') if isinstance(meta, dict) else None
             
             # logger.debug(f"Successfully fetched icon for {toolkit_slug}: {logo}")
             return logo
@@ -275,16 +307,11 @@ class ToolkitService:
     async def get_detailed_toolkit_info(self, toolkit_slug: str) -> Optional[DetailedToolkitInfo]:
         try:
             logger.debug(f"Fetching detailed toolkit info for: {toolkit_slug}")
-            toolkit_response = self.client.toolkits.retrieve(toolkit_slug)
+            toolkit_dict = await self._get_toolkit_raw(toolkit_slug)
+            if not toolkit_dict:
+                return None
             
-            if hasattr(toolkit_response, 'model_dump'):
-                toolkit_dict = toolkit_response.model_dump()
-            elif hasattr(toolkit_response, '__dict__'):
-                toolkit_dict = toolkit_response.__dict__
-            else:
-                toolkit_dict = dict(toolkit_response)
-            
-            logger.debug(f"Raw toolkit response for {toolkit_slug}: {toolkit_response}")
+            logger.debug(f"Raw toolkit response for {toolkit_slug}: {toolkit_dict}")
             
             meta = toolkit_dict.get('meta', {})
             if hasattr(meta, '__dict__'):
@@ -427,12 +454,12 @@ class ToolkitService:
             if cursor:
                 params["cursor"] = cursor
             
-            tools_response = self.client.tools.list(**params)
+            async def fetch():
+                tools_response = await asyncio.to_thread(self.client.tools.list, **params)
+                return _to_plain(tools_response)
             
-            if hasattr(tools_response, '__dict__'):
-                response_data = tools_response.__dict__
-            else:
-                response_data = tools_response
+            cache_key = f"{TOOLS_KEY_PREFIX}{toolkit_slug}:{limit}:{cursor or ''}"
+            response_data = await toolkit_catalog.get_cached(cache_key, TOOLS_TTL_SECONDS, fetch) or {}
             
             items = response_data.get('items', [])
             
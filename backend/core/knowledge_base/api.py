@@ -83,6 +83,7 @@ class EntryResponse(BaseModel):
     summary: str
     file_size: int
     created_at: str
+    processing_status: str = 'completed'
 
 class UpdateEntryRequest(BaseModel):
     summary: str = Field(..., min_length=1, max_length=1000)
@@ -376,7 +377,7 @@ async def get_folder_entries(
             raise HTTPException(status_code=404, detail="Folder not found")
         
         result = await client.table('knowledge_base_entries').select(
-            'entry_id, filename, summary, file_size, created_at'
+            'entry_id, filename, summary, file_size, created_at, processing_status'
         ).eq('folder_id', folder_id).eq('is_active', True).order('created_at', desc=True).execute()
         
         return [
@@ -385,7 +386,8 @@ async def get_folder_entries(
                 filename=entry['filename'],
                 summary=entry['summary'],
                 file_size=entry['file_size'],
-                created_at=entry['created_at']
+                created_at=entry['created_at'],
+                processing_status=entry.get('processing_status') or 'completed'
             )
             for entry in result.data
         ]
@@ -446,7 +448,7 @@ async def update_entry(
         
         # Verify ownership and get current entry
         entry_result = await client.table('knowledge_base_entries').select(
-            'entry_id, filename, summary, file_size, created_at, account_id'
+            'entry_id, filename, summary, file_size, created_at, account_id, processing_status'
         ).eq('entry_id', entry_id).eq('account_id', account_id).execute()
         
         if not entry_result.data:
@@ -467,7 +469,8 @@ async def update_entry(
             filename=updated_entry['filename'],
             summary=updated_entry['summary'],
             file_size=updated_entry['file_size'],
-            created_at=updated_entry['created_at']
+            created_at=updated_entry['created_at'],
+            processing_status=updated_entry.get('processing_status') or 'completed'
         )
         
     except HTTPException:
@@ -0,0 +1,130 @@
+"""
+Text extraction for knowledge base files.
+
+Extraction is CPU-bound (PyPDF2 page parsing, python-docx, encoding detection),
+so it runs in a process pool instead of on the event loop. This module only
+imports the parsing libraries so pool workers start cheaply.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import chardet
+
+KB_EXTRACTION_WORKERS = int(os.getenv("KB_EXTRACTION_WORKERS", 2))
+# Nothing past this is needed for summaries or retrieval passages
+MAX_EXTRACTED_CHARS = int(os.getenv("KB_MAX_EXTRACTED_CHARS", 2_000_000))
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+TEXT_EXTENSIONS = {'.txt', '.json', '.xml', '.csv', '.yml', '.yaml', '.md', '.log', '.ini', '.cfg', '.conf'}
+TEXT_MIME_TYPES = {'application/json', 'application/xml', 'text/xml'}
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def detect_encoding(file_content: bytes) -> str:
+    """Detect encoding from a sample of the content rather than the whole file."""
+    if len(file_content) <= ENCODING_SAMPLE_BYTES:
+        sample = file_content
+    else:
+        # Head and tail catch both BOMs and non-ASCII that only appears later
+        half = ENCODING_SAMPLE_BYTES // 2
+        sample = file_content[:half] + file_content[-half:]
+    try:
+        sample.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    return chardet.detect(sample).get('encoding') or 'utf-8'
+
+
+def _decode(file_content: bytes) -> str:
+    encoding = detect_encoding(file_content)
+    try:
+        return file_content[:MAX_EXTRACTED_CHARS * 4].decode(encoding, errors='strict')[:MAX_EXTRACTED_CHARS]
+    except (UnicodeDecodeError, LookupError):
+        return file_content[:MAX_EXTRACTED_CHARS * 4].decode('utf-8', errors='replace')[:MAX_EXTRACTED_CHARS]
+
+
+def _extract_pdf(file_content: bytes) -> str:
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    parts = []
+    total = 0
+    # Pages are parsed one at a time and parsing stops once the cap is reached
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        parts.append(text)
+        total += len(text) + 2
+        if total >= MAX_EXTRACTED_CHARS:
+            break
+    return '\n\n'.join(parts)[:MAX_EXTRACTED_CHARS]
+
+
+def _extract_docx(file_content: bytes) -> str:
+    import docx
+
+    document = docx.Document(io.BytesIO(file_content))
+    parts = []
+    total = 0
+    for paragraph in document.paragraphs:
+        parts.append(paragraph.text)
+        total += len(paragraph.text) + 1
+        if total >= MAX_EXTRACTED_CHARS:
+            break
+    return '\n'.join(parts)[:MAX_EXTRACTED_CHARS]
+
+
+def extract_text(file_content: bytes, filename: str, mime_type: str) -> str:
+    """Extract text content from file bytes (runs inside a pool worker)."""
+    file_extension = Path(filename).suffix.lower()
+
+    try:
+        if (file_extension in TEXT_EXTENSIONS
+                or mime_type.startswith('text/')
+                or mime_type in TEXT_MIME_TYPES):
+            return _decode(file_content)
+
+        if file_extension == '.pdf':
+            return _extract_pdf(file_content)
+
+        if file_extension == '.docx':
+            return _extract_docx(file_content)
+
+        # For any other file type, try to decode as text (fallback)
+        try:
+            content = _decode(file_content)
+            # Only return if it seems to be mostly text content
+            if len([c for c in content[:1000] if c.isprintable() or c.isspace()]) > 800:
+                return content
+        except Exception:
+            pass
+
+        return f"[Binary file: {filename}] - Content cannot be extracted as text, but file is stored and available for download."
+
+    except Exception as e:
+        return f"[Error extracting content from {filename}] - File is stored but content extraction failed: {str(e)}"
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn avoids forking a process that holds event loops and open sockets
+        _pool = ProcessPoolExecutor(
+            max_workers=KB_EXTRACTION_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _pool
+
+
+async def extract_text_async(file_content: bytes, filename: str, mime_type: str) -> str:
+    """Extract text in the process pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), extract_text, file_content, filename, mime_type)
+
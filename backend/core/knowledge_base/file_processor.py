@@ -1,22 +1,21 @@
 import os
-import io
 import uuid
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pathlib import Path
 import mimetypes
 import chardet
 
-import PyPDF2
-import docx
-
 from core.utils.logger import logger
 from core.services.supabase import DBConnection
 from core.services.llm import make_llm_api_call
+from core.knowledge_base.retrieval import index_entry_content
+from core.knowledge_base.extraction import extract_text_async
 
 class FileProcessor:
     SUPPORTED_EXTENSIONS = {'.txt', '.pdf', '.docx'}
     MAX_FILE_SIZE = 50 * 1024 * 1024
+    PENDING_SUMMARY = "Processing {filename}..."
     
     def __init__(self):
         self.db = DBConnection()
@@ -97,16 +96,7 @@ class FileProcessor:
                 s3_path, file_content, {"content-type": mime_type}
             )
             
-            # Extract content for summary
-            content = self._extract_content(file_content, filename, mime_type)
-            if not content:
-                # If no content could be extracted, create a basic file info summary
-                content = f"File: {filename} ({len(file_content)} bytes, {mime_type})"
-            
-            # Generate LLM summary
-            summary = await self._generate_summary(content, filename)
-            
-            # Save to database
+            # Save to database; extraction and summarisation happen in process_entry
             entry_data = {
                 'entry_id': entry_id,
                 'folder_id': folder_id,
@@ -115,23 +105,98 @@ class FileProcessor:
                 'file_path': s3_path,
                 'file_size': len(file_content),
                 'mime_type': mime_type,
-                'summary': summary,
+                'summary': self.PENDING_SUMMARY.format(filename=filename),
+                'processing_status': 'pending',
                 'is_active': True
             }
             
-            result = await client.table('knowledge_base_entries').insert(entry_data).execute()
+            await client.table('knowledge_base_entries').insert(entry_data).execute()
+            
+            # Extraction and summarisation run in the background worker; imported here
+            # because the worker module imports the tools that use this processor
+            from run_agent_background import process_kb_entry_background
+            process_kb_entry_background.send(entry_id=entry_id)
             
             return {
                 'success': True,
                 'entry_id': entry_id,
                 'filename': filename,
-                'summary_length': len(summary)
+                'processing_status': 'pending'
             }
             
         except Exception as e:
             logger.error(f"Error processing file {filename}: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    async def process_entry(self, entry_id: str) -> Dict[str, Any]:
+        """Extract, summarise and index a stored entry. Runs as a background job."""
+        client = await self.db.client
+        
+        entry_result = await client.table('knowledge_base_entries').select(
+            'entry_id, account_id, filename, file_path, mime_type, processing_status'
+        ).eq('entry_id', entry_id).execute()
+        
+        if not entry_result.data:
+            logger.warning(f"Knowledge base entry {entry_id} no longer exists, skipping processing")
+            return {'success': False, 'error': 'Entry not found'}
+        
+        entry = entry_result.data[0]
+        if entry.get('processing_status') == 'completed':
+            return {'success': True, 'entry_id': entry_id, 'skipped': True}
+        
+        filename = entry['filename']
+        await self._set_processing_status(client, entry_id, 'processing')
+        
+        try:
+            file_content = await client.storage.from_('file-uploads').download(entry['file_path'])
+            mime_type = entry.get('mime_type') or 'application/octet-stream'
+            
+            # Extract content for summary
+            content = await extract_text_async(file_content, filename, mime_type)
+            if not content:
+                # If no content could be extracted, create a basic file info summary
+                content = f"File: {filename} ({len(file_content)} bytes, {mime_type})"
+            
+            # Generate LLM summary
+            summary = await self._generate_summary(content, filename)
+            
+            # Build retrieval passages; the entry stays usable via its summary if this fails
+            if not content.startswith('[Binary file:') and not content.startswith('[Error extracting'):
+                try:
+                    chunk_count = await index_entry_content(client, entry_id, entry['account_id'], content)
+                    logger.debug(f"Indexed {chunk_count} passages for {filename}")
+                except Exception as e:
+                    logger.warning(f"Failed to index passages for {filename}: {str(e)}")
+            
+            # Passages are in place before the entry becomes visible to retrieval
+            await client.table('knowledge_base_entries').update({
+                'summary': summary,
+                'processing_status': 'completed',
+                'processing_error': None
+            }).eq('entry_id', entry_id).execute()
+            
+            logger.info(f"Processed knowledge base entry {entry_id} ({filename})")
+            return {
+                'success': True,
+                'entry_id': entry_id,
+                'filename': filename,
+                'summary_length': len(summary)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error processing knowledge base entry {entry_id} ({filename}): {str(e)}")
+            await self._set_processing_status(client, entry_id, 'failed', error=str(e))
+            return {'success': False, 'error': str(e), 'retryable': True}
+    
+    async def _set_processing_status(self, client, entry_id: str, status: str, error: Optional[str] = None):
+        try:
+            await client.table('knowledge_base_entries').update({
+                'processing_status': status,
+                'processing_error': error[:1000] if error else None
+            }).eq('entry_id', entry_id).execute()
+        except Exception as e:
+            logger.warning(f"Failed to set processing status {status} for entry {entry_id}: {str(e)}")
+    
     async def _generate_summary(self, content: str, filename: str) -> str:
         """Generate LLM summary of file content with smart chunking and fallbacks."""
         try:
@@ -274,47 +339,5 @@ Keep it under 200 words and make it actionable for context injection."""
         
         # Generate intelligent fallback
         return f"This {content_type} '{filename}' contains {len(content):,} characters across {len(non_empty_lines)} lines. Preview: {preview[:200]}{'...' if len(preview) > 200 else ''} This file would be useful for understanding the specific content and context it provides."
-    
-    def _extract_content(self, file_content: bytes, filename: str, mime_type: str) -> str:
-        """Extract text content from file bytes."""
-        file_extension = Path(filename).suffix.lower()
-        
-        try:
-            # Handle text-based files (including JSON, XML, CSV, etc.)
-            if (file_extension in ['.txt', '.json', '.xml', '.csv', '.yml', '.yaml', '.md', '.log', '.ini', '.cfg', '.conf'] 
-                or mime_type.startswith('text/') 
-                or mime_type in ['application/json', 'application/xml', 'text/xml']):
-                
-                detected = chardet.detect(file_content)
-                encoding = detected.get('encoding', 'utf-8')
-                try:
-                    return file_content.decode(encoding)
-                except UnicodeDecodeError:
-                    return file_content.decode('utf-8', errors='replace')
-            
-            elif file_extension == '.pdf':
-                pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-                return '\n\n'.join(page.extract_text() for page in pdf_reader.pages)
-            
-            elif file_extension == '.docx':
-                doc = docx.Document(io.BytesIO(file_content))
-                return '\n'.join(paragraph.text for paragraph in doc.paragraphs)
-            
-            # For any other file type, try to decode as text (fallback)
-            else:
-                try:
-                    detected = chardet.detect(file_content)
-                    encoding = detected.get('encoding', 'utf-8')
-                    content = file_content.decode(encoding)
-                    # Only return if it seems to be mostly text content
-                    if len([c for c in content[:1000] if c.isprintable() or c.isspace()]) > 800:
-                        return content
-                except:
-                    pass
-                
-                # If we can't extract text content, return a placeholder
-                return f"[Binary file: {filename}] - Content cannot be extracted as text, but file is stored and available for download."
-            
-        except Exception as e:
-            logger.error(f"Error extracting content from {filename}: {str(e)}")
-            return f"[Error extracting content from {filename}] - File is stored but content extraction failed: {str(e)}" 
\ No newline at end of file
+
+
@@ -0,0 +1,382 @@
+"""
+Query-time retrieval over an agent's knowledge base.
+
+Files are split into passages when they are uploaded (see FileProcessor) and
+stored in knowledge_base_entry_chunks. At prompt time the passages of every
+entry assigned to the agent are ranked against the latest user message with
+BM25 (blended with cosine similarity when KB_EMBEDDING_MODEL is set), and only
+the top-k passages that fit the token budget are injected into the system
+prompt instead of every entry summary.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import litellm
+
+from core.utils.logger import logger
+
+KB_CHUNK_CHARS = int(os.getenv("KB_CHUNK_CHARS", 1500))
+KB_CHUNK_OVERLAP_CHARS = int(os.getenv("KB_CHUNK_OVERLAP_CHARS", 200))
+KB_MAX_CHUNKS_PER_ENTRY = int(os.getenv("KB_MAX_CHUNKS_PER_ENTRY", 2000))
+KB_CONTEXT_TOKEN_BUDGET = int(os.getenv("KB_CONTEXT_TOKEN_BUDGET", 4000))
+KB_TOP_K = int(os.getenv("KB_TOP_K", 8))
+KB_EMBEDDING_MODEL = os.getenv("KB_EMBEDDING_MODEL")
+KB_INDEX_CACHE_SIZE = 128
+KB_EMBEDDING_BATCH_SIZE = int(os.getenv("KB_EMBEDDING_BATCH_SIZE", 100))
+# PostgREST caps rows per response, so chunks are read in pages
+KB_CHUNK_PAGE_SIZE = 1000
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or that the "
+    "this to was what when where which who why will with you your".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough estimate, same as the rest of the knowledge base: ~4 characters per token
+    return len(text) // 4 + 1
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOP_WORDS]
+
+
+def chunk_text(content: str, max_chars: int = KB_CHUNK_CHARS,
+               overlap: int = KB_CHUNK_OVERLAP_CHARS) -> List[str]:
+    """Split text into passages on paragraph boundaries.
+
+    Paragraphs are packed into passages of up to max_chars; a paragraph longer
+    than that is split with a small overlap so sentences cut at a boundary stay
+    searchable.
+
+    Args:
+        content: Extracted file text
+        max_chars: Target passage size in characters
+        overlap: Characters repeated between pieces of an oversized paragraph
+
+    Returns:
+        List of non-empty passages
+    """
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", content) if p.strip()]
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+
+    def flush():
+        nonlocal current, current_len
+        if current:
+            chunks.append("\n\n".join(current))
+        current, current_len = [], 0
+
+    for paragraph in paragraphs:
+        if len(paragraph) > max_chars:
+            flush()
+            step = max(max_chars - overlap, 1)
+            for start in range(0, len(paragraph), step):
+                piece = paragraph[start:start + max_chars].strip()
+                if piece:
+                    chunks.append(piece)
+                if start + max_chars >= len(paragraph):
+                    break
+            continue
+        if current_len + len(paragraph) > max_chars:
+            flush()
+        current.append(paragraph)
+        current_len += len(paragraph) + 2
+
+    flush()
+    return chunks[:KB_MAX_CHUNKS_PER_ENTRY]
+
+
+async def embed_texts(texts: List[str]) -> Optional[List[List[float]]]:
+    """Embed texts with KB_EMBEDDING_MODEL, or return None when embeddings are disabled or fail."""
+    if not KB_EMBEDDING_MODEL or not texts:
+        return None
+    try:
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), KB_EMBEDDING_BATCH_SIZE):
+            batch = texts[start:start + KB_EMBEDDING_BATCH_SIZE]
+            response = await litellm.aembedding(model=KB_EMBEDDING_MODEL, input=batch)
+            embeddings.extend(item["embedding"] for item in response.data)
+        return embeddings
+    except Exception as e:
+        logger.warning(f"Knowledge base embedding failed with {KB_EMBEDDING_MODEL}: {e}")
+        return None
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+@dataclass
+class Passage:
+    """A retrievable piece of a knowledge base entry."""
+    entry_id: str
+    filename: str
+    folder_name: str
+    chunk_index: int
+    content: str
+    token_count: int
+    embedding: Optional[List[float]] = None
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of passages."""
+
+    def __init__(self, passages: List[Passage], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self._term_freqs: List[Counter] = []
+        self._lengths: List[int] = []
+        doc_freq: Counter = Counter()
+
+        for passage in passages:
+            terms = Counter(tokenize(f"{passage.filename} {passage.content}"))
+            self._term_freqs.append(terms)
+            self._lengths.append(sum(terms.values()))
+            doc_freq.update(terms.keys())
+
+        n = len(passages)
+        self._avg_length = (sum(self._lengths) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def score(self, query: str) -> List[float]:
+        query_terms = set(tokenize(query))
+        scores = [0.0] * len(self.passages)
+        if not query_terms or not self._avg_length:
+            return scores
+
+        for i, terms in enumerate(self._term_freqs):
+            length_norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / self._avg_length)
+            total = 0.0
+            for term in query_terms:
+                tf = terms.get(term)
+                if tf:
+                    total += self._idf[term] * tf * (self.k1 + 1) / (tf + length_norm)
+            scores[i] = total
+        return scores
+
+
+@dataclass
+class _AgentIndex:
+    signature: str
+    pinned: List[Dict[str, Any]]
+    bm25: BM25Index
+
+
+class KnowledgeBaseRetriever:
+    """Builds and caches per-agent passage indexes and selects context for a query."""
+
+    def __init__(self):
+        self._indexes: "OrderedDict[str, _AgentIndex]" = OrderedDict()
+
+    async def _load_entries(self, client, agent_id: str) -> List[Dict[str, Any]]:
+        assignments = await client.table('agent_knowledge_entry_assignments').select(
+            'entry_id'
+        ).eq('agent_id', agent_id).eq('enabled', True).execute()
+        entry_ids = [row['entry_id'] for row in assignments.data or []]
+        if not entry_ids:
+            return []
+
+        entries = await client.table('knowledge_base_entries').select(
+            'entry_id, filename, summary, usage_context, updated_at, knowledge_base_folders(name)'
+        ).in_('entry_id', entry_ids).eq('is_active', True).eq(
+            'processing_status', 'completed'
+        ).in_(
+            'usage_context', ['always', 'contextual']
+        ).order('created_at', desc=True).execute()
+        return entries.data or []
+
+    async def _build_index(self, client, entries: List[Dict[str, Any]], signature: str) -> _AgentIndex:
+        entry_ids = [entry['entry_id'] for entry in entries]
+        chunks_by_entry: Dict[str, List[Dict[str, Any]]] = {}
+        offset = 0
+        while True:
+            chunk_result = await client.table('knowledge_base_entry_chunks').select(
+                'entry_id, chunk_index, content, token_count, embedding'
+            ).in_('entry_id', entry_ids).order('entry_id').order('chunk_index').range(
+                offset, offset + KB_CHUNK_PAGE_SIZE - 1
+            ).execute()
+            page = chunk_result.data or []
+            for row in page:
+                chunks_by_entry.setdefault(row['entry_id'], []).append(row)
+            if len(page) < KB_CHUNK_PAGE_SIZE:
+                break
+            offset += KB_CHUNK_PAGE_SIZE
+
+        passages: List[Passage] = []
+        pinned: List[Dict[str, Any]] = []
+        for entry in entries:
+            folder_name = (entry.get('knowledge_base_folders') or {}).get('name', '')
+            if entry.get('usage_context') == 'always':
+                pinned.append(entry)
+            rows = chunks_by_entry.get(entry['entry_id'])
+            if not rows:
+                # Entries uploaded before chunking existed are searchable by summary
+                rows = [{'chunk_index': 0, 'content': entry['summary'], 'token_count': 0, 'embedding': None}]
+            for row in rows:
+                passages.append(Passage(
+                    entry_id=entry['entry_id'],
+                    filename=entry['filename'],
+                    folder_name=folder_name,
+                    chunk_index=row['chunk_index'],
+                    content=row['content'],
+                    token_count=row.get('token_count') or estimate_tokens(row['content']),
+                    embedding=row.get('embedding'),
+                ))
+
+        logger.debug(f"Built knowledge base index: {len(entries)} entries, {len(passages)} passages")
+        bm25 = await asyncio.to_thread(BM25Index, passages)
+        return _AgentIndex(signature=signature, pinned=pinned, bm25=bm25)
+
+    async def get_index(self, client, agent_id: str) -> Optional[_AgentIndex]:
+        entries = await self._load_entries(client, agent_id)
+        if not entries:
+            self._indexes.pop(agent_id, None)
+            return None
+
+        signature = hashlib.sha256(
+            "|".join(sorted(f"{e['entry_id']}:{e.get('updated_at')}:{e.get('usage_context')}" for e in entries)).encode()
+        ).hexdigest()[:16]
+
+        cached = self._indexes.get(agent_id)
+        if cached and cached.signature == signature:
+            self._indexes.move_to_end(agent_id)
+            return cached
+
+        index = await self._build_index(client, entries, signature)
+        self._indexes[agent_id] = index
+        self._indexes.move_to_end(agent_id)
+        while len(self._indexes) > KB_INDEX_CACHE_SIZE:
+            self._indexes.popitem(last=False)
+        return index
+
+    async def _rank(self, index: _AgentIndex, query: str) -> List[Tuple[float, Passage]]:
+        query_embedding = None
+        if KB_EMBEDDING_MODEL and any(p.embedding for p in index.bm25.passages):
+            embeddings = await embed_texts([query])
+            query_embedding = embeddings[0] if embeddings else None
+        # Scoring every passage is CPU-bound; keep it off the event loop shared by all runs
+        return await asyncio.to_thread(self._score, index, query, query_embedding)
+
+    @staticmethod
+    def _score(index: _AgentIndex, query: str,
+               query_embedding: Optional[List[float]]) -> List[Tuple[float, Passage]]:
+        passages = index.bm25.passages
+        scores = index.bm25.score(query)
+
+        best = max(scores) if scores else 0.0
+        if best > 0:
+            scores = [s / best for s in scores]
+
+        if query_embedding:
+            scores = [
+                0.5 * s + 0.5 * max(_cosine(query_embedding, p.embedding), 0.0) if p.embedding else 0.5 * s
+                for s, p in zip(scores, passages)
+            ]
+
+        ranked = [(s, p) for s, p in zip(scores, passages) if s > 0]
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked
+
+    async def build_context(self, client, agent_id: str, query: Optional[str],
+                            token_budget: int = KB_CONTEXT_TOKEN_BUDGET,
+                            top_k: int = KB_TOP_K) -> Optional[str]:
+        """Build the knowledge base section for an agent's system prompt.
+
+        Summaries of 'always' entries are listed first, then the top_k passages
+        most relevant to the query, stopping once token_budget is reached.
+
+        Args:
+            client: Supabase client
+            agent_id: Agent whose assigned entries are searched
+            query: Latest user message; without one only summaries are used
+            token_budget: Maximum estimated tokens for the whole section
+            top_k: Maximum number of passages to include
+
+        Returns:
+            Formatted context, or None if the agent has no usable entries
+        """
+        index = await self.get_index(client, agent_id)
+        if index is None:
+            return None
+
+        used = 0
+        sections: List[str] = []
+
+        for entry in index.pinned:
+            folder_name = (entry.get('knowledge_base_folders') or {}).get('name', '')
+            section = f"## {folder_name}/{entry['filename']}\n{entry['summary']}"
+            cost = estimate_tokens(section)
+            if used + cost > token_budget:
+                break
+            sections.append(section)
+            used += cost
+
+        excerpts: List[str] = []
+        if query and query.strip():
+            for _, passage in (await self._rank(index, query))[:top_k]:
+                excerpt = f"### {passage.folder_name}/{passage.filename} (part {passage.chunk_index + 1})\n{passage.content}"
+                cost = passage.token_count + estimate_tokens(passage.filename) + 10
+                if used + cost > token_budget:
+                    continue
+                excerpts.append(excerpt)
+                used += cost
+
+        if not sections and not excerpts:
+            return None
+
+        context = "# KNOWLEDGE BASE"
+        if sections:
+            context += "\n\nThe following files are available in your knowledge base:\n\n" + "\n\n".join(sections)
+        if excerpts:
+            context += "\n\n## Relevant excerpts for the current request\n\n" + "\n\n".join(excerpts)
+        logger.debug(f"Knowledge base context for agent {agent_id}: {len(sections)} summaries, {len(excerpts)} excerpts, ~{used} tokens")
+        return context
+
+
+async def index_entry_content(client, entry_id: str, account_id: str, content: str) -> int:
+    """Chunk extracted file content and store the passages for retrieval.
+
+    Existing passages for the entry are replaced.
+
+    Returns:
+        Number of passages stored
+    """
+    chunks = chunk_text(content)
+    await client.table('knowledge_base_entry_chunks').delete().eq('entry_id', entry_id).execute()
+    if not chunks:
+        return 0
+
+    embeddings = await embed_texts(chunks)
+    rows = [
+        {
+            'entry_id': entry_id,
+            'account_id': account_id,
+            'chunk_index': i,
+            'content': chunk,
+            'token_count': estimate_tokens(chunk),
+            'embedding': embeddings[i] if embeddings else None,
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+    for start in range(0, len(rows), 500):
+        await client.table('knowledge_base_entry_chunks').insert(rows[start:start + 500]).execute()
+    return len(rows)
+
+
+kb_retriever = KnowledgeBaseRetriever()
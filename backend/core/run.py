@@ -32,6 +32,7 @@ from core.tools.people_search_tool import PeopleSearchTool
 from core.tools.company_search_tool import CompanySearchTool
 from core.tools.paper_search_tool import PaperSearchTool
 from core.ai_models.manager import model_manager
+from core.knowledge_base.retrieval import kb_retriever
 from core.tools.vapi_voice_tool import VapiVoiceTool
 
 load_dotenv()
@@ -318,10 +319,7 @@ class MCPManager:
             updated_schemas = mcp_wrapper_instance.get_schemas()
             for method_name, schema_list in updated_schemas.items():
                 for schema in schema_list:
-                    self.thread_manager.tool_registry.tools[method_name] = {
-                        "instance": mcp_wrapper_instance,
-                        "schema": schema
-                    }
+                    self.thread_manager.tool_registry.register_function(method_name, mcp_wrapper_instance, schema)
             
             logger.info(f"⚡ Registered {len(updated_schemas)} MCP tools (Redis cache enabled)")
             return mcp_wrapper_instance
@@ -337,7 +335,8 @@ class PromptManager:
                                   mcp_wrapper_instance: Optional[MCPToolWrapper],
                                   client=None,
                                   tool_registry=None,
-                                  xml_tool_calling: bool = True) -> dict:
+                                  xml_tool_calling: bool = True,
+                                  query: Optional[str] = None) -> dict:
         
         default_system_content = get_system_prompt()
         
@@ -371,14 +370,19 @@ class PromptManager:
             try:
                 logger.debug(f"Retrieving agent knowledge base context for agent {agent_config['agent_id']}")
                 
-                # Use only agent-based knowledge base context
-                kb_result = await client.rpc('get_agent_knowledge_base_context', {
-                    'p_agent_id': agent_config['agent_id']
-                }).execute()
+                # Inject only the passages relevant to the latest user message
+                try:
+                    kb_context = await kb_retriever.build_context(client, agent_config['agent_id'], query)
+                except Exception as e:
+                    logger.warning(f"Knowledge base retrieval failed, falling back to summaries: {e}")
+                    kb_result = await client.rpc('get_agent_knowledge_base_context', {
+                        'p_agent_id': agent_config['agent_id']
+                    }).execute()
+                    kb_context = kb_result.data
                 
-                if kb_result.data and kb_result.data.strip():
-                    logger.debug(f"Found agent knowledge base context, adding to system prompt (length: {len(kb_result.data)} chars)")
-                    # logger.debug(f"Knowledge base data object: {kb_result.data[:500]}..." if len(kb_result.data) > 500 else f"Knowledge base data object: {kb_result.data}")
+                if kb_context and kb_context.strip():
+                    logger.debug(f"Found agent knowledge base context, adding to system prompt (length: {len(kb_context)} chars)")
+                    # logger.debug(f"Knowledge base data object: {kb_context[:500]}..." if len(kb_context) > 500 else f"Knowledge base data object: {kb_context}")
                     
                     # Construct a well-formatted knowledge base section
                     kb_section = f"""
@@ -386,7 +390,7 @@ class PromptManager:
                     === AGENT KNOWLEDGE BASE ===
                     NOTICE: The following is your specialized knowledge base. This information should be considered authoritative for your responses and should take precedence over general knowledge when relevant.
 
-                    {kb_result.data}
+                    {kb_context}
 
                     === END AGENT KNOWLEDGE BASE ===
 
@@ -645,18 +649,6 @@ class AgentRunner:
         await self.setup_tools()
         mcp_wrapper_instance = await self.setup_mcp_tools()
         
-        system_message = await PromptManager.build_system_prompt(
-            self.config.model_name, self.config.agent_config, 
-            self.config.thread_id, 
-            mcp_wrapper_instance, self.client,
-            tool_registry=self.thread_manager.tool_registry,
-            xml_tool_calling=True
-        )
-        logger.info(f"📝 System message built once: {len(str(system_message.get('content', '')))} chars")
-        logger.debug(f"model_name received: {self.config.model_name}")
-        iteration_count = 0
-        continue_execution = True
-
         latest_user_message = await self.client.table('messages').select('*').eq('thread_id', self.config.thread_id).eq('type', 'user').order('created_at', desc=True).limit(1).execute()
         latest_user_message_content = None
         if latest_user_message.data and len(latest_user_message.data) > 0:
@@ -668,6 +660,19 @@ class AgentRunner:
             # Extract content for fast path optimization
             latest_user_message_content = data.get('content') if isinstance(data, dict) else str(data)
 
+        system_message = await PromptManager.build_system_prompt(
+            self.config.model_name, self.config.agent_config, 
+            self.config.thread_id, 
+            mcp_wrapper_instance, self.client,
+            tool_registry=self.thread_manager.tool_registry,
+            xml_tool_calling=True,
+            query=latest_user_message_content if isinstance(latest_user_message_content, str) else None
+        )
+        logger.info(f"📝 System message built once: {len(str(system_message.get('content', '')))} chars")
+        logger.debug(f"model_name received: {self.config.model_name}")
+        iteration_count = 0
+        continue_execution = True
+
         while continue_execution and iteration_count < self.config.max_iterations:
             iteration_count += 1
 
@@ -869,5 +874,11 @@ async def run_agent(
     )
     
     runner = AgentRunner(config)
-    async for chunk in runner.run(cancellation_event=cancellation_event):
-        yield chunk
\ No newline at end of file
+    try:
+        async for chunk in runner.run(cancellation_event=cancellation_event):
+            yield chunk
+    finally:
+        # Buffered status messages must be persisted however the run ends
+        thread_manager = getattr(runner, 'thread_manager', None)
+        if thread_manager:
+            await thread_manager.flush_messages()
\ No newline at end of file
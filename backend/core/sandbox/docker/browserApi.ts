@@ -1,6 +1,9 @@
 import express from 'express';
 import { Stagehand, type LogLine, type Page } from '@browserbasehq/stagehand';
 import { FileChooser } from 'playwright';
+import { randomUUID } from 'crypto';
+import { promises as fs } from 'fs';
+import path from 'path';
 
 const app = express();
 app.use(express.json());
@@ -12,20 +15,36 @@ interface BrowserActionResult {
     url: string;
     title: string;
     screenshot_base64?: string;
+    screenshot_path?: string;
     action?: string;
 }
 
+interface PageInfo {
+    url: string;
+    title: string;
+    screenshot_base64?: string;
+    screenshot_path?: string;
+}
+
+// Callers sending this header get screenshots as a PNG file in the sandbox instead of base64
+const SCREENSHOT_MODE_HEADER = 'x-screenshot-mode';
+const SCREENSHOT_DIR = '/tmp/.browser_screenshots';
+// Screenshot files are downloaded right after each response; only the latest few are kept
+const KEPT_SCREENSHOT_FILES = 5;
+
 class BrowserAutomation {
     public router: express.Router;
 
     private stagehand: Stagehand | null;
     public browserInitialized: boolean;
     private page: Page | null;
+    private screenshotFiles: string[];
     constructor() {
         this.router = express.Router();
         this.browserInitialized = false;
         this.stagehand = null;
         this.page = null;
+        this.screenshotFiles = [];
 
         this.router.post('/navigate', this.navigate.bind(this));
         this.router.post('/screenshot', this.screenshot.bind(this));
@@ -145,16 +164,31 @@ class BrowserAutomation {
         }
     }
 
-    async get_stagehand_state() {
+    async save_screenshot(buffer: Buffer): Promise<string> {
+        await fs.mkdir(SCREENSHOT_DIR, { recursive: true });
+        const file = path.join(SCREENSHOT_DIR, `${randomUUID()}.png`);
+        await fs.writeFile(file, buffer);
+        this.screenshotFiles.push(file);
+        while (this.screenshotFiles.length > KEPT_SCREENSHOT_FILES) {
+            await fs.rm(this.screenshotFiles.shift()!, { force: true });
+        }
+        return file;
+    }
+
+    async get_stagehand_state(req?: express.Request): Promise<PageInfo> {
         try{
             const health = this.health();
             if (this.page && health.status === "healthy") {
-                const screenshot_base64 = await this.page.screenshot({ fullPage: false }).then(buffer => buffer.toString('base64'));
-                const page_info = {
+                const buffer = await this.page.screenshot({ fullPage: false });
+                const page_info: PageInfo = {
                     url: await this.page.url(),
                     title: await this.page.title(),
-                    screenshot_base64: screenshot_base64,
                 };
+                if (req?.get(SCREENSHOT_MODE_HEADER) === 'file') {
+                    page_info.screenshot_path = await this.save_screenshot(buffer);
+                } else {
+                    page_info.screenshot_base64 = buffer.toString('base64');
+                }
                 return page_info;
             }
             return {
@@ -177,14 +211,15 @@ class BrowserAutomation {
             if (this.page && this.browserInitialized) {
                 const { url } = req.body;
                 await this.page.goto(url, { waitUntil: 'domcontentloaded', timeout: 30000 });
-                const page_info = await this.get_stagehand_state();
+                const page_info = await this.get_stagehand_state(req);
                 const result: BrowserActionResult = {
                     success: true,
                     message: "Navigated to " + url,
                     error: "",
                     url: page_info.url,
                     title: page_info.title,
-                    screenshot_base64: page_info?.screenshot_base64,
+                    screenshot_base64: page_info.screenshot_base64,
+                    screenshot_path: page_info.screenshot_path,
                 }
                 res.json(result);
             } else {
@@ -198,13 +233,14 @@ class BrowserAutomation {
             }
         } catch (error) {
             console.error(error);
-            const page_info = await this.get_stagehand_state();
+            const page_info = await this.get_stagehand_state(req);
             res.status(500).json({
                 success: false,
                 message: "Failed to navigate to " + req.body.url,
                 url: page_info.url,
                 title: page_info.title,
                 screenshot_base64: page_info.screenshot_base64,
+                screenshot_path: page_info.screenshot_path,
                 error
             })
         }
@@ -213,13 +249,14 @@ class BrowserAutomation {
     async screenshot(req: express.Request, res: express.Response): Promise<void> {
         try {
             if (this.page && this.browserInitialized) {
-                const page_info = await this.get_stagehand_state();
+                const page_info = await this.get_stagehand_state(req);
                 const result: BrowserActionResult = {
                     success: true,
                     message: "Screenshot taken",
                     url: page_info.url,
                     title: page_info.title,
                     screenshot_base64: page_info.screenshot_base64,
+                    screenshot_path: page_info.screenshot_path,
                 }
                 res.json(result);
             } else {
@@ -233,13 +270,14 @@ class BrowserAutomation {
             }
         } catch (error) {
             console.error(error);
-            const page_info = await this.get_stagehand_state();
+            const page_info = await this.get_stagehand_state(req);
             res.status(500).json({
                 success: false,
                 message: "Failed to take screenshot",
                 url: page_info.url,
                 title: page_info.title,
                 screenshot_base64: page_info.screenshot_base64,
+                screenshot_path: page_info.screenshot_path,
                 error
             })
         }
@@ -262,7 +300,7 @@ class BrowserAutomation {
                 this.page.on('filechooser', fileChooseHandler);
 
                 const result = await this.page.act({action, iframes: iframes || true, variables});
-                const page_info = await this.get_stagehand_state();
+                const page_info = await this.get_stagehand_state(req);
                 const response: BrowserActionResult = {
                     success: result.success,
                     message: result.message,
@@ -270,6 +308,7 @@ class BrowserAutomation {
                     url: page_info.url,
                     title: page_info.title,
                     screenshot_base64: page_info.screenshot_base64,
+                    screenshot_path: page_info.screenshot_path,
                 }
                 res.json(response);
             } else {
@@ -283,13 +322,14 @@ class BrowserAutomation {
             }
         } catch (error) {
             console.error(error);
-            const page_info = await this.get_stagehand_state();
+            const page_info = await this.get_stagehand_state(req);
             res.status(500).json({
                 success: false,
                 message: "Failed to act",
                 url: page_info.url,
                 title: page_info.title,
                 screenshot_base64: page_info.screenshot_base64,
+                screenshot_path: page_info.screenshot_path,
                 error
             })
         } finally {
@@ -305,7 +345,7 @@ class BrowserAutomation {
             if (this.page && this.browserInitialized) {
                 const { instruction, iframes } = req.body;
                 const result = await this.page.extract({ instruction, iframes });
-                const page_info = await this.get_stagehand_state();
+                const page_info = await this.get_stagehand_state(req);
                 const response: BrowserActionResult = {
                     success: result.success,
                     message: `Extracted result for: ${instruction}`,
@@ -313,6 +353,7 @@ class BrowserAutomation {
                     url: page_info.url,
                     title: page_info.title,
                     screenshot_base64: page_info.screenshot_base64,
+                    screenshot_path: page_info.screenshot_path,
                 }
                 res.json(response);
             } else {
@@ -326,13 +367,14 @@ class BrowserAutomation {
             }
         } catch (error) {
             console.error(error);
-            const page_info = await this.get_stagehand_state();
+            const page_info = await this.get_stagehand_state(req);
             res.status(500).json({
                 success: false,
                 message: "Failed to extract",
                 url: page_info.url,
                 title: page_info.title,
                 screenshot_base64: page_info.screenshot_base64,
+                screenshot_path: page_info.screenshot_path,
                 error
             })
         }
@@ -398,7 +440,7 @@ class BrowserAutomation {
                 screenshot_base64 = screenshotBuffer.toString('base64');
             }
 
-            const page_info = await this.get_stagehand_state();
+            const page_info = await this.get_stagehand_state(req);
             
             res.json({
                 success: true,
@@ -410,7 +452,7 @@ class BrowserAutomation {
 
         } catch (error) {
             console.error("Error converting SVG:", error);
-            const page_info = await this.get_stagehand_state();
+            const page_info = await this.get_stagehand_state(req);
             
             res.status(500).json({
                 success: false,
@@ -418,6 +460,7 @@ class BrowserAutomation {
                 url: page_info.url,
                 title: page_info.title,
                 screenshot_base64: page_info.screenshot_base64,
+                screenshot_path: page_info.screenshot_path,
                 error: String(error)
             } as BrowserActionResult);
         }
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+In-place file edits, run inside the sandbox.
+
+SandboxFilesTool installs this script in the sandbox and calls it with a
+base64-encoded JSON request as its only argument, so edits don't have to move
+the whole file to the backend and back. It prints one JSON object: the result
+of the edit, or {"ok": false, "error": ...} when the edit was rejected.
+
+Operations:
+    replace  Replace the single exact occurrence of `old` with `new`.
+    patch    Apply line-range edits [start, end, text] to a file whose
+             current sha256 is `base_sha256` (else "conflict"); the result
+             must hash to `sha256` (else "mismatch"), otherwise nothing is
+             written.
+
+This file must only use the standard library.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def _write(path, content):
+    # Write next to the target and rename so readers never see a partial file
+    directory = os.path.dirname(path) or "."
+    mode = os.stat(path).st_mode & 0o7777
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".edit_")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _sha256(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def replace(request):
+    content = _read(request["path"])
+    old, new = request["old"], request["new"]
+
+    occurrences = content.count(old)
+    if occurrences == 0:
+        return {"ok": False, "error": "no_match"}
+    if occurrences > 1:
+        lines = [i + 1 for i, line in enumerate(content.split("\n")) if old in line]
+        return {"ok": False, "error": "multiple", "lines": lines}
+
+    new_content = content.replace(old, new)
+    _write(request["path"], new_content)
+
+    context = request.get("snippet_lines", 4)
+    replacement_line = content.split(old)[0].count("\n")
+    start_line = max(0, replacement_line - context)
+    end_line = replacement_line + context + new.count("\n")
+    snippet = "\n".join(new_content.split("\n")[start_line:end_line + 1])
+    return {"ok": True, "line": replacement_line + 1, "snippet": snippet, "sha256": _sha256(new_content)}
+
+
+def patch(request):
+    content = _read(request["path"])
+    if _sha256(content) != request["base_sha256"]:
+        return {"ok": False, "error": "conflict"}
+
+    lines = content.splitlines(keepends=True)
+    # Apply from the bottom so earlier ranges keep their line numbers
+    for start, end, text in sorted(request["edits"], key=lambda edit: edit[0], reverse=True):
+        lines[start:end] = [text]
+    new_content = "".join(lines)
+
+    if _sha256(new_content) != request["sha256"]:
+        return {"ok": False, "error": "mismatch"}
+    _write(request["path"], new_content)
+    return {"ok": True, "sha256": request["sha256"]}
+
+
+OPERATIONS = {"replace": replace, "patch": patch}
+
+
+def main():
+    request = json.loads(base64.b64decode(sys.argv[1]))
+    operation = OPERATIONS.get(request.get("op"))
+    if operation is None:
+        result = {"ok": False, "error": "unsupported"}
+    elif not os.path.isfile(request["path"]):
+        result = {"ok": False, "error": "not_found"}
+    else:
+        try:
+            result = operation(request)
+        except UnicodeDecodeError:
+            result = {"ok": False, "error": "binary"}
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
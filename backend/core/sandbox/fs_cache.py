@@ -0,0 +1,292 @@
+"""
+Per-run cache in front of sandbox.fs.
+
+Tools in one agent run keep asking the sandbox for the same files: existence
+checks before every edit, presentation and docs metadata on every operation.
+SandboxToolsBase.sandbox returns a CachedSandbox whose fs answers those from a
+cache shared by all tools of the run (scoped to the run's ThreadManager):
+
+- tool writes go through the cache (write-through), so a file a tool just
+  wrote is never downloaded back
+- anything that runs commands in the sandbox (process.exec, session
+  commands) invalidates the cache; entries are then revalidated with one
+  get_file_info and reused if mtime and size are unchanged
+- while background commands may still be writing (non-blocking shell
+  commands), every read is revalidated
+
+Only files up to MAX_CACHED_FILE_BYTES keep their content.
+"""
+
+import posixpath
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from core.utils.logger import logger
+
+MAX_CACHED_FILE_BYTES = 1024 * 1024
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+INVALIDATING_PROCESS_METHODS = {"exec", "code_run", "execute_session_command"}
+
+
+@dataclass
+class _Entry:
+    exists: bool
+    # FileInfo from the last stat; None when the entry only comes from a write
+    info: Any = None
+    content: Optional[bytes] = None
+    validated: bool = True
+
+
+def _normalize(path: str) -> str:
+    return posixpath.normpath(path)
+
+
+def _same_file(a: Any, b: Any) -> bool:
+    return a is not None and b is not None and a.size == b.size and a.mod_time == b.mod_time
+
+
+class SandboxFileCache:
+    """File metadata and small-file contents for one sandbox during one run."""
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._listings: Dict[str, List[Any]] = {}
+        self._content_bytes = 0
+        self.background_writers = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> Optional[_Entry]:
+        entry = self._entries.get(path)
+        if entry is not None:
+            self._entries.move_to_end(path)
+        return entry
+
+    def is_fresh(self, entry: _Entry) -> bool:
+        return entry.validated and not self.background_writers
+
+    def put(self, path: str, exists: bool, info: Any = None, content: Optional[bytes] = None) -> None:
+        self._drop(path)
+        if content is not None and len(content) > MAX_CACHED_FILE_BYTES:
+            content = None
+        self._entries[path] = _Entry(exists=exists, info=info, content=content)
+        if content is not None:
+            self._content_bytes += len(content)
+            self._evict()
+
+    def _drop(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None and entry.content is not None:
+            self._content_bytes -= len(entry.content)
+
+    def _evict(self) -> None:
+        while self._content_bytes > MAX_CACHE_BYTES and self._entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+
+    def changed(self, path: str) -> None:
+        """Forget a path whose content changed in an unknown way."""
+        self._drop(path)
+        self._listings.pop(posixpath.dirname(path), None)
+
+    def record_write(self, path: str, content: Optional[bytes]) -> None:
+        """Write-through for a file whose new content is known."""
+        path = _normalize(path)
+        self.changed(path)
+        if content is not None:
+            self.put(path, exists=True, content=content)
+
+    def removed_tree(self, path: str) -> None:
+        for cached in [p for p in self._entries if p.startswith(path + "/")]:
+            self._drop(cached)
+        for listed in [p for p in self._listings if p == path or p.startswith(path + "/")]:
+            del self._listings[listed]
+        self.changed(path)
+        self.put(path, exists=False)
+
+    def get_listing(self, path: str) -> Optional[List[Any]]:
+        if self.background_writers:
+            return None
+        return self._listings.get(path)
+
+    def set_listing(self, path: str, listing: List[Any]) -> None:
+        self._listings[path] = listing
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Invalidation hook for changes made outside the cache (e.g. shell commands).
+
+        With a path, that entry is dropped. Without one, every entry must be
+        revalidated by mtime/size before its next use, and listings are dropped.
+        """
+        if path is not None:
+            self.changed(_normalize(path))
+            return
+        for entry in self._entries.values():
+            entry.validated = False
+        self._listings.clear()
+
+    def mark_background_writers(self) -> None:
+        """Commands keep running in the background: never trust an entry without revalidating."""
+        self.background_writers = True
+        self.invalidate()
+
+
+class CachedFileSystem:
+    """sandbox.fs with the run's file cache in front of it."""
+
+    def __init__(self, fs, cache: SandboxFileCache):
+        self._fs = fs
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._fs, name)
+
+    async def _stat(self, path: str) -> Any:
+        try:
+            info = await self._fs.get_file_info(path)
+        except Exception:
+            # Not cached as missing: the file may be created outside this run's
+            # sandbox.process (uploads, the browser API, older background jobs)
+            self._cache.changed(path)
+            raise
+        entry = self._cache.get(path)
+        if entry is not None and entry.exists and entry.content is not None and (
+            _same_file(entry.info, info) or (entry.info is None and entry.validated)
+        ):
+            entry.info = info
+            entry.validated = True
+        else:
+            self._cache.put(path, exists=True, info=info)
+        return info
+
+    async def get_file_info(self, path: str):
+        path = _normalize(path)
+        entry = self._cache.get(path)
+        if entry is not None and self._cache.is_fresh(entry):
+            if not entry.exists:
+                self._cache.hits += 1
+                raise FileNotFoundError(path)
+            if entry.info is not None:
+                self._cache.hits += 1
+                return entry.info
+        self._cache.misses += 1
+        return await self._stat(path)
+
+    async def download_file(self, path: str, *args, **kwargs) -> bytes:
+        key = _normalize(path)
+        entry = self._cache.get(key)
+        if entry is not None and entry.content is not None:
+            if self._cache.is_fresh(entry):
+                self._cache.hits += 1
+                return entry.content
+            if entry.info is not None:
+                # Revalidate: one stat instead of a full download when unchanged
+                await self._stat(key)
+                entry = self._cache.get(key)
+                if entry is not None and entry.content is not None and entry.validated:
+                    self._cache.hits += 1
+                    return entry.content
+
+        self._cache.misses += 1
+        content = await self._fs.download_file(path, *args, **kwargs)
+        if isinstance(content, bytes):
+            previous = self._cache.get(key)
+            info = previous.info if previous is not None and previous.exists else None
+            self._cache.put(key, exists=True, info=info, content=content)
+            # The stat may predate this download; only trust it for revalidation if sizes agree
+            if info is not None and info.size != len(content):
+                self._cache.get(key).info = None
+        return content
+
+    async def upload_file(self, file, remote_path: str, *args, **kwargs):
+        result = await self._fs.upload_file(file, remote_path, *args, **kwargs)
+        self._cache.record_write(remote_path, file if isinstance(file, bytes) else None)
+        return result
+
+    async def delete_file(self, path: str, *args, **kwargs):
+        result = await self._fs.delete_file(path, *args, **kwargs)
+        # Anything below a deleted directory is gone too
+        self._cache.removed_tree(_normalize(path))
+        return result
+
+    async def create_folder(self, path: str, *args, **kwargs):
+        result = await self._fs.create_folder(path, *args, **kwargs)
+        self._cache.changed(_normalize(path))
+        return result
+
+    async def move_files(self, source: str, destination: str, *args, **kwargs):
+        result = await self._fs.move_files(source, destination, *args, **kwargs)
+        self._cache.invalidate(source)
+        self._cache.invalidate(destination)
+        return result
+
+    async def set_file_permissions(self, path: str, *args, **kwargs):
+        result = await self._fs.set_file_permissions(path, *args, **kwargs)
+        entry = self._cache.get(_normalize(path))
+        if entry is not None:
+            entry.info = None
+        return result
+
+    async def list_files(self, path: str, *args, **kwargs):
+        key = _normalize(path)
+        listing = self._cache.get_listing(key)
+        if listing is not None:
+            self._cache.hits += 1
+            return listing
+        self._cache.misses += 1
+        listing = await self._fs.list_files(path, *args, **kwargs)
+        self._cache.set_listing(key, listing)
+        return listing
+
+
+class _InvalidatingProcess:
+    """sandbox.process that invalidates the file cache after running commands."""
+
+    def __init__(self, process, cache: SandboxFileCache):
+        self._process = process
+        self._cache = cache
+
+    def __getattr__(self, name):
+        attribute = getattr(self._process, name)
+        if name not in INVALIDATING_PROCESS_METHODS or not callable(attribute):
+            return attribute
+
+        async def run_and_invalidate(*args, **kwargs):
+            try:
+                return await attribute(*args, **kwargs)
+            finally:
+                self._cache.invalidate()
+
+        return run_and_invalidate
+
+
+class CachedSandbox:
+    """An AsyncSandbox whose fs and process go through the run's file cache."""
+
+    def __init__(self, sandbox, cache: SandboxFileCache):
+        self._sandbox = sandbox
+        self.fs = CachedFileSystem(sandbox.fs, cache)
+        self.process = _InvalidatingProcess(sandbox.process, cache)
+
+    def __getattr__(self, name):
+        return getattr(self._sandbox, name)
+
+
+# One cache per sandbox for each run, released with the run's ThreadManager
+_run_caches: "weakref.WeakKeyDictionary[Any, Dict[str, SandboxFileCache]]" = weakref.WeakKeyDictionary()
+
+
+def get_file_cache(run_owner: Any, sandbox_id: str) -> SandboxFileCache:
+    """Get the file cache shared by all tools of a run for a sandbox."""
+    caches = _run_caches.get(run_owner)
+    if caches is None:
+        caches = {}
+        _run_caches[run_owner] = caches
+    cache = caches.get(sandbox_id)
+    if cache is None:
+        cache = SandboxFileCache()
+        caches[sandbox_id] = cache
+        logger.debug(f"Created sandbox file cache for sandbox {sandbox_id}")
+    return cache
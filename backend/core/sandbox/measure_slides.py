@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Measure rendered slide heights, run inside the sandbox.
+
+SandboxPresentationTool installs this script in the sandbox once and calls it
+with the slide HTML files to check. All slides are rendered in a single
+headless browser, a few pages at a time, and one JSON list is printed with a
+result per file in argument order:
+{"path", "scrollHeight", "viewportHeight", "overflows", "excessHeight"} or
+{"path", "error"}.
+
+This file runs with the sandbox's Python and Playwright only.
+"""
+
+import asyncio
+import json
+import sys
+
+from playwright.async_api import async_playwright
+
+SLIDE_WIDTH = 1920
+SLIDE_HEIGHT = 1080
+CONCURRENT_PAGES = 4
+
+MEASURE_JS = """
+() => {
+    const body = document.body;
+    const html = document.documentElement;
+
+    // Get the actual scroll height (total content height)
+    const scrollHeight = Math.max(
+        body.scrollHeight, body.offsetHeight,
+        html.clientHeight, html.scrollHeight, html.offsetHeight
+    );
+
+    return {
+        scrollHeight: scrollHeight,
+        viewportHeight: window.innerHeight,
+        overflows: scrollHeight > %d,
+        excessHeight: scrollHeight - %d
+    };
+}
+""" % (SLIDE_HEIGHT, SLIDE_HEIGHT)
+
+
+async def measure(browser, path, semaphore):
+    async with semaphore:
+        page = await browser.new_page(viewport={"width": SLIDE_WIDTH, "height": SLIDE_HEIGHT})
+        try:
+            await page.goto(f"file://{path}")
+            await page.wait_for_load_state("networkidle")
+            dimensions = await page.evaluate(MEASURE_JS)
+            return {"path": path, **dimensions}
+        except Exception as e:
+            return {"path": path, "error": str(e)}
+        finally:
+            await page.close()
+
+
+async def main(paths):
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(
+            headless=True,
+            args=["--no-sandbox", "--disable-setuid-sandbox"]
+        )
+        try:
+            semaphore = asyncio.Semaphore(CONCURRENT_PAGES)
+            return await asyncio.gather(*(measure(browser, path, semaphore) for path in paths))
+        finally:
+            await browser.close()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(main(sys.argv[1:]))))
@@ -0,0 +1,273 @@
+"""
+Warm pool of pre-started sandboxes.
+
+Creating a sandbox and waiting for its services takes several seconds, and
+every new project pays it - trigger runs always get a new project. The pool
+keeps SANDBOX_POOL_SIZE sandboxes per snapshot created, started and probed
+ready. New projects take one with an atomic pop from a Redis list, so
+concurrent workers never receive the same sandbox, and the pool is refilled
+in the background. A periodic maintenance pass in the API replaces entries
+before they get too old to hand out.
+
+The Daytona client and the entry store are injectable, so the pool can run
+against a fake backend (see core/utils/scripts/simulate_sandbox_pool.py).
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+from daytona_sdk import AsyncSandbox, SandboxState
+
+from core.sandbox.sandbox import (
+    build_sandbox_params, create_sandbox, daytona, start_supervisord_session, wait_for_sandbox_ready
+)
+from core.services import redis
+from core.utils.config import Configuration
+from core.utils.logger import logger
+
+POOL_SIZE = int(os.getenv("SANDBOX_POOL_SIZE", 0))
+# Sandboxes auto-stop after 15 idle minutes; older entries are replaced instead of restarted
+POOL_ENTRY_MAX_AGE = int(os.getenv("SANDBOX_POOL_MAX_AGE", 10 * 60))
+POOL_MAINTENANCE_INTERVAL = int(os.getenv("SANDBOX_POOL_MAINTENANCE_INTERVAL", 60))
+POOL_KEY_PREFIX = "sandbox_pool:"
+REFILL_LOCK_PREFIX = "sandbox_pool:refill_lock:"
+REFILL_LOCK_SECONDS = 300
+
+
+class RedisPoolStore:
+    """Pool entries in a Redis list per snapshot; LPOP makes hand-out atomic across processes."""
+
+    async def push(self, snapshot: str, entry: Dict[str, Any]) -> None:
+        await redis.rpush(f"{POOL_KEY_PREFIX}{snapshot}", json.dumps(entry))
+
+    async def pop(self, snapshot: str) -> Optional[Dict[str, Any]]:
+        client = await redis.get_client()
+        raw = await client.lpop(f"{POOL_KEY_PREFIX}{snapshot}")
+        return json.loads(raw) if raw else None
+
+    async def push_front(self, snapshot: str, entry: Dict[str, Any]) -> None:
+        client = await redis.get_client()
+        await client.lpush(f"{POOL_KEY_PREFIX}{snapshot}", json.dumps(entry))
+
+    async def size(self, snapshot: str) -> int:
+        client = await redis.get_client()
+        return await client.llen(f"{POOL_KEY_PREFIX}{snapshot}")
+
+    async def acquire_refill_lock(self, snapshot: str) -> bool:
+        return bool(await redis.set(f"{REFILL_LOCK_PREFIX}{snapshot}", "1", ex=REFILL_LOCK_SECONDS, nx=True))
+
+    async def release_refill_lock(self, snapshot: str) -> None:
+        await redis.delete(f"{REFILL_LOCK_PREFIX}{snapshot}")
+
+
+class MemoryPoolStore:
+    """Process-local pool entries, for local development and fake backends."""
+
+    def __init__(self):
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._locks: set = set()
+
+    async def push(self, snapshot: str, entry: Dict[str, Any]) -> None:
+        self._entries.setdefault(snapshot, deque()).append(entry)
+
+    async def pop(self, snapshot: str) -> Optional[Dict[str, Any]]:
+        entries = self._entries.get(snapshot)
+        return entries.popleft() if entries else None
+
+    async def push_front(self, snapshot: str, entry: Dict[str, Any]) -> None:
+        self._entries.setdefault(snapshot, deque()).appendleft(entry)
+
+    async def size(self, snapshot: str) -> int:
+        return len(self._entries.get(snapshot, ()))
+
+    async def acquire_refill_lock(self, snapshot: str) -> bool:
+        if snapshot in self._locks:
+            return False
+        self._locks.add(snapshot)
+        return True
+
+    async def release_refill_lock(self, snapshot: str) -> None:
+        self._locks.discard(snapshot)
+
+
+@dataclass
+class PooledSandbox:
+    sandbox: AsyncSandbox
+    password: str
+
+
+class SandboxPool:
+    """Keeps ready sandboxes per snapshot and hands them to new projects."""
+
+    def __init__(self, client=None, store=None, size: int = POOL_SIZE, snapshot: Optional[str] = None):
+        self.client = client or daytona
+        self.store = store or RedisPoolStore()
+        self.size = size
+        self.snapshot = snapshot or Configuration.SANDBOX_SNAPSHOT_NAME
+        self._refill_task: Optional[asyncio.Task] = None
+        self._maintenance_task: Optional[asyncio.Task] = None
+        # Fire-and-forget deletions, referenced until done so they aren't garbage collected
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    async def acquire(self, project_id: str) -> Optional[PooledSandbox]:
+        """Take a ready sandbox from the pool, or None if the pool is empty."""
+        if not self.enabled:
+            return None
+        try:
+            while True:
+                entry = await self.store.pop(self.snapshot)
+                if entry is None:
+                    logger.debug(f"Sandbox pool for {self.snapshot} is empty")
+                    return None
+
+                if time.time() - entry["created_at"] > POOL_ENTRY_MAX_AGE:
+                    self._discard(entry["id"])
+                    continue
+
+                try:
+                    sandbox = await self.client.get(entry["id"])
+                except Exception as e:
+                    logger.warning(f"Pooled sandbox {entry['id']} is gone: {e}")
+                    continue
+                if sandbox.state != SandboxState.STARTED:
+                    # Starting it again would cost as much as creating a fresh one
+                    self._discard(entry["id"])
+                    continue
+
+                try:
+                    await sandbox.set_labels({'id': project_id})
+                except Exception as e:
+                    logger.warning(f"Failed to label pooled sandbox {sandbox.id} for project {project_id}: {e}")
+                logger.info(f"Assigned pooled sandbox {sandbox.id} to project {project_id}")
+                return PooledSandbox(sandbox=sandbox, password=entry["pass"])
+        except Exception as e:
+            logger.warning(f"Failed to take a sandbox from the pool: {e}")
+            return None
+        finally:
+            self.schedule_refill()
+
+    def schedule_refill(self) -> None:
+        """Top the pool up in the background."""
+        if not self.enabled or (self._refill_task and not self._refill_task.done()):
+            return
+        self._refill_task = asyncio.create_task(self.refill())
+
+    async def refill(self) -> int:
+        """Create sandboxes until the pool holds `size` entries; returns how many were added."""
+        if not await self.store.acquire_refill_lock(self.snapshot):
+            return 0
+        try:
+            missing = self.size - await self.store.size(self.snapshot)
+            if missing <= 0:
+                return 0
+            results = await asyncio.gather(*(self._create_entry() for _ in range(missing)))
+            added = sum(1 for result in results if result)
+            logger.info(f"Refilled sandbox pool for {self.snapshot} with {added}/{missing} sandboxes")
+            return added
+        except Exception as e:
+            logger.error(f"Failed to refill sandbox pool: {e}")
+            return 0
+        finally:
+            await self.store.release_refill_lock(self.snapshot)
+
+    async def replace_expiring(self) -> int:
+        """Discard entries that would be too old to hand out before the next maintenance pass.
+
+        Entries are pushed in creation order, so the oldest are at the head of
+        the list. Returns how many were discarded; refill() replaces them.
+        """
+        cutoff = time.time() - max(0, POOL_ENTRY_MAX_AGE - POOL_MAINTENANCE_INTERVAL)
+        discarded = 0
+        for _ in range(await self.store.size(self.snapshot)):
+            entry = await self.store.pop(self.snapshot)
+            if entry is None:
+                break
+            if entry["created_at"] > cutoff:
+                await self.store.push_front(self.snapshot, entry)
+                break
+            self._discard(entry["id"])
+            discarded += 1
+        return discarded
+
+    async def _maintain(self) -> None:
+        while True:
+            try:
+                discarded = await self.replace_expiring()
+                if discarded:
+                    logger.info(f"Replacing {discarded} aging sandboxes in the pool for {self.snapshot}")
+                await self.refill()
+            except Exception as e:
+                logger.warning(f"Sandbox pool maintenance failed: {e}")
+            await asyncio.sleep(POOL_MAINTENANCE_INTERVAL)
+
+    def start_maintenance(self) -> None:
+        """Fill the pool now and keep it fresh with a periodic maintenance pass."""
+        if not self.enabled or (self._maintenance_task and not self._maintenance_task.done()):
+            return
+        self._maintenance_task = asyncio.create_task(self._maintain())
+
+    async def stop_maintenance(self) -> None:
+        if self._maintenance_task and not self._maintenance_task.done():
+            self._maintenance_task.cancel()
+            try:
+                await self._maintenance_task
+            except asyncio.CancelledError:
+                pass
+        self._maintenance_task = None
+
+    async def _create_entry(self) -> bool:
+        password = str(uuid.uuid4())
+        sandbox = None
+        try:
+            sandbox = await self.client.create(build_sandbox_params(password, snapshot=self.snapshot))
+            await start_supervisord_session(sandbox)
+            if not await wait_for_sandbox_ready(sandbox):
+                raise RuntimeError("readiness probe timed out")
+            await self.store.push(self.snapshot, {"id": sandbox.id, "pass": password, "created_at": time.time()})
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to create pooled sandbox: {e}")
+            if sandbox is not None:
+                self._discard(sandbox.id)
+            return False
+
+    def _discard(self, sandbox_id: str) -> None:
+        async def _delete():
+            try:
+                await self.client.delete(await self.client.get(sandbox_id))
+            except Exception as e:
+                logger.warning(f"Failed to delete pooled sandbox {sandbox_id}: {e}")
+
+        task = asyncio.create_task(_delete())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+
+sandbox_pool = SandboxPool()
+
+
+async def create_project_sandbox(project_id: str, wait_ready: bool = True) -> Tuple[AsyncSandbox, str]:
+    """Get a sandbox for a new project: from the warm pool if possible, else created now.
+
+    Returns (sandbox, password). With wait_ready, a newly created sandbox is
+    probed until its services respond.
+    """
+    pooled = await sandbox_pool.acquire(project_id)
+    if pooled:
+        return pooled.sandbox, pooled.password
+
+    password = str(uuid.uuid4())
+    sandbox = await create_sandbox(password, project_id)
+    if wait_ready:
+        await wait_for_sandbox_ready(sandbox)
+    return sandbox, password
@@ -4,6 +4,7 @@ from core.utils.logger import logger
 from core.utils.config import config
 from core.utils.config import Configuration
 import asyncio
+import time
 
 load_dotenv()
 
@@ -31,6 +32,41 @@ else:
 
 daytona = AsyncDaytona(daytona_config)
 
+READINESS_TIMEOUT = 60
+READINESS_PROBE_INTERVAL = 0.5
+# Runs inside the sandbox so a single exec covers the whole wait: ready once
+# supervisord is up and the workspace HTTP server answers (any status code)
+READINESS_PROBE = (
+    "for i in $(seq {attempts}); do "
+    "pgrep -x supervisord >/dev/null && curl -s -o /dev/null --max-time 1 http://localhost:8080/ && exit 0; "
+    "sleep {interval}; done; exit 1"
+)
+
+async def wait_for_sandbox_ready(sandbox: AsyncSandbox, timeout: float = READINESS_TIMEOUT) -> bool:
+    """Wait until the sandbox services respond, instead of sleeping a fixed time.
+    
+    Returns False if the sandbox is not ready within the timeout.
+    """
+    start = time.monotonic()
+    while True:
+        remaining = timeout - (time.monotonic() - start)
+        if remaining <= 0:
+            logger.warning(f"Sandbox {sandbox.id} not ready after {timeout}s")
+            return False
+        attempts = max(1, int(remaining / READINESS_PROBE_INTERVAL))
+        try:
+            response = await sandbox.process.exec(
+                READINESS_PROBE.format(attempts=attempts, interval=READINESS_PROBE_INTERVAL),
+                timeout=int(remaining) + 5
+            )
+            if response.exit_code == 0:
+                logger.debug(f"Sandbox {sandbox.id} ready after {time.monotonic() - start:.1f}s")
+                return True
+        except Exception as e:
+            # The toolbox may not accept commands yet right after create/start
+            logger.debug(f"Readiness probe for sandbox {sandbox.id} failed: {e}")
+            await asyncio.sleep(READINESS_PROBE_INTERVAL)
+
 async def get_or_start_sandbox(sandbox_id: str) -> AsyncSandbox:
     """Retrieve a sandbox by ID, check its state, and start it if needed."""
     
@@ -43,17 +79,12 @@ async def get_or_start_sandbox(sandbox_id: str) -> AsyncSandbox:
         if sandbox.state in [SandboxState.ARCHIVED, SandboxState.STOPPED, SandboxState.ARCHIVING]:
             logger.info(f"Sandbox is in {sandbox.state} state. Starting...")
             try:
+                # start() returns once the sandbox reports STARTED
                 await daytona.start(sandbox)
                 
-                # Wait for sandbox to reach STARTED state
-                for _ in range(30):
-                    await asyncio.sleep(1)
-                    sandbox = await daytona.get(sandbox_id)
-                    if sandbox.state == SandboxState.STARTED:
-                        break
-                
                 # Start supervisord in a session when restarting
                 await start_supervisord_session(sandbox)
+                await wait_for_sandbox_ready(sandbox)
             except Exception as e:
                 logger.error(f"Error starting sandbox: {e}")
                 raise e
@@ -79,19 +110,15 @@ async def start_supervisord_session(sandbox: AsyncSandbox):
         # Don't fail if supervisord already running
         logger.warning(f"Could not start supervisord: {str(e)}")
 
-async def create_sandbox(password: str, project_id: str = None) -> AsyncSandbox:
-    """Create a new sandbox with all required services configured and running."""
-    
-    logger.info("Creating new Daytona sandbox environment")
-    # logger.debug("Configuring sandbox with snapshot and environment variables")
-    
+def build_sandbox_params(password: str, project_id: str = None, snapshot: str = None) -> CreateSandboxFromSnapshotParams:
+    """Parameters for a new sandbox; shared with the warm sandbox pool."""
     labels = None
     if project_id:
         # logger.debug(f"Using sandbox_id as label: {project_id}")
         labels = {'id': project_id}
         
-    params = CreateSandboxFromSnapshotParams(
-        snapshot=Configuration.SANDBOX_SNAPSHOT_NAME,
+    return CreateSandboxFromSnapshotParams(
+        snapshot=snapshot or Configuration.SANDBOX_SNAPSHOT_NAME,
         public=True,
         labels=labels,
         env_vars={
@@ -115,6 +142,13 @@ async def create_sandbox(password: str, project_id: str = None) -> AsyncSandbox:
         auto_stop_interval=15,
         auto_archive_interval=30,
     )
+
+async def create_sandbox(password: str, project_id: str = None) -> AsyncSandbox:
+    """Create a new sandbox with all required services configured and running."""
+    
+    logger.info("Creating new Daytona sandbox environment")
+    # logger.debug("Configuring sandbox with snapshot and environment variables")
+    params = build_sandbox_params(password, project_id)
     
     # Create the sandbox
     sandbox = await daytona.create(params)
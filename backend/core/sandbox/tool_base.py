@@ -1,17 +1,107 @@
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+import functools
+import gzip
+import hashlib
+import io
+import os
+import shlex
+import tarfile
 import uuid
-import asyncio
 
 from core.agentpress.thread_manager import ThreadManager
-from core.agentpress.tool import Tool
+from core.agentpress.tool import Tool, tool_concurrency
 from daytona_sdk import AsyncSandbox
-from core.sandbox.sandbox import get_or_start_sandbox, create_sandbox, delete_sandbox
+from core.sandbox.sandbox import get_or_start_sandbox, delete_sandbox
+from core.sandbox.pool import create_project_sandbox
+from core.sandbox.fs_cache import CachedSandbox, SandboxFileCache, get_file_cache
 from core.utils.logger import logger
 from core.utils.files_utils import clean_path
 from core.utils.config import config
 
+SANDBOX_SCRIPTS_DIR = os.path.dirname(__file__)
+SCRIPT_NOT_INSTALLED_EXIT_CODE = 90
+
+# Pre-built archives of backend directories (e.g. presentation templates), keyed by content hash
+_directory_archives: Dict[str, bytes] = {}
+MAX_CACHED_ARCHIVES = 32
+
+
+def build_archive(files: Dict[str, bytes]) -> bytes:
+    """Pack files (relative path -> content) into a deterministic tar.gz archive."""
+    buffer = io.BytesIO()
+    # Fixed mtimes keep the bytes identical for identical content
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as gz:
+        with tarfile.open(fileobj=gz, mode="w") as tar:
+            for path in sorted(files):
+                info = tarfile.TarInfo(path)
+                info.size = len(files[path])
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(files[path]))
+    return buffer.getvalue()
+
+
+def read_archive(archive: bytes) -> Dict[str, bytes]:
+    """Unpack the regular files of a tar.gz archive into memory."""
+    files = {}
+    with tarfile.open(fileobj=io.BytesIO(archive), mode="r:gz") as tar:
+        for member in tar:
+            if member.isfile():
+                files[member.name.removeprefix("./")] = tar.extractfile(member).read()
+    return files
+
+
+def archive_directory(path: str) -> Tuple[str, bytes]:
+    """Get (content hash, tar.gz archive) for a backend directory.
+
+    The archive is built once per distinct content and reused afterwards.
+    """
+    files = {}
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            source = os.path.join(root, filename)
+            with open(source, "rb") as f:
+                files[os.path.relpath(source, path).replace("\\", "/")] = f.read()
+
+    digest = hashlib.sha256()
+    for rel_path in sorted(files):
+        digest.update(rel_path.encode())
+        digest.update(hashlib.sha256(files[rel_path]).digest())
+    content_hash = digest.hexdigest()
+
+    archive = _directory_archives.get(content_hash)
+    if archive is None:
+        archive = build_archive(files)
+        if len(_directory_archives) >= MAX_CACHED_ARCHIVES:
+            _directory_archives.pop(next(iter(_directory_archives)))
+        _directory_archives[content_hash] = archive
+        logger.debug(f"Built archive for {path}: {len(files)} files, {len(archive)} bytes ({content_hash[:12]})")
+    return content_hash, archive
+
+
+@functools.lru_cache(maxsize=None)
+def sandbox_script(filename: str) -> Tuple[bytes, str]:
+    """A helper script from core/sandbox and the sandbox path of this version of it."""
+    with open(os.path.join(SANDBOX_SCRIPTS_DIR, filename), "rb") as f:
+        script = f.read()
+    name = os.path.splitext(filename)[0]
+    return script, f"/tmp/.{name}_{hashlib.sha256(script).hexdigest()[:12]}.py"
+
+
+def _shell_path(path: str) -> str:
+    """Quote a sandbox path for the shell, keeping a leading ~/ expandable."""
+    if path == "~" or path.startswith("~/"):
+        return "~/" + shlex.quote(path[2:]) if len(path) > 2 else "~"
+    return shlex.quote(path)
+
+
+@tool_concurrency(resource="sandbox")
 class SandboxToolsBase(Tool):
-    """Base class for all sandbox tools that provides project-based sandbox access."""
+    """Base class for all sandbox tools that provides project-based sandbox access.
+
+    Methods are scheduled as sandbox writes unless they declare otherwise, so
+    a tool that changes the sandbox can't race later calls that depend on it.
+    Read-only methods opt out with @tool_concurrency(read_only=True, resource="sandbox").
+    """
     
     # Class variable to track if sandbox URLs have been printed
     _urls_printed = False
@@ -25,6 +115,8 @@ class SandboxToolsBase(Tool):
         self._sandbox_id = None
         self._sandbox_pass = None
         self._sandbox_url = None
+        self._cached_sandbox = None
+        self._fs_cache = None
 
     async def _ensure_sandbox(self) -> AsyncSandbox:
         """Ensure we have a valid sandbox instance, retrieving it from the project if needed.
@@ -48,14 +140,10 @@ class SandboxToolsBase(Tool):
                 # If there is no sandbox recorded for this project, create one lazily
                 if not sandbox_info.get('id'):
                     logger.debug(f"No sandbox recorded for project {self.project_id}; creating lazily")
-                    sandbox_pass = str(uuid.uuid4())
-                    sandbox_obj = await create_sandbox(sandbox_pass, self.project_id)
+                    # Comes from the warm pool when possible; otherwise created and probed until ready
+                    sandbox_obj, sandbox_pass = await create_project_sandbox(self.project_id)
                     sandbox_id = sandbox_obj.id
                     
-                    # Wait 5 seconds for services to start up
-                    logger.info(f"Waiting 5 seconds for sandbox {sandbox_id} services to initialize...")
-                    await asyncio.sleep(5)
-                    
                     # Gather preview links and token (best-effort parsing)
                     try:
                         vnc_link = await sandbox_obj.get_preview_link(6080)
@@ -93,7 +181,7 @@ class SandboxToolsBase(Tool):
                     self._sandbox_id = sandbox_id
                     self._sandbox_pass = sandbox_pass
                     self._sandbox_url = website_url
-                    self._sandbox = await get_or_start_sandbox(self._sandbox_id)
+                    self._sandbox = sandbox_obj
                 else:
                     # Use existing sandbox metadata
                     self._sandbox_id = sandbox_info['id']
@@ -109,10 +197,23 @@ class SandboxToolsBase(Tool):
 
     @property
     def sandbox(self) -> AsyncSandbox:
-        """Get the sandbox instance, ensuring it exists."""
+        """Get the sandbox instance, ensuring it exists.
+
+        File system calls go through the run's file cache (see core.sandbox.fs_cache).
+        """
         if self._sandbox is None:
             raise RuntimeError("Sandbox not initialized. Call _ensure_sandbox() first.")
-        return self._sandbox
+        if self._cached_sandbox is None or self._cached_sandbox._sandbox is not self._sandbox:
+            self._cached_sandbox = CachedSandbox(self._sandbox, self.fs_cache)
+        return self._cached_sandbox
+
+    @property
+    def fs_cache(self) -> SandboxFileCache:
+        """File cache shared by all tools of the current run for this sandbox."""
+        if self._fs_cache is None:
+            owner = self.thread_manager if self.thread_manager is not None else self
+            self._fs_cache = get_file_cache(owner, self.sandbox_id)
+        return self._fs_cache
 
     @property
     def sandbox_id(self) -> str:
@@ -132,4 +233,72 @@ class SandboxToolsBase(Tool):
         """Clean and normalize a path to be relative to /workspace."""
         cleaned_path = clean_path(path, self.workspace_path)
         logger.debug(f"Cleaned path: {path} -> {cleaned_path}")
-        return cleaned_path
\ No newline at end of file
+        return cleaned_path
+
+    async def upload_archive(self, archive: bytes, target_dir: str, remove: Optional[Iterable[str]] = None) -> None:
+        """Extract a tar.gz archive into target_dir in the sandbox.
+
+        Costs one upload and one exec regardless of how many files the archive
+        holds. Paths in `remove` (relative to target_dir) are deleted in the
+        same exec, before extraction.
+        """
+        await self._ensure_sandbox()
+        archive_path = f"/tmp/transfer_{uuid.uuid4().hex}.tar.gz"
+        # Temporary archives bypass the file cache
+        await self._sandbox.fs.upload_file(archive, archive_path)
+
+        target = _shell_path(target_dir)
+        command = f"mkdir -p {target} && cd {target}"
+        removals = " ".join(shlex.quote(path) for path in (remove or []))
+        if removals:
+            command += f" && rm -rf -- {removals}"
+        command += f" && tar -xzf {archive_path} --no-same-owner; status=$?; rm -f {archive_path}; exit $status"
+
+        response = await self._sandbox.process.exec(command)
+        self.fs_cache.invalidate()
+        if response.exit_code != 0:
+            raise RuntimeError(f"Failed to extract archive into {target_dir}: {response.result}")
+
+    async def upload_files_bulk(self, files: Dict[str, bytes], target_dir: str, remove: Optional[Iterable[str]] = None) -> None:
+        """Write many files (path relative to target_dir -> content) in one transfer."""
+        if not files and not remove:
+            return
+        await self.upload_archive(build_archive(files), target_dir, remove)
+
+    async def download_files_bulk(self, paths: List[str], base_dir: str) -> Dict[str, bytes]:
+        """Read many sandbox files (paths relative to base_dir) in one transfer.
+
+        Files that are missing or unreadable are left out of the result.
+        """
+        if not paths:
+            return {}
+        await self._ensure_sandbox()
+        archive_path = f"/tmp/transfer_{uuid.uuid4().hex}.tar.gz"
+        quoted = " ".join(shlex.quote(path) for path in paths)
+        response = await self._sandbox.process.exec(
+            f"cd {_shell_path(base_dir)} && tar -czf {archive_path} --ignore-failed-read -- {quoted} 2>/dev/null; test -f {archive_path}"
+        )
+        if response.exit_code != 0:
+            raise RuntimeError(f"Failed to archive files in {base_dir}: {response.result}")
+        try:
+            archive = await self._sandbox.fs.download_file(archive_path)
+        finally:
+            await self._sandbox.process.exec(f"rm -f {archive_path}")
+        return read_archive(archive)
+
+    async def run_sandbox_script(self, filename: str, args: str = "", timeout: Optional[int] = None):
+        """Run a helper script from core/sandbox with python3 in the sandbox.
+
+        The script is uploaded only when the sandbox doesn't have this version
+        of it yet, so it is installed once per sandbox rather than per call.
+        `args` must already be shell-quoted. Runs on the raw sandbox, so it
+        doesn't invalidate the file cache; callers record what they change.
+        """
+        await self._ensure_sandbox()
+        script, script_path = sandbox_script(filename)
+        command = f"test -f {script_path} || exit {SCRIPT_NOT_INSTALLED_EXIT_CODE}; python3 {script_path} {args}"
+        response = await self._sandbox.process.exec(command, timeout=timeout)
+        if response.exit_code == SCRIPT_NOT_INSTALLED_EXIT_CODE:
+            await self._sandbox.fs.upload_file(script, script_path)
+            response = await self._sandbox.process.exec(command, timeout=timeout)
+        return response
@@ -14,6 +14,7 @@ from litellm.files.main import ModelResponse
 from core.utils.logger import logger
 from core.utils.config import config
 from core.agentpress.error_processor import ErrorProcessor
+from core.services import llm_transport
 
 # Configure LiteLLM
 # os.environ['LITELLM_LOG'] = 'DEBUG'
@@ -29,6 +30,7 @@ litellm.drop_params = True
 # Constants
 MAX_RETRIES = 3
 provider_router = None
+_provider_router_config = None
 
 
 class LLMError(Exception):
@@ -73,7 +75,7 @@ def setup_api_keys() -> None:
     pass
 
 def setup_provider_router(openai_compatible_api_key: str = None, openai_compatible_api_base: str = None):
-    global provider_router
+    global provider_router, _provider_router_config
     
     # Get config values safely
     config_openai_key = getattr(config, 'OPENAI_COMPATIBLE_API_KEY', None) if config else None
@@ -82,6 +84,11 @@ def setup_provider_router(openai_compatible_api_key: str = None, openai_compatib
     effective_key = openai_compatible_api_key or config_openai_key
     effective_base = openai_compatible_api_base or config_openai_base
 
+    # Rebuilding the router drops its cached clients, so only do it when the config changes
+    if provider_router is not None and _provider_router_config == (effective_key, effective_base):
+        return
+    _provider_router_config = (effective_key, effective_base)
+
     litellm_params_openai_compat = {"model": "openai/*"}
     if effective_key:
         litellm_params_openai_compat["api_key"] = effective_key
@@ -129,8 +136,18 @@ def _configure_openai_compatible(params: Dict[str, Any], model_name: str, api_ke
     setup_provider_router(effective_api_key, effective_api_base)
     params["api_key"] = effective_api_key
     params["api_base"] = effective_api_base
+    params["client"] = llm_transport.get_openai_client(effective_api_key, effective_api_base)
     logger.debug(f"Configured OpenAI-compatible provider with custom API base")
 
+def _configure_pooled_client(params: Dict[str, Any], model_name: str) -> None:
+    """Route native OpenAI models through the shared connection pool."""
+    if "client" in params or params.get("api_base") or not model_name.startswith("openai/"):
+        return
+    openai_key = params.get("api_key") or (getattr(config, 'OPENAI_API_KEY', None) if config else None)
+    if not openai_key:
+        return
+    params["client"] = llm_transport.get_openai_client(openai_key, llm_transport.OPENAI_API_BASE)
+
 def _add_tools_config(params: Dict[str, Any], tools: Optional[List[Dict[str, Any]]], tool_choice: str) -> None:
     """Add tools configuration to parameters."""
     if tools is None:
@@ -196,6 +213,7 @@ async def make_llm_api_call(
     
     # Apply additional configurations that aren't in the model config yet
     _configure_openai_compatible(params, model_name, api_key, api_base)
+    _configure_pooled_client(params, resolved_model_name)
     _add_tools_config(params, tools, tool_choice)
     
     try:
@@ -249,6 +267,7 @@ async def _wrap_streaming_response(response) -> AsyncGenerator:
 
 setup_api_keys()
 setup_provider_router()
+llm_transport.configure_litellm()
 
 
 if __name__ == "__main__":
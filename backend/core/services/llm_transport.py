@@ -0,0 +1,229 @@
+"""
+Shared HTTP transport for LLM provider calls.
+
+Keeps one pooled httpx.AsyncClient per (provider, api_base) so TLS sessions and
+keep-alive connections are reused across agent runs, pre-warms provider
+connections when a worker starts, and publishes per-pool connection gauges.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional, List, Tuple
+
+import httpx
+import litellm
+from openai import AsyncOpenAI
+
+from core.services import metrics
+from core.utils.config import config
+from core.utils.logger import logger
+
+# Pool configuration
+MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 40))
+KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", 120.0))
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 600.0
+WARMUP_TIMEOUT = 5.0
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+OPENAI_API_BASE = "https://api.openai.com/v1"
+
+
+@dataclass
+class PoolStats:
+    """Usage counters for a single provider connection pool."""
+    provider: str
+    api_base: str
+    in_flight: int = 0
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response stream that releases its in-flight slot when closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, transport: "_TrackedTransport"):
+        self._stream = stream
+        self._transport = transport
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._transport.release()
+
+
+class _TrackedTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that counts in-flight requests and publishes pool gauges."""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, stats: PoolStats):
+        self._transport = transport
+        self._stats = stats
+        labels = {"provider": stats.provider, "api_base": stats.api_base or "default"}
+        self._in_use_gauge = metrics.llm_pool_connections_in_use.labels(**labels)
+        self._idle_gauge = metrics.llm_pool_connections_idle.labels(**labels)
+
+    def _idle_connections(self) -> int:
+        try:
+            return sum(1 for connection in self._transport._pool.connections if connection.is_idle())
+        except Exception:
+            return 0
+
+    def _publish(self) -> None:
+        self._in_use_gauge.set(self._stats.in_flight)
+        self._idle_gauge.set(self._idle_connections())
+
+    def release(self) -> None:
+        self._stats.in_flight -= 1
+        self._publish()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._stats.in_flight += 1
+        self._publish()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self.release()
+            raise
+        response.stream = _TrackedStream(response.stream, self)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+        self._in_use_gauge.set(0)
+        self._idle_gauge.set(0)
+
+
+@dataclass
+class _ProviderPool:
+    client: httpx.AsyncClient
+    stats: PoolStats
+    openai_clients: Dict[str, AsyncOpenAI] = field(default_factory=dict)
+
+
+_pools: Dict[Tuple[str, str], _ProviderPool] = {}
+
+
+def _normalize_base(api_base: Optional[str]) -> str:
+    return (api_base or "").rstrip("/")
+
+
+def _create_pool(provider: str, api_base: str) -> _ProviderPool:
+    stats = PoolStats(provider=provider, api_base=api_base)
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=HTTP2_AVAILABLE, retries=1)
+    client = httpx.AsyncClient(
+        transport=_TrackedTransport(transport, stats),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+    )
+    logger.debug(f"Created LLM HTTP pool for {provider} ({api_base or 'default'}), http2={HTTP2_AVAILABLE}")
+    return _ProviderPool(client=client, stats=stats)
+
+
+def get_http_client(provider: str, api_base: Optional[str] = None) -> httpx.AsyncClient:
+    """Get the shared pooled HTTP client for a provider and API base."""
+    key = (provider, _normalize_base(api_base))
+    pool = _pools.get(key)
+    if pool is None or pool.client.is_closed:
+        pool = _create_pool(*key)
+        _pools[key] = pool
+    return pool.client
+
+
+def get_openai_client(api_key: str, api_base: Optional[str], provider: str = "openai") -> AsyncOpenAI:
+    """Get a cached AsyncOpenAI client backed by the shared pool for api_base.
+
+    Per-thread OpenAI-compatible overrides get their own pool keyed by api_base,
+    and one client per API key on top of it.
+    """
+    get_http_client(provider, api_base)
+    pool = _pools[(provider, _normalize_base(api_base))]
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    client = pool.openai_clients.get(key_hash)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=api_base or None,
+            http_client=pool.client,
+        )
+        pool.openai_clients[key_hash] = client
+    return client
+
+
+def configure_litellm() -> None:
+    """Point LiteLLM's shared async session at the default pool."""
+    litellm.aclient_session = get_http_client("default")
+
+
+def _configured_warmup_targets() -> List[Tuple[str, Optional[str], str]]:
+    if not config:
+        return []
+    targets = []
+    if getattr(config, "OPENAI_API_KEY", None):
+        targets.append(("openai", OPENAI_API_BASE, OPENAI_API_BASE))
+    if getattr(config, "OPENAI_COMPATIBLE_API_BASE", None):
+        base = config.OPENAI_COMPATIBLE_API_BASE
+        targets.append(("openai", base, base))
+    # Anthropic, Gemini, Groq and xAI go through LiteLLM's native handlers, which
+    # keep their own HTTP clients, so warming the default pool wouldn't help them.
+    # OpenRouter is called through the OpenAI SDK on LiteLLM's shared session.
+    if getattr(config, "OPENROUTER_API_KEY", None) and getattr(config, "OPENROUTER_API_BASE", None):
+        targets.append(("default", None, config.OPENROUTER_API_BASE))
+    return targets
+
+
+async def _warm_pool(provider: str, api_base: Optional[str], url: str) -> bool:
+    client = get_http_client(provider, api_base)
+    try:
+        # Any response means DNS, TCP and TLS are done and the connection is pooled
+        await client.head(url, timeout=WARMUP_TIMEOUT)
+        return True
+    except Exception as e:
+        logger.debug(f"LLM pool warmup failed for {url}: {e}")
+        return False
+
+
+async def warm_up(targets: Optional[List[Tuple[str, Optional[str], str]]] = None) -> int:
+    """Open connections to configured providers ahead of the first LLM call.
+
+    Args:
+        targets: Optional list of (provider, api_base, url); defaults to providers with API keys
+
+    Returns:
+        Number of provider connections successfully warmed
+    """
+    configure_litellm()
+    targets = targets if targets is not None else _configured_warmup_targets()
+    if not targets:
+        return 0
+    results = await asyncio.gather(*(_warm_pool(*target) for target in targets))
+    warmed = sum(1 for r in results if r)
+    logger.info(f"Warmed {warmed}/{len(targets)} LLM provider connections")
+    return warmed
+
+
+async def close() -> None:
+    """Close all provider pools."""
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        try:
+            await pool.client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing LLM HTTP pool for {pool.stats.provider}: {e}")
+    if litellm.aclient_session is not None and litellm.aclient_session.is_closed:
+        litellm.aclient_session = None
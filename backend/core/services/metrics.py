@@ -0,0 +1,127 @@
+"""
+Prometheus metrics for the agent hot path.
+
+Histograms cover LLM streaming latency (time to first token, inter-chunk gap,
+tokens per second), tool execution, message persistence and Redis publish;
+gauges track the LLM provider connection pools.
+They are served on internal ports, never next to the public API: the API's
+gunicorn master on API_METRICS_PORT (see gunicorn.conf.py) and one dramatiq
+worker process on WORKER_METRICS_PORT. Both run several processes, so
+PROMETHEUS_MULTIPROC_DIR must be set for the samples of all of them to be
+aggregated.
+"""
+
+import os
+
+from prometheus_client import (
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    start_http_server,
+)
+from prometheus_client import multiprocess
+
+from core.utils.logger import logger
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+API_METRICS_PORT = int(os.getenv("API_METRICS_PORT", 9190))
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 9191))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TTFT_BUCKETS = (0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 20.0, 30.0, 60.0)
+CHUNK_GAP_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+TOOL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+TOKENS_PER_SECOND_BUCKETS = (5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500)
+
+llm_time_to_first_token = Histogram(
+    "agent_llm_time_to_first_token_seconds",
+    "Time from issuing the LLM request to receiving the first streamed chunk",
+    ["model"],
+    buckets=TTFT_BUCKETS,
+)
+
+llm_inter_chunk_gap = Histogram(
+    "agent_llm_inter_chunk_seconds",
+    "Time between consecutive streamed LLM chunks",
+    ["model"],
+    buckets=CHUNK_GAP_BUCKETS,
+)
+
+llm_tokens_per_second = Histogram(
+    "agent_llm_tokens_per_second",
+    "Completion tokens per second over the streamed portion of an LLM response",
+    ["model"],
+    buckets=TOKENS_PER_SECOND_BUCKETS,
+)
+
+tool_execution_latency = Histogram(
+    "agent_tool_execution_seconds",
+    "Tool execution latency",
+    ["tool_name", "success"],
+    buckets=TOOL_BUCKETS,
+)
+
+message_save_latency = Histogram(
+    "agent_message_save_seconds",
+    "Latency of persisting a thread message",
+    ["message_type"],
+    buckets=LATENCY_BUCKETS,
+)
+
+redis_publish_latency = Histogram(
+    "agent_redis_publish_seconds",
+    "Latency of publishing to a Redis channel",
+    buckets=LATENCY_BUCKETS,
+)
+
+llm_pool_connections_in_use = Gauge(
+    "agent_llm_pool_connections_in_use",
+    "Requests holding a connection of an LLM provider pool",
+    ["provider", "api_base"],
+    multiprocess_mode="livesum",
+)
+
+llm_pool_connections_idle = Gauge(
+    "agent_llm_pool_connections_idle",
+    "Idle keep-alive connections in an LLM provider pool",
+    ["provider", "api_base"],
+    multiprocess_mode="livesum",
+)
+
+
+def start_metrics_server(port: int) -> bool:
+    """Start the /metrics exporter on an internal port.
+
+    Only one process per host can bind the port. With several processes
+    PROMETHEUS_MULTIPROC_DIR must be set so the process that binds it reports for
+    all; without it the other processes' metrics are lost, which is logged as an error.
+
+    Returns:
+        True if the exporter was started by this process
+    """
+    try:
+        if MULTIPROC_DIR:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            start_http_server(port, registry=registry)
+        else:
+            start_http_server(port)
+        logger.info(f"Metrics exporter listening on :{port}/metrics")
+        return True
+    except OSError as e:
+        if not MULTIPROC_DIR:
+            logger.error(
+                f"Metrics exporter could not bind :{port} ({e}); this process's metrics are not exported. "
+                f"Set PROMETHEUS_MULTIPROC_DIR when running several processes"
+            )
+        else:
+            logger.debug(f"Metrics exporter already served by another process on :{port}")
+        return False
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop the live gauge samples of an exiting process in multiprocess mode."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -2,7 +2,9 @@ import redis.asyncio as redis
 import os
 from dotenv import load_dotenv
 import asyncio
+import time
 from core.utils.logger import logger
+from core.services import metrics
 from typing import List, Any
 from core.utils.retry import retry
 
@@ -144,7 +146,11 @@ async def delete(key: str):
 async def publish(channel: str, message: str):
     """Publish a message to a Redis channel."""
     redis_client = await get_client()
-    return await redis_client.publish(channel, message)
+    publish_start = time.monotonic()
+    try:
+        return await redis_client.publish(channel, message)
+    finally:
+        metrics.redis_publish_latency.observe(time.monotonic() - publish_start)
 
 
 async def create_pubsub():
@@ -1,40 +1,62 @@
+import asyncio
 import json
 import traceback
 import uuid
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Optional, Literal
 from fastapi import APIRouter, HTTPException, Depends, Form, Query, Body, Request
 
 from core.utils.auth_utils import verify_and_get_user_id_from_jwt, verify_and_authorize_thread_access, require_thread_access, AuthorizedThreadAccess
 from core.utils.logger import logger
-from core.sandbox.sandbox import create_sandbox, delete_sandbox
+from core.utils.pagination import PaginationService, CountMode
+from core.utils.cache import get_cached_thread_summary, cache_thread_summary, invalidate_thread_summary
+from core.sandbox.sandbox import delete_sandbox
+from core.sandbox.pool import create_project_sandbox
 
 from .api_models import CreateThreadResponse, MessageCreateRequest
 from . import core_utils as utils
 
 router = APIRouter(tags=["threads"])
 
+# Narrow projections for list/detail views instead of select('*')
+THREAD_LIST_COLUMNS = 'thread_id, project_id, metadata, is_public, created_at, updated_at'
+PROJECT_SUMMARY_COLUMNS = 'project_id, name, icon_name, description, sandbox, is_public, created_at, updated_at'
+AGENT_RUN_SUMMARY_COLUMNS = 'id, status, started_at, completed_at, error, agent_id, agent_version_id, created_at'
+THREAD_SUMMARY_RUNS_LIMIT = 20
+MESSAGE_COLUMNS = {
+    'message_id', 'thread_id', 'type', 'is_llm_message', 'content', 'metadata',
+    'created_at', 'updated_at', 'agent_id', 'agent_version_id'
+}
+
 @router.get("/threads", summary="List User Threads", operation_id="list_user_threads")
 async def get_user_threads(
     user_id: str = Depends(verify_and_get_user_id_from_jwt),
     page: Optional[int] = Query(1, ge=1, description="Page number (1-based)"),
-    limit: Optional[int] = Query(1000, ge=1, le=1000, description="Number of items per page (max 1000)")
+    limit: Optional[int] = Query(1000, ge=1, le=1000, description="Number of items per page (max 1000)"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from a previous response's pagination.next_cursor; enables cursor pagination"),
+    paginate_by: Literal['page', 'cursor'] = Query('page', description="'cursor' pages by (created_at, thread_id) instead of offsets"),
+    count: CountMode = Query('exact', description="Total count: 'exact', 'estimated' (planner estimate) or 'none'")
 ):
     """Get all threads for the current user with associated project data."""
-    logger.debug(f"Fetching threads with project data for user: {user_id} (page={page}, limit={limit})")
+    logger.debug(f"Fetching threads with project data for user: {user_id} (page={page}, limit={limit}, paginate_by={paginate_by})")
     client = await utils.db.client
+    use_cursor = paginate_by == 'cursor' or cursor is not None
     try:
-        offset = (page - 1) * limit
-        
-        # Get total count first (efficient count query)
-        count_result = await client.table('threads').select('*', count='exact').eq('account_id', user_id).execute()
-        total_count = count_result.count or 0
+        total_count = await PaginationService.count_rows(
+            client.table('threads').select('thread_id', count=None if count == 'none' else count, head=True).eq('account_id', user_id),
+            count
+        )
         
         if total_count == 0:
             logger.debug(f"No threads found for user: {user_id}")
             return {
                 "threads": [],
                 "pagination": {
+                    "limit": limit,
+                    "total": 0,
+                    "next_cursor": None,
+                    "has_more": False
+                } if use_cursor else {
                     "page": page,
                     "limit": limit,
                     "total": 0,
@@ -42,15 +64,24 @@ async def get_user_threads(
                 }
             }
         
-        # Fetch only the requested page using database-level pagination
-        threads_result = await client.table('threads')\
-            .select('*')\
-            .eq('account_id', user_id)\
-            .order('created_at', desc=True)\
-            .range(offset, offset + limit - 1)\
-            .execute()
-        
-        paginated_threads = threads_result.data
+        threads_query = client.table('threads').select(THREAD_LIST_COLUMNS).eq('account_id', user_id)
+        next_cursor = None
+        if use_cursor:
+            try:
+                paginated_threads, next_cursor = await PaginationService.fetch_keyset_page(
+                    threads_query, limit, cursor, id_field='thread_id'
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        else:
+            # Fetch only the requested page using database-level pagination
+            offset = (page - 1) * limit
+            threads_result = await threads_query\
+                .order('created_at', desc=True)\
+                .order('thread_id', desc=True)\
+                .range(offset, offset + limit - 1)\
+                .execute()
+            paginated_threads = threads_result.data
         
         # Extract unique project IDs from threads that have them
         project_ids = [
@@ -67,7 +98,7 @@ async def get_user_threads(
             projects_data = await batch_query_in(
                 client=client,
                 table_name='projects',
-                select_fields='*',
+                select_fields=PROJECT_SUMMARY_COLUMNS,
                 in_field='project_id',
                 in_values=unique_project_ids
             )
@@ -120,10 +151,21 @@ async def get_user_threads(
             }
             mapped_threads.append(mapped_thread)
         
-        total_pages = (total_count + limit - 1) // limit if total_count else 0
-        
         # logger.debug(f"[API] Mapped threads for frontend: {len(mapped_threads)} threads, {len(projects_by_id)} unique projects")
         
+        if use_cursor:
+            return {
+                "threads": mapped_threads,
+                "pagination": {
+                    "limit": limit,
+                    "total": total_count,
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None
+                }
+            }
+        
+        total_pages = (total_count + limit - 1) // limit if total_count else None
+        
         return {
             "threads": mapped_threads,
             "pagination": {
@@ -134,6 +176,8 @@ async def get_user_threads(
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching threads for user {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch threads: {str(e)}")
@@ -141,7 +185,9 @@ async def get_user_threads(
 @router.get("/threads/{thread_id}", summary="Get Thread", operation_id="get_thread")
 async def get_thread(
     thread_id: str,
-    request: Request
+    request: Request,
+    count: CountMode = Query('exact', description="Message count: 'exact', 'estimated' (planner estimate) or 'none'"),
+    runs_limit: int = Query(THREAD_SUMMARY_RUNS_LIMIT, ge=1, le=100, description="Maximum number of recent agent runs to include")
 ):
     """Get a specific thread by ID with complete related data.
     Supports both authenticated and anonymous access (for public threads)."""
@@ -153,69 +199,41 @@ async def get_thread(
     user_id = await get_optional_user_id(request)
     
     try:
-        # Verify access (handles both authenticated and public thread access)
-        await verify_and_authorize_thread_access(client, thread_id, user_id)
-        
-        # Get the thread data
-        thread_result = await client.table('threads').select('*').eq('thread_id', thread_id).execute()
-        
-        if not thread_result.data:
-            raise HTTPException(status_code=404, detail="Thread not found")
-        
-        thread = thread_result.data[0]
-        
-        # Get associated project if thread has a project_id
-        project_data = None
-        if thread.get('project_id'):
-            project_result = await client.table('projects').select('*').eq('project_id', thread['project_id']).execute()
-            
-            if project_result.data:
-                project = project_result.data[0]
-                # logger.debug(f"[API] Raw project from DB for thread {thread_id}")
-                project_data = {
-                    "project_id": project['project_id'],
-                    "name": project.get('name', ''),
-                    "description": project.get('description', ''),
-                    "sandbox": project.get('sandbox', {}),
-                    "is_public": project.get('is_public', False),
-                    "icon_name": project.get('icon_name'),  # Include icon for thread display
-                    "created_at": project['created_at'],
-                    "updated_at": project['updated_at']
-                }
-        
-        # Get message count for the thread
-        message_count_result = await client.table('messages').select('message_id', count='exact').eq('thread_id', thread_id).execute()
-        message_count = message_count_result.count if message_count_result.count is not None else 0
-        
-        # Get recent agent runs for the thread
-        agent_runs_result = await client.table('agent_runs').select('*').eq('thread_id', thread_id).order('created_at', desc=True).execute()
-        agent_runs_data = []
-        if agent_runs_result.data:
-            agent_runs_data = [{
-                "id": run['id'],
-                "status": run.get('status', ''),
-                "started_at": run.get('started_at'),
-                "completed_at": run.get('completed_at'),
-                "error": run.get('error'),
-                "agent_id": run.get('agent_id'),
-                "agent_version_id": run.get('agent_version_id'),
-                "created_at": run['created_at']
-            } for run in agent_runs_result.data]
+        use_cache = runs_limit == THREAD_SUMMARY_RUNS_LIMIT
+        summary = await get_cached_thread_summary(thread_id) if use_cache else None
+        
+        if summary is None:
+            summary = await _load_thread_summary(client, thread_id, runs_limit, count)
+            if summary is None:
+                # Same 404/403 precedence as every other thread endpoint
+                await verify_and_authorize_thread_access(client, thread_id, user_id)
+                raise HTTPException(status_code=404, detail="Thread not found")
+            # Only exact counts are cached; a cached exact count also serves the other modes
+            if use_cache and count == 'exact':
+                await cache_thread_summary(thread_id, summary)
+        
+        thread = summary['thread']
+        project_data = summary.get('project')
+        
+        # Public projects and owners are authorized from the summary itself;
+        # everyone else goes through the full check (admins, team members)
+        if not (project_data and project_data.get('is_public')) and not (user_id and thread.get('account_id') == user_id):
+            await verify_and_authorize_thread_access(client, thread_id, user_id)
         
         # Map thread data for frontend (matching actual DB structure)
         mapped_thread = {
             "thread_id": thread['thread_id'],
             "project_id": thread.get('project_id'),
-            "metadata": thread.get('metadata', {}),
+            "metadata": thread.get('metadata') or {},
             "is_public": thread.get('is_public', False),
             "created_at": thread['created_at'],
             "updated_at": thread['updated_at'],
             "project": project_data,
-            "message_count": message_count,
-            "recent_agent_runs": agent_runs_data
+            "message_count": summary.get('message_count') if count != 'none' else None,
+            "recent_agent_runs": summary.get('recent_agent_runs') or []
         }
         
-        # logger.debug(f"[API] Mapped thread for frontend: {thread_id} with {message_count} messages and {len(agent_runs_data)} recent runs")
+        # logger.debug(f"[API] Mapped thread for frontend: {thread_id} with {mapped_thread['message_count']} messages and {len(mapped_thread['recent_agent_runs'])} recent runs")
         return mapped_thread
         
     except HTTPException:
@@ -224,6 +242,51 @@ async def get_thread(
         logger.error(f"Error fetching thread {thread_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch thread: {str(e)}")
 
+async def _load_thread_summary(client, thread_id: str, runs_limit: int, count: CountMode) -> Optional[dict]:
+    """Load thread, project, message count and recent runs in one round trip.
+    The get_thread_summary function always counts exactly, so other count modes
+    (and a missing function) use concurrent queries instead."""
+    if count == 'exact':
+        try:
+            result = await client.rpc('get_thread_summary', {
+                'p_thread_id': thread_id,
+                'p_runs_limit': runs_limit
+            }).execute()
+            return result.data or None
+        except Exception as e:
+            logger.warning(f"get_thread_summary RPC failed for {thread_id}, using concurrent queries: {e}")
+    
+    async def fetch_thread_and_project():
+        thread_result = await client.table('threads').select(f'{THREAD_LIST_COLUMNS}, account_id').eq('thread_id', thread_id).execute()
+        if not thread_result.data:
+            return None, None
+        thread = thread_result.data[0]
+        project_data = None
+        if thread.get('project_id'):
+            project_result = await client.table('projects').select(PROJECT_SUMMARY_COLUMNS).eq('project_id', thread['project_id']).execute()
+            if project_result.data:
+                project_data = project_result.data[0]
+        return thread, project_data
+    
+    (thread, project_data), message_count, runs_result = await asyncio.gather(
+        fetch_thread_and_project(),
+        PaginationService.count_rows(
+            client.table('messages').select('message_id', count=None if count == 'none' else count, head=True).eq('thread_id', thread_id),
+            count
+        ),
+        client.table('agent_runs').select(AGENT_RUN_SUMMARY_COLUMNS).eq('thread_id', thread_id)
+            .order('created_at', desc=True).limit(runs_limit).execute()
+    )
+    if thread is None:
+        return None
+    
+    return {
+        "thread": thread,
+        "project": project_data,
+        "message_count": message_count,
+        "recent_agent_runs": runs_result.data or []
+    }
+
 @router.post("/threads", response_model=CreateThreadResponse, summary="Create Thread", operation_id="create_thread")
 async def create_thread(
     name: Optional[str] = Form(None),
@@ -255,8 +318,7 @@ async def create_thread(
         # 2. Create Sandbox
         sandbox_id = None
         try:
-            sandbox_pass = str(uuid.uuid4())
-            sandbox = await create_sandbox(sandbox_pass, project_id)
+            sandbox, sandbox_pass = await create_project_sandbox(project_id, wait_ready=False)
             sandbox_id = sandbox.id
             logger.debug(f"Created new sandbox {sandbox_id} for project {project_id}")
             
@@ -331,9 +393,13 @@ async def create_thread(
 async def get_thread_messages(
     thread_id: str,
     request: Request,
-    order: str = Query("desc", description="Order by created_at: 'asc' or 'desc'")
+    order: str = Query("desc", description="Order by created_at: 'asc' or 'desc'"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; when set, returns one page and pagination.next_cursor"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from a previous response's pagination.next_cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated message columns to return instead of all columns")
 ):
     """Get all messages for a thread, fetching in batches of 1000 from the DB to avoid large queries.
+    With limit set, returns a single keyset page instead.
     Supports both authenticated and anonymous access (for public threads)."""
     logger.debug(f"Fetching all messages for thread: {thread_id}, order={order}")
     client = await utils.db.client
@@ -344,22 +410,47 @@ async def get_thread_messages(
     
     # Verify access (handles both authenticated and public thread access)
     await verify_and_authorize_thread_access(client, thread_id, user_id)
+    if fields:
+        requested = [f.strip() for f in fields.split(',') if f.strip()]
+        invalid = [f for f in requested if f not in MESSAGE_COLUMNS]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Unknown message fields: {', '.join(invalid)}")
+        # Keyset columns are always needed to build the next cursor
+        select_columns = ', '.join(dict.fromkeys(['message_id', 'created_at', *requested]))
+    else:
+        select_columns = '*'
+    
+    descending = order == "desc"
     try:
+        if limit:
+            messages, next_cursor = await PaginationService.fetch_keyset_page(
+                client.table('messages').select(select_columns).eq('thread_id', thread_id),
+                limit, cursor, id_field='message_id', descending=descending
+            )
+            return {
+                "messages": messages,
+                "pagination": {
+                    "limit": limit,
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None
+                }
+            }
+        
         batch_size = 1000
-        offset = 0
         all_messages = []
+        batch_cursor = cursor
         while True:
-            query = client.table('messages').select('*').eq('thread_id', thread_id)
-            query = query.order('created_at', desc=(order == "desc"))
-            query = query.range(offset, offset + batch_size - 1)
-            messages_result = await query.execute()
-            batch = messages_result.data or []
+            batch, batch_cursor = await PaginationService.fetch_keyset_page(
+                client.table('messages').select(select_columns).eq('thread_id', thread_id),
+                batch_size, batch_cursor, id_field='message_id', descending=descending
+            )
             all_messages.extend(batch)
-            logger.debug(f"Fetched batch of {len(batch)} messages (offset {offset})")
-            if len(batch) < batch_size:
+            logger.debug(f"Fetched batch of {len(batch)} messages")
+            if not batch_cursor:
                 break
-            offset += batch_size
         return {"messages": all_messages}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching messages for thread {thread_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch messages: {str(e)}")
@@ -384,6 +475,7 @@ async def add_message_to_thread(
               "content": message
             }
         }).execute()
+        await invalidate_thread_summary(thread_id)
         return message_result.data[0]
     except Exception as e:
         logger.error(f"Error adding message to thread {thread_id}: {str(e)}")
@@ -420,6 +512,7 @@ async def create_message(
         
         if not message_result.data:
             raise HTTPException(status_code=500, detail="Failed to create message")
+        await invalidate_thread_summary(thread_id)
         
         logger.debug(f"Created message: {message_result.data[0]['message_id']}")
         return message_result.data[0]
@@ -443,6 +536,7 @@ async def delete_message(
     try:
         # Don't allow users to delete the "status" messages
         await client.table('messages').delete().eq('message_id', message_id).eq('is_llm_message', True).eq('thread_id', thread_id).execute()
+        await invalidate_thread_summary(thread_id)
         return {"message": "Message deleted successfully"}
     except Exception as e:
         logger.error(f"Error deleting message {message_id} from thread {thread_id}: {str(e)}")
@@ -516,6 +610,7 @@ async def update_thread(
             if not thread_update.data:
                 raise HTTPException(status_code=500, detail="Failed to update thread")
         
+        await invalidate_thread_summary(thread_id)
         logger.debug(f"Successfully updated thread: {thread_id}")
         
         # Return the updated thread with project data
@@ -584,6 +679,7 @@ async def delete_thread(
             await client.table('projects').delete().eq('project_id', project_id).execute()
         
         logger.debug(f"Successfully deleted thread {thread_id} and all associated data")
+        await invalidate_thread_summary(thread_id)
         return {"message": "Thread deleted successfully", "thread_id": thread_id}
         
     except HTTPException:
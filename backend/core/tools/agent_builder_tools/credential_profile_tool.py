@@ -267,10 +267,7 @@ After connecting, you'll be able to use {result.toolkit.name} tools in your agen
                 
                 for method_name, schema_list in updated_schemas.items():
                     for schema in schema_list:
-                        self.thread_manager.tool_registry.tools[method_name] = {
-                            "instance": mcp_wrapper_instance,
-                            "schema": schema
-                        }
+                        self.thread_manager.tool_registry.register_function(method_name, mcp_wrapper_instance, schema)
                         logger.debug(f"Dynamically registered MCP tool: {method_name}")
                 
                 logger.debug(f"Successfully registered {len(updated_schemas)} MCP tools dynamically for {profile.toolkit_name}")
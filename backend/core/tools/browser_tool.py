@@ -1,16 +1,37 @@
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, tool_concurrency
 from core.agentpress.thread_manager import ThreadManager
 from core.sandbox.tool_base import SandboxToolsBase
 from core.utils.logger import logger
-from core.utils.s3_upload_utils import upload_base64_image
+from core.utils.s3_upload_utils import upload_image_bytes
 import asyncio
 import json
 import base64
+import binascii
+import hashlib
 import io
 import traceback
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Union
 from PIL import Image
 from core.utils.config import config
 
+# Ask the Stagehand API for screenshots as PNG files in the sandbox instead of base64 in the JSON
+SCREENSHOT_MODE_HEADER = "X-Screenshot-Mode: file"
+SUPPORTED_SCREENSHOT_FORMATS = {'JPEG', 'PNG', 'GIF', 'BMP', 'WEBP', 'TIFF'}
+SCREENSHOT_THUMBNAIL_SIZE = (320, 240)
+SCREENSHOT_UPLOAD_CACHE_SIZE = 32
+
+
+@dataclass
+class PreparedScreenshot:
+    data: bytes
+    content_type: str
+    digest: str
+    thumbnail: bytes
+
+
+@tool_concurrency(resource="browser")
 @tool_metadata(
     display_name="Web Browser",
     description="Browse websites, click buttons, fill forms, and extract information from web pages",
@@ -37,74 +58,112 @@ class BrowserTool(SandboxToolsBase):
     def __init__(self, project_id: str, thread_id: str, thread_manager: ThreadManager):
         super().__init__(project_id, thread_manager)
         self.thread_id = thread_id
+        # Screenshot hash -> uploaded image and thumbnail URLs
+        self._screenshot_uploads: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
     
-    def _validate_base64_image(self, base64_string: str, max_size_mb: int = 10) -> tuple[bool, str]:
+    @staticmethod
+    def _prepare_screenshot(data: Union[str, bytes], max_size_mb: int = 10) -> PreparedScreenshot:
         """
-        Comprehensive validation of base64 image data.
+        Decode and validate a screenshot once and generate its thumbnail.
+        
+        CPU-bound; run it off the event loop.
         
         Args:
-            base64_string (str): The base64 encoded image data
+            data (Union[str, bytes]): Raw image bytes, or base64 image data from older sandboxes
             max_size_mb (int): Maximum allowed image size in megabytes
             
         Returns:
-            tuple[bool, str]: (is_valid, error_message)
-        """
-        try:
-            # Check if data exists and has reasonable length
-            if not base64_string or len(base64_string) < 10:
-                return False, "Base64 string is empty or too short"
+            PreparedScreenshot: The image bytes, content type, hash and thumbnail
             
+        Raises:
+            ValueError: If the data is not a valid, supported image
+        """
+        if isinstance(data, str):
             # Remove data URL prefix if present (data:image/jpeg;base64,...)
-            if base64_string.startswith('data:'):
-                try:
-                    base64_string = base64_string.split(',', 1)[1]
-                except (IndexError, ValueError):
-                    return False, "Invalid data URL format"
-            
-            # Check if string contains only valid base64 characters
-            # Base64 alphabet: A-Z, a-z, 0-9, +, /, = (padding)
-            import re
-            if not re.match(r'^[A-Za-z0-9+/]*={0,2}$', base64_string):
-                return False, "Invalid base64 characters detected"
-            
-            # Check if base64 string length is valid (must be multiple of 4)
-            if len(base64_string) % 4 != 0:
-                return False, "Invalid base64 string length"
-            
-            # Attempt to decode base64
+            if data.startswith('data:'):
+                data = data.split(',', 1)[-1]
             try:
-                image_data = base64.b64decode(base64_string, validate=True)
-            except Exception as e:
-                return False, f"Base64 decoding failed: {str(e)}"
-            
-            # Check decoded data size
-            if len(image_data) == 0:
-                return False, "Decoded image data is empty"
-            
-            # Check if decoded data size exceeds limit
-            max_size_bytes = max_size_mb * 1024 * 1024
-            if len(image_data) > max_size_bytes:
-                return False, f"Image size ({len(image_data)} bytes) exceeds limit ({max_size_bytes} bytes)"
-            
-            # Validate that decoded data is actually a valid image using PIL
-            try:
-                image_stream = io.BytesIO(image_data)
-                with Image.open(image_stream) as img:
-                    # Verify the image by attempting to load it
-                    img.verify()
-                    
-                    # Check if image format is supported
-                    supported_formats = {'JPEG', 'PNG', 'GIF', 'BMP', 'WEBP', 'TIFF'}
-                    if img.format not in supported_formats:
-                        return False, f"Unsupported image format: {img.format}"
-                    
-                    return True, "Image validation successful"
-                    
-            except Exception as e:
-                return False, f"Image validation failed: {str(e)}"
-                
+                # validate=True rejects characters outside the base64 alphabet and bad padding
+                data = base64.b64decode(data, validate=True)
+            except (binascii.Error, ValueError) as e:
+                raise ValueError(f"Base64 decoding failed: {str(e)}")
+        
+        if len(data) < 8:
+            raise ValueError("Image data is empty or too short")
+        
+        max_size_bytes = max_size_mb * 1024 * 1024
+        if len(data) > max_size_bytes:
+            raise ValueError(f"Image size ({len(data)} bytes) exceeds limit ({max_size_bytes} bytes)")
+        
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                img.verify()
+                image_format = img.format
         except Exception as e:
-            return False, f"Image validation error: {str(e)}"
+            raise ValueError(f"Image validation failed: {str(e)}")
+        
+        if image_format not in SUPPORTED_SCREENSHOT_FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        
+        # verify() leaves the image unusable, so the thumbnail needs a fresh open
+        with Image.open(io.BytesIO(data)) as img:
+            img.thumbnail(SCREENSHOT_THUMBNAIL_SIZE)
+            thumbnail = io.BytesIO()
+            img.convert("RGB").save(thumbnail, format="JPEG", quality=70)
+        
+        return PreparedScreenshot(
+            data=data,
+            content_type=Image.MIME.get(image_format, "image/png"),
+            digest=hashlib.sha256(data).hexdigest(),
+            thumbnail=thumbnail.getvalue()
+        )
+    
+    async def _upload_screenshot(self, screenshot: PreparedScreenshot) -> Dict[str, str]:
+        """Upload a screenshot and its thumbnail, reusing earlier uploads of identical screenshots."""
+        cached = self._screenshot_uploads.get(screenshot.digest)
+        if cached:
+            self._screenshot_uploads.move_to_end(screenshot.digest)
+            return cached
+        
+        image_url, thumbnail_url = await asyncio.gather(
+            upload_image_bytes(screenshot.data, screenshot.content_type, "browser-screenshots", filename_prefix="screenshot"),
+            upload_image_bytes(screenshot.thumbnail, "image/jpeg", "browser-screenshots", filename_prefix="thumbnail")
+        )
+        uploaded = {"image_url": image_url, "thumbnail_url": thumbnail_url}
+        self._screenshot_uploads[screenshot.digest] = uploaded
+        while len(self._screenshot_uploads) > SCREENSHOT_UPLOAD_CACHE_SIZE:
+            self._screenshot_uploads.popitem(last=False)
+        return uploaded
+    
+    async def _process_screenshot(self, result: dict) -> None:
+        """Replace the screenshot in a Stagehand result with uploaded image and thumbnail URLs."""
+        screenshot_path = result.pop("screenshot_path", None)
+        screenshot_base64 = result.pop("screenshot_base64", None)
+        if not screenshot_path and not screenshot_base64:
+            return
+        
+        try:
+            if screenshot_path:
+                # Raw PNG bytes straight from the sandbox; bypasses the run's file cache
+                data = await self._sandbox.fs.download_file(screenshot_path)
+            else:
+                data = screenshot_base64
+            screenshot = await asyncio.to_thread(self._prepare_screenshot, data)
+        except ValueError as e:
+            logger.warning(f"Screenshot validation failed: {e}")
+            result["image_validation_error"] = str(e)
+            return
+        except Exception as e:
+            logger.error(f"Failed to process screenshot: {e}")
+            result["image_upload_error"] = str(e)
+            return
+        
+        try:
+            result.update(await self._upload_screenshot(screenshot))
+            logger.debug(f"Uploaded screenshot to {result['image_url']}")
+        except Exception as e:
+            logger.error(f"Failed to upload screenshot: {e}")
+            result["image_upload_error"] = str(e)
     
     async def _debug_sandbox_services(self) -> str:
         """Debug method to check what services are running in the sandbox"""
@@ -237,9 +296,9 @@ class BrowserTool(SandboxToolsBase):
             if method == "GET" and params:
                 query_params = "&".join([f"{k}={v}" for k, v in params.items()])
                 url = f"{url}?{query_params}"
-                curl_cmd = f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
+                curl_cmd = f"curl -s -X {method} '{url}' -H 'Content-Type: application/json' -H '{SCREENSHOT_MODE_HEADER}'"
             else:
-                curl_cmd = f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
+                curl_cmd = f"curl -s -X {method} '{url}' -H 'Content-Type: application/json' -H '{SCREENSHOT_MODE_HEADER}'"
                 if params:
                     json_data = json.dumps(params)
                     curl_cmd += f" -d '{json_data}'"
@@ -255,25 +314,7 @@ class BrowserTool(SandboxToolsBase):
 
                     logger.debug("Stagehand API request completed successfully")
 
-                    if "screenshot_base64" in result:
-                        try:
-                            screenshot_data = result["screenshot_base64"]
-                            is_valid, validation_message = self._validate_base64_image(screenshot_data)
-                            
-                            if is_valid:
-                                logger.debug(f"Screenshot validation passed: {validation_message}")
-                                image_url = await upload_base64_image(screenshot_data, "browser-screenshots")
-                                result["image_url"] = image_url
-                                logger.debug(f"Uploaded screenshot to {image_url}")
-                            else:
-                                logger.warning(f"Screenshot validation failed: {validation_message}")
-                                result["image_validation_error"] = validation_message
-                                
-                            del result["screenshot_base64"]
-                            
-                        except Exception as e:
-                            logger.error(f"Failed to process screenshot: {e}")
-                            result["image_upload_error"] = str(e)
+                    await self._process_screenshot(result)
                     
                     result["input"] = params
                     added_message = await self.thread_manager.add_message(
@@ -297,7 +338,7 @@ class BrowserTool(SandboxToolsBase):
                         clean_result["title"] = result["title"]
                     if result.get("action"):
                         clean_result["action"] = result["action"]
-                    if result.get("image_url"):  # This is screenshot_base64 converted to image_url
+                    if result.get("image_url"):  # The uploaded screenshot
                         clean_result["image_url"] = result["image_url"]
                     
                     # Include any error context that's useful for the agent
@@ -397,6 +438,7 @@ class BrowserTool(SandboxToolsBase):
             params["filePath"] = filePath
         return await self._execute_stagehand_api("act", params)
     
+    @tool_concurrency(read_only=True, resource="browser")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -425,6 +467,7 @@ class BrowserTool(SandboxToolsBase):
         params = {"instruction": instruction, "iframes": iframes}
         return await self._execute_stagehand_api("extract", params)
     
+    @tool_concurrency(read_only=True, resource="browser")
     @openapi_schema({
         "type": "function",
         "function": {
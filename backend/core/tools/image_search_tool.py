@@ -1,9 +1,10 @@
 import httpx
 from dotenv import load_dotenv
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, tool_concurrency
 from core.utils.config import config
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
+from core.tools.utils.search_cache import cached_fetch, get_search_http_client, normalize_query
 import json
 import logging
 from typing import Union, List
@@ -29,6 +30,7 @@ class SandboxImageSearchTool(SandboxToolsBase):
         if not self.serper_api_key:
             logger.warning("SERPER_API_KEY not configured - Image Search Tool will not be available")
 
+    @tool_concurrency(read_only=True)
     @openapi_schema({
         "type": "function",
         "function": {
@@ -124,77 +126,84 @@ class SandboxImageSearchTool(SandboxToolsBase):
                 payload = {"q": queries[0], "num": num_results}
             
             # SERPER API request
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "X-API-KEY": self.serper_api_key,
-                    "Content-Type": "application/json"
-                }
-                
+            client = get_search_http_client()
+            headers = {
+                "X-API-KEY": self.serper_api_key,
+                "Content-Type": "application/json"
+            }
+            
+            async def _search():
                 response = await client.post(
                     "https://google.serper.dev/images",
                     json=payload,
                     headers=headers,
                     timeout=30.0
                 )
-                
                 response.raise_for_status()
-                data = response.json()
+                return response.json()
+            
+            # Single and batch responses differ in shape, so the batch flag is part of the key
+            cache_request = {"queries": [normalize_query(q) for q in queries], "batch": is_batch, "num": num_results}
+            data = await cached_fetch(
+                "serper_images", cache_request, _search,
+                cache_if=lambda data: bool(data.get("images")) if isinstance(data, dict) else bool(data),
+            )
+            
+            if is_batch:
+                # Handle batch response
+                if not isinstance(data, list):
+                    return self.fail_response("Unexpected batch response format from SERPER API.")
                 
-                if is_batch:
-                    # Handle batch response
-                    if not isinstance(data, list):
-                        return self.fail_response("Unexpected batch response format from SERPER API.")
-                    
-                    batch_results = []
-                    for i, (q, result_data) in enumerate(zip(queries, data)):
-                        images = result_data.get("images", []) if isinstance(result_data, dict) else []
-                        
-                        # Extract image URLs
-                        image_urls = []
-                        for img in images:
-                            img_url = img.get("imageUrl")
-                            if img_url:
-                                image_urls.append(img_url)
-                        
-                        batch_results.append({
-                            "query": q,
-                            "total_found": len(image_urls),
-                            "images": image_urls
-                        })
-                        
-                        logging.info(f"Found {len(image_urls)} image URLs for query: '{q}'")
-                    
-                    result = {
-                        "batch_results": batch_results,
-                        "total_queries": len(queries)
-                    }
-                else:
-                    # Handle single response
-                    images = data.get("images", [])
-                    
-                    if not images:
-                        logging.warning(f"No images found for query: '{queries[0]}'")
-                        return self.fail_response(f"No images found for query: '{queries[0]}'")
+                batch_results = []
+                for i, (q, result_data) in enumerate(zip(queries, data)):
+                    images = result_data.get("images", []) if isinstance(result_data, dict) else []
                     
-                    # Extract just the image URLs - keep it simple
+                    # Extract image URLs
                     image_urls = []
                     for img in images:
                         img_url = img.get("imageUrl")
                         if img_url:
                             image_urls.append(img_url)
                     
-                    logging.info(f"Found {len(image_urls)} image URLs for query: '{queries[0]}'")
-                    
-                    result = {
-                        "query": queries[0],
+                    batch_results.append({
+                        "query": q,
                         "total_found": len(image_urls),
                         "images": image_urls
-                    }
+                    })
+                    
+                    logging.info(f"Found {len(image_urls)} image URLs for query: '{q}'")
                 
-                return ToolResult(
-                    success=True,
-                    output=json.dumps(result, ensure_ascii=False)
-                )
+                result = {
+                    "batch_results": batch_results,
+                    "total_queries": len(queries)
+                }
+            else:
+                # Handle single response
+                images = data.get("images", [])
+                
+                if not images:
+                    logging.warning(f"No images found for query: '{queries[0]}'")
+                    return self.fail_response(f"No images found for query: '{queries[0]}'")
+                
+                # Extract just the image URLs - keep it simple
+                image_urls = []
+                for img in images:
+                    img_url = img.get("imageUrl")
+                    if img_url:
+                        image_urls.append(img_url)
+                
+                logging.info(f"Found {len(image_urls)} image URLs for query: '{queries[0]}'")
+                
+                result = {
+                    "query": queries[0],
+                    "total_found": len(image_urls),
+                    "images": image_urls
+                }
+            
+            return ToolResult(
+                success=True,
+                output=json.dumps(result, ensure_ascii=False)
+            )
         
         except httpx.HTTPStatusError as e:
             error_message = f"SERPER API error: {e.response.status_code}"
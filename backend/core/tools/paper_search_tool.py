@@ -1,13 +1,76 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Set, Callable, Awaitable
 import asyncio
 import json
+import os
 import aiohttp
-import time
 from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
+from core.tools.utils.search_cache import SEARCH_CACHE_TTL, cached_fetch
 from core.utils.config import config
 from core.utils.logger import logger
+from core.utils.rate_limiter import get_rate_limiter
 from core.agentpress.thread_manager import ThreadManager
 
+# Semantic Scholar allows 1 request/second per API key; the budget is shared by all runs on a worker
+RATE_LIMIT = float(os.getenv("SEMANTIC_SCHOLAR_RATE_LIMIT", 1.0))
+RATE_LIMIT_BURST = float(os.getenv("SEMANTIC_SCHOLAR_RATE_LIMIT_BURST", 1))
+# Share the budget across workers through Redis
+RATE_LIMIT_SHARED = os.getenv("SEMANTIC_SCHOLAR_SHARED_RATE_LIMIT", "false").lower() == "true"
+# Papers and authors looked up by ID change slowly
+ID_CACHE_TTL = int(os.getenv("SEMANTIC_SCHOLAR_CACHE_TTL", 24 * 60 * 60))
+# Concurrent paper lookups within this window share one batch request
+BATCH_WINDOW_SECONDS = 0.05
+MAX_BATCH_IDS = 500
+
+rate_limiter = get_rate_limiter("semantic_scholar", RATE_LIMIT, RATE_LIMIT_BURST, shared=RATE_LIMIT_SHARED)
+
+
+class PaperBatcher:
+    """Collects concurrent paper lookups with the same fields into one batch request."""
+
+    def __init__(self):
+        self._pending: Dict[str, Dict[str, List[asyncio.Future]]] = {}
+        # Every waiter depends on its flush, so keep them referenced until done
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    async def load(
+        self,
+        paper_id: str,
+        fields: str,
+        fetch: Callable[[List[str], str], Awaitable[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Get one paper; `fetch` maps a list of IDs to {id: paper or None}."""
+        group = self._pending.get(fields)
+        if group is None:
+            group = {}
+            self._pending[fields] = group
+            task = asyncio.create_task(self._flush(fields, fetch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        future = asyncio.get_running_loop().create_future()
+        group.setdefault(paper_id, []).append(future)
+        return await future
+
+    async def _flush(self, fields: str, fetch) -> None:
+        await asyncio.sleep(BATCH_WINDOW_SECONDS)
+        group = self._pending.pop(fields, {})
+        try:
+            papers = await fetch(list(group), fields)
+        except Exception as e:
+            for futures in group.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                        future.exception()
+            return
+        for paper_id, futures in group.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(papers.get(paper_id))
+
+
+paper_batcher = PaperBatcher()
+
+
 @tool_metadata(
     display_name="Academic Research",
     description="Search and analyze academic papers, authors, and scientific research",
@@ -22,8 +85,6 @@ class PaperSearchTool(Tool):
         self.thread_manager = thread_manager
         self.api_key = config.SEMANTIC_SCHOLAR_API_KEY
         self.base_url = "https://api.semanticscholar.org/graph/v1"
-        self.last_request_time = 0
-        self.request_lock = asyncio.Lock()
         
         if self.api_key:
             logger.info("Paper Search Tool initialized with Semantic Scholar API (Free)")
@@ -34,60 +95,91 @@ class PaperSearchTool(Tool):
         self,
         url: str,
         params: Optional[Dict[str, Any]] = None,
-        max_retries: int = 3
-    ) -> Dict[str, Any]:
-        async with self.request_lock:
-            current_time = time.time()
-            time_since_last_request = current_time - self.last_request_time
-            
-            if time_since_last_request < 1.0:
-                wait_time = 1.0 - time_since_last_request
-                await asyncio.sleep(wait_time)
-            
-            headers = {"x-api-key": self.api_key} if self.api_key else {}
-            
-            for attempt in range(max_retries):
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(url, params=params, headers=headers) as response:
-                            self.last_request_time = time.time()
+        max_retries: int = 3,
+        json_body: Optional[Any] = None
+    ) -> Any:
+        headers = {"x-api-key": self.api_key} if self.api_key else {}
+        method = "POST" if json_body is not None else "GET"
+        
+        for attempt in range(max_retries):
+            await rate_limiter.acquire()
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.request(method, url, params=params, json=json_body, headers=headers) as response:
+                        if response.status == 429:
+                            retry_after = int(response.headers.get('Retry-After', 2 ** attempt))
+                            logger.warning(f"Rate limited, pausing requests for {retry_after}s before retry {attempt + 1}/{max_retries}")
+                            await rate_limiter.penalize(retry_after)
+                            continue
+                        
+                        if response.status == 200:
+                            return await response.json()
+                        else:
+                            error_text = await response.text()
+                            logger.error(f"API request failed with status {response.status}: {error_text}")
                             
-                            if response.status == 429:
-                                retry_after = int(response.headers.get('Retry-After', 2 ** attempt))
-                                logger.warning(f"Rate limited, waiting {retry_after}s before retry {attempt + 1}/{max_retries}")
-                                await asyncio.sleep(retry_after)
+                            if response.status >= 500 and attempt < max_retries - 1:
+                                wait_time = 2 ** attempt
+                                logger.info(f"Server error, retrying in {wait_time}s")
+                                await asyncio.sleep(wait_time)
                                 continue
                             
-                            if response.status == 200:
-                                return await response.json()
-                            else:
-                                error_text = await response.text()
-                                logger.error(f"API request failed with status {response.status}: {error_text}")
-                                
-                                if response.status >= 500 and attempt < max_retries - 1:
-                                    wait_time = 2 ** attempt
-                                    logger.info(f"Server error, retrying in {wait_time}s")
-                                    await asyncio.sleep(wait_time)
-                                    continue
-                                
-                                raise Exception(f"API request failed: {response.status} - {error_text}")
-                
-                except asyncio.TimeoutError:
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        logger.warning(f"Request timeout, retrying in {wait_time}s")
-                        await asyncio.sleep(wait_time)
-                        continue
-                    raise
-                except aiohttp.ClientError as e:
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        logger.warning(f"Request error: {e}, retrying in {wait_time}s")
-                        await asyncio.sleep(wait_time)
-                        continue
-                    raise
-            
-            raise Exception(f"Failed after {max_retries} attempts")
+                            raise Exception(f"API request failed: {response.status} - {error_text}")
+            
+            except asyncio.TimeoutError:
+                if attempt < max_retries - 1:
+                    wait_time = 2 ** attempt
+                    logger.warning(f"Request timeout, retrying in {wait_time}s")
+                    await asyncio.sleep(wait_time)
+                    continue
+                raise
+            except aiohttp.ClientError as e:
+                if attempt < max_retries - 1:
+                    wait_time = 2 ** attempt
+                    logger.warning(f"Request error: {e}, retrying in {wait_time}s")
+                    await asyncio.sleep(wait_time)
+                    continue
+                raise
+        
+        raise Exception(f"Failed after {max_retries} attempts")
+    
+    async def _cached_request(self, path: str, params: Dict[str, Any], ttl: int = SEARCH_CACHE_TTL) -> Any:
+        """GET through the response cache; identical concurrent requests are sent once."""
+        return await cached_fetch(
+            "semantic_scholar",
+            {"path": path, "params": params},
+            lambda: self._rate_limited_request(f"{self.base_url}{path}", params),
+            ttl=ttl
+        )
+    
+    async def _fetch_papers(self, paper_ids: List[str], fields: str) -> Dict[str, Any]:
+        if len(paper_ids) == 1:
+            data = await self._rate_limited_request(f"{self.base_url}/paper/{paper_ids[0]}", {"fields": fields})
+            return {paper_ids[0]: data}
+        
+        logger.info(f"Fetching {len(paper_ids)} papers in batch")
+        papers = {}
+        for start in range(0, len(paper_ids), MAX_BATCH_IDS):
+            chunk = paper_ids[start:start + MAX_BATCH_IDS]
+            # Results come back in request order, with null for unknown IDs
+            data = await self._rate_limited_request(
+                f"{self.base_url}/paper/batch", {"fields": fields}, json_body={"ids": chunk}
+            )
+            papers.update(zip(chunk, data))
+        return papers
+    
+    async def _get_paper(self, paper_id: str, fields: str) -> Dict[str, Any]:
+        """Get a paper by ID from the cache, batching lookups with concurrent calls."""
+        data = await cached_fetch(
+            "semantic_scholar",
+            {"paper": paper_id, "fields": fields},
+            lambda: paper_batcher.load(paper_id, fields, self._fetch_papers),
+            ttl=ID_CACHE_TTL,
+            cache_if=lambda paper: paper is not None
+        )
+        if data is None:
+            raise Exception(f"Paper not found: {paper_id}")
+        return data
     
     @openapi_schema({
         "type": "function",
@@ -161,8 +253,7 @@ class PaperSearchTool(Tool):
             if open_access_only:
                 params["openAccessPdf"] = ""
             
-            url = f"{self.base_url}/paper/search"
-            data = await self._rate_limited_request(url, params)
+            data = await self._cached_request("/paper/search", params)
             
             results = data.get('data', [])
             total = data.get('total', 0)
@@ -233,6 +324,89 @@ class PaperSearchTool(Tool):
             logger.error(f"Paper search failed: {repr(e)}", exc_info=True)
             return self.fail_response(f"An error occurred during the paper search: {str(e)}")
     
+    def _format_paper_details(self, data: Dict[str, Any], include_citations: bool, include_references: bool) -> Dict[str, Any]:
+        authors_list = []
+        for author in data.get('authors', []):
+            author_info = {
+                "author_id": author.get('authorId', ''),
+                "name": author.get('name', ''),
+                "url": author.get('url', ''),
+                "affiliations": author.get('affiliations', []),
+                "homepage": author.get('homepage', ''),
+                "paper_count": author.get('paperCount', 0),
+                "citation_count": author.get('citationCount', 0),
+                "h_index": author.get('hIndex', 0)
+            }
+            authors_list.append(author_info)
+        
+        open_access_pdf = data.get('openAccessPdf')
+        pdf_info = None
+        if open_access_pdf:
+            pdf_info = {
+                "url": open_access_pdf.get('url'),
+                "status": open_access_pdf.get('status'),
+                "license": open_access_pdf.get('license')
+            }
+        
+        venue_info = data.get('publicationVenue', {})
+        if not venue_info:
+            venue_info = {}
+        
+        citations_list = []
+        if include_citations and data.get('citations'):
+            for citation in data.get('citations', [])[:50]:
+                citation_authors = [a.get('name', '') for a in citation.get('authors', [])]
+                citations_list.append({
+                    "paper_id": citation.get('paperId', ''),
+                    "title": citation.get('title', ''),
+                    "year": citation.get('year'),
+                    "authors": citation_authors,
+                    "citation_count": citation.get('citationCount', 0)
+                })
+        
+        references_list = []
+        if include_references and data.get('references'):
+            for reference in data.get('references', [])[:50]:
+                ref_authors = [a.get('name', '') for a in reference.get('authors', [])]
+                references_list.append({
+                    "paper_id": reference.get('paperId', ''),
+                    "title": reference.get('title', ''),
+                    "year": reference.get('year'),
+                    "authors": ref_authors,
+                    "citation_count": reference.get('citationCount', 0)
+                })
+        
+        tldr_text = None
+        if data.get('tldr'):
+            tldr_text = data['tldr'].get('text', '')
+        
+        return {
+            "paper_id": data.get('paperId', ''),
+            "corpus_id": data.get('corpusId'),
+            "title": data.get('title', ''),
+            "abstract": data.get('abstract', ''),
+            "tldr": tldr_text,
+            "year": data.get('year'),
+            "url": data.get('url', ''),
+            "authors": authors_list,
+            "venue": data.get('venue', ''),
+            "venue_name": venue_info.get('name', ''),
+            "venue_type": venue_info.get('type', ''),
+            "citation_count": data.get('citationCount', 0),
+            "reference_count": data.get('referenceCount', 0),
+            "influential_citation_count": data.get('influentialCitationCount', 0),
+            "is_open_access": data.get('isOpenAccess', False),
+            "pdf_info": pdf_info,
+            "fields_of_study": data.get('fieldsOfStudy', []),
+            "publication_types": data.get('publicationTypes', []),
+            "publication_date": data.get('publicationDate', ''),
+            "journal": data.get('journal', {}).get('name', '') if data.get('journal') else '',
+            "external_ids": data.get('externalIds', {}),
+            "citation_styles": data.get('citationStyles', {}),
+            "citations": citations_list if include_citations else None,
+            "references": references_list if include_references else None
+        }
+    
     @openapi_schema({
         "type": "function",
         "function": {
@@ -243,7 +417,7 @@ class PaperSearchTool(Tool):
                 "properties": {
                     "paper_id": {
                         "type": "string",
-                        "description": "The Semantic Scholar paper ID (e.g., '5c5751d45e298cea054f32b392c12c61027d2fe7')"
+                        "description": "The Semantic Scholar paper ID (e.g., '5c5751d45e298cea054f32b392c12c61027d2fe7'). To get several papers, pass their IDs separated by commas; they are fetched in one batch request."
                     },
                     "include_citations": {
                         "type": "boolean",
@@ -284,92 +458,29 @@ class PaperSearchTool(Tool):
             if include_references:
                 fields += ",references.paperId,references.title,references.year,references.authors,references.citationCount"
             
-            url = f"{self.base_url}/paper/{paper_id}"
-            params = {"fields": fields}
-            
-            data = await self._rate_limited_request(url, params)
-            
-            authors_list = []
-            for author in data.get('authors', []):
-                author_info = {
-                    "author_id": author.get('authorId', ''),
-                    "name": author.get('name', ''),
-                    "url": author.get('url', ''),
-                    "affiliations": author.get('affiliations', []),
-                    "homepage": author.get('homepage', ''),
-                    "paper_count": author.get('paperCount', 0),
-                    "citation_count": author.get('citationCount', 0),
-                    "h_index": author.get('hIndex', 0)
-                }
-                authors_list.append(author_info)
-            
-            open_access_pdf = data.get('openAccessPdf')
-            pdf_info = None
-            if open_access_pdf:
-                pdf_info = {
-                    "url": open_access_pdf.get('url'),
-                    "status": open_access_pdf.get('status'),
-                    "license": open_access_pdf.get('license')
-                }
-            
-            venue_info = data.get('publicationVenue', {})
-            if not venue_info:
-                venue_info = {}
-            
-            citations_list = []
-            if include_citations and data.get('citations'):
-                for citation in data.get('citations', [])[:50]:
-                    citation_authors = [a.get('name', '') for a in citation.get('authors', [])]
-                    citations_list.append({
-                        "paper_id": citation.get('paperId', ''),
-                        "title": citation.get('title', ''),
-                        "year": citation.get('year'),
-                        "authors": citation_authors,
-                        "citation_count": citation.get('citationCount', 0)
-                    })
-            
-            references_list = []
-            if include_references and data.get('references'):
-                for reference in data.get('references', [])[:50]:
-                    ref_authors = [a.get('name', '') for a in reference.get('authors', [])]
-                    references_list.append({
-                        "paper_id": reference.get('paperId', ''),
-                        "title": reference.get('title', ''),
-                        "year": reference.get('year'),
-                        "authors": ref_authors,
-                        "citation_count": reference.get('citationCount', 0)
-                    })
-            
-            tldr_text = None
-            if data.get('tldr'):
-                tldr_text = data['tldr'].get('text', '')
+            paper_ids = [pid.strip() for pid in str(paper_id).split(',') if pid.strip()]
+            if not paper_ids:
+                return self.fail_response("Paper ID is required.")
+            results = await asyncio.gather(
+                *(self._get_paper(pid, fields) for pid in paper_ids), return_exceptions=True
+            )
             
-            result = {
-                "paper_id": data.get('paperId', ''),
-                "corpus_id": data.get('corpusId'),
-                "title": data.get('title', ''),
-                "abstract": data.get('abstract', ''),
-                "tldr": tldr_text,
-                "year": data.get('year'),
-                "url": data.get('url', ''),
-                "authors": authors_list,
-                "venue": data.get('venue', ''),
-                "venue_name": venue_info.get('name', ''),
-                "venue_type": venue_info.get('type', ''),
-                "citation_count": data.get('citationCount', 0),
-                "reference_count": data.get('referenceCount', 0),
-                "influential_citation_count": data.get('influentialCitationCount', 0),
-                "is_open_access": data.get('isOpenAccess', False),
-                "pdf_info": pdf_info,
-                "fields_of_study": data.get('fieldsOfStudy', []),
-                "publication_types": data.get('publicationTypes', []),
-                "publication_date": data.get('publicationDate', ''),
-                "journal": data.get('journal', {}).get('name', '') if data.get('journal') else '',
-                "external_ids": data.get('externalIds', {}),
-                "citation_styles": data.get('citationStyles', {}),
-                "citations": citations_list if include_citations else None,
-                "references": references_list if include_references else None
-            }
+            if len(paper_ids) > 1:
+                papers = []
+                errors = []
+                for pid, data in zip(paper_ids, results):
+                    if isinstance(data, Exception):
+                        errors.append({"paper_id": pid, "error": str(data)})
+                    else:
+                        papers.append(self._format_paper_details(data, include_citations, include_references))
+                if not papers:
+                    return self.fail_response(f"Failed to fetch papers: {errors}")
+                logger.info(f"Fetched details for {len(papers)}/{len(paper_ids)} papers")
+                return self.success_response(json.dumps({"papers": papers, "errors": errors}, indent=2, default=str))
+            
+            if isinstance(results[0], Exception):
+                raise results[0]
+            result = self._format_paper_details(results[0], include_citations, include_references)
             
             output = {
                 "paper": result
@@ -437,8 +548,7 @@ class PaperSearchTool(Tool):
                 "fields": "authorId,name,url,affiliations,homepage,paperCount,citationCount,hIndex,externalIds"
             }
             
-            url = f"{self.base_url}/author/search"
-            data = await self._rate_limited_request(url, params)
+            data = await self._cached_request("/author/search", params)
             
             results = data.get('data', [])
             total = data.get('total', 0)
@@ -538,12 +648,11 @@ class PaperSearchTool(Tool):
             if include_papers:
                 fields += ",papers.paperId,papers.title,papers.year,papers.citationCount,papers.url,papers.venue,papers.abstract"
             
-            url = f"{self.base_url}/author/{author_id}"
             params = {"fields": fields}
             if include_papers:
                 params["limit"] = papers_limit
             
-            data = await self._rate_limited_request(url, params)
+            data = await self._cached_request(f"/author/{author_id}", params, ttl=ID_CACHE_TTL)
             
             papers_list = []
             if include_papers and data.get('papers'):
@@ -646,8 +755,7 @@ class PaperSearchTool(Tool):
                 "offset": offset
             }
             
-            url = f"{self.base_url}/author/{author_id}/papers"
-            data = await self._rate_limited_request(url, params)
+            data = await self._cached_request(f"/author/{author_id}/papers", params, ttl=ID_CACHE_TTL)
             
             papers = data.get('data', [])
             next_offset = data.get('next')
@@ -1,7 +1,7 @@
 import json
 import os
 from typing import Optional, Dict, Any, List
-from core.agentpress.tool import openapi_schema, tool_metadata
+from core.agentpress.tool import openapi_schema, tool_metadata, tool_concurrency
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
 from core.utils.logger import logger
@@ -294,6 +294,7 @@ IMPORTANT: All content must be wrapped in proper HTML tags. Do not use unsupport
             logger.error(f"Error creating document: {str(e)}")
             return self.fail_response(f"Error creating document: {str(e)}")
             
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -359,6 +360,7 @@ IMPORTANT: All content must be wrapped in proper HTML tags. Do not use unsupport
             logger.error(f"Error reading document: {str(e)}")
             return self.fail_response(f"Error reading document: {str(e)}")
             
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -453,6 +455,7 @@ IMPORTANT: All content must be wrapped in proper HTML tags. Do not use unsupport
             logger.error(f"Error deleting document: {str(e)}")
             return self.fail_response(f"Error deleting document: {str(e)}")
 
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
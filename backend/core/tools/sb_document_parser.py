@@ -1,7 +1,7 @@
 from chunkr_ai import Chunkr
 from typing import Dict, Any
 
-from core.agentpress.tool import ToolResult, openapi_schema
+from core.agentpress.tool import ToolResult, openapi_schema, tool_concurrency
 from core.agentpress.thread_manager import ThreadManager
 from core.sandbox.tool_base import SandboxToolsBase
 from core.utils.logger import logger
@@ -12,6 +12,7 @@ class SandboxDocumentParserTool(SandboxToolsBase):
         super().__init__(project_id, thread_manager)
         self.chunkr = Chunkr()
 
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -1,4 +1,4 @@
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, tool_concurrency
 from core.sandbox.tool_base import SandboxToolsBase
 from core.utils.files_utils import should_exclude_file, clean_path
 from core.agentpress.thread_manager import ThreadManager
@@ -6,12 +6,22 @@ from core.utils.logger import logger
 from core.utils.config import config
 import os
 import json
+import base64
+import difflib
+import hashlib
 import litellm
 import openai
 import asyncio
 import re
 from typing import Optional
 
+# Larger edits go through the regular download/upload path
+MAX_EDIT_HELPER_PAYLOAD = 96 * 1024
+# The helper is given up on for the run only after this many consecutive failures
+MAX_EDIT_HELPER_FAILURES = 3
+# SequenceMatcher is quadratic; larger changed regions are sent as one replacement
+MAX_DIFF_LINES = 2000
+
 @tool_metadata(
     display_name="Files & Folders",
     description="Create, edit, read, and organize files in your workspace",
@@ -27,6 +37,7 @@ class SandboxFilesTool(SandboxToolsBase):
     def __init__(self, project_id: str, thread_manager: ThreadManager):
         super().__init__(project_id, thread_manager)
         self.SNIPPET_LINES = 4  # Number of context lines to show around edits
+        self._edit_helper_failures = 0
 
     def clean_path(self, path: str) -> str:
         """Clean and normalize a path to be relative to /workspace"""
@@ -44,6 +55,92 @@ class SandboxFilesTool(SandboxToolsBase):
         except Exception:
             return False
 
+    async def _run_edit_helper(self, request: dict) -> Optional[dict]:
+        """Run an edit with the in-sandbox helper (core/sandbox/edit_helper.py).
+        
+        Installs the helper on first use. Returns the helper's result, or None
+        when the helper can't be used and the caller should transfer the file.
+        """
+        if self._edit_helper_failures >= MAX_EDIT_HELPER_FAILURES:
+            return None
+        encoded = base64.b64encode(json.dumps(request).encode()).decode()
+        if len(encoded) > MAX_EDIT_HELPER_PAYLOAD:
+            return None
+        
+        try:
+            # Doesn't invalidate the file cache; callers record their own writes
+            response = await self.run_sandbox_script("edit_helper.py", encoded)
+            if response.exit_code != 0:
+                raise RuntimeError(f"exit code {response.exit_code}: {response.result}")
+            result = json.loads(response.result.strip().splitlines()[-1])
+            self._edit_helper_failures = 0
+            return result
+        except Exception as e:
+            self._edit_helper_failures += 1
+            logger.warning(
+                f"Sandbox edit helper failed ({self._edit_helper_failures}/{MAX_EDIT_HELPER_FAILURES}), "
+                f"falling back to file transfer: {e}"
+            )
+            return None
+
+    @staticmethod
+    def _diff_lines(original_lines: list, new_lines: list) -> list:
+        """Compute [start, end, replacement] edits that turn original_lines into new_lines."""
+        # Trim the common prefix and suffix first; most edits touch a small region
+        start = 0
+        max_start = min(len(original_lines), len(new_lines))
+        while start < max_start and original_lines[start] == new_lines[start]:
+            start += 1
+        end_offset = 0
+        max_end = max_start - start
+        while end_offset < max_end and original_lines[-1 - end_offset] == new_lines[-1 - end_offset]:
+            end_offset += 1
+        original_middle = original_lines[start:len(original_lines) - end_offset]
+        new_middle = new_lines[start:len(new_lines) - end_offset]
+        if not original_middle and not new_middle:
+            return []
+        if len(original_middle) + len(new_middle) > MAX_DIFF_LINES:
+            return [[start, start + len(original_middle), ''.join(new_middle)]]
+        
+        matcher = difflib.SequenceMatcher(None, original_middle, new_middle, autojunk=False)
+        return [
+            [start + i1, start + i2, ''.join(new_middle[j1:j2])]
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal'
+        ]
+
+    async def _write_file_edit(self, full_path: str, original_content: str, new_content: str) -> Optional[str]:
+        """Write an edited file, sending only the changed line ranges when possible.
+
+        Returns:
+            None on success, or an error message when the file changed or was
+            removed since original_content was read; nothing is written then.
+        """
+        original_lines = original_content.splitlines(keepends=True)
+        new_lines = new_content.splitlines(keepends=True)
+        edits = await asyncio.to_thread(self._diff_lines, original_lines, new_lines)
+        result = await self._run_edit_helper({
+            "op": "patch",
+            "path": full_path,
+            "base_sha256": hashlib.sha256(original_content.encode()).hexdigest(),
+            "sha256": hashlib.sha256(new_content.encode()).hexdigest(),
+            "edits": edits,
+        })
+        if result and result.get("ok"):
+            self.fs_cache.record_write(full_path, new_content.encode())
+            return None
+        if result and result.get("error") in ("conflict", "not_found"):
+            # The cached copy is stale; the next read must go to the sandbox
+            self.fs_cache.invalidate(full_path)
+        if result and result.get("error") == "conflict":
+            # Uploading now would overwrite whatever changed the file in the meantime
+            return "The file was modified after it was read. Read it again and redo the edit."
+        if result and result.get("error") == "not_found":
+            return "The file was deleted after it was read."
+        if result:
+            logger.debug(f"Patch of {full_path} rejected ({result.get('error')}), uploading full file")
+        await self.sandbox.fs.upload_file(new_content.encode(), full_path)
+        return None
+
     async def get_workspace_state(self) -> dict:
         """Get the current workspace state by reading all files"""
         files_state = {}
@@ -52,24 +149,24 @@ class SandboxFilesTool(SandboxToolsBase):
             await self._ensure_sandbox()
             
             files = await self.sandbox.fs.list_files(self.workspace_path)
-            for file_info in files:
-                rel_path = file_info.name
-                
-                # Skip excluded files and directories
-                if self._should_exclude_file(rel_path) or file_info.is_dir:
+            file_infos = {
+                file_info.name: file_info for file_info in files
+                if not file_info.is_dir and not self._should_exclude_file(file_info.name)
+            }
+            
+            # Fetch every file in a single archive instead of one download per file
+            contents = await self.download_files_bulk(list(file_infos), self.workspace_path)
+            for rel_path, raw_content in contents.items():
+                file_info = file_infos.get(rel_path)
+                if file_info is None:
                     continue
-
                 try:
-                    full_path = f"{self.workspace_path}/{rel_path}"
-                    content = (await self.sandbox.fs.download_file(full_path)).decode()
                     files_state[rel_path] = {
-                        "content": content,
+                        "content": raw_content.decode(),
                         "is_dir": file_info.is_dir,
                         "size": file_info.size,
                         "modified": file_info.mod_time
                     }
-                except Exception as e:
-                    print(f"Error reading file {rel_path}: {e}")
                 except UnicodeDecodeError:
                     print(f"Skipping binary file: {rel_path}")
 
@@ -86,6 +183,7 @@ class SandboxFilesTool(SandboxToolsBase):
     #         return f"{self._sandbox_url}/{(file_path.replace('/workspace/', ''))}"
     #     return None
 
+    @tool_concurrency(resource="sandbox", key_arg="file_path", normalize_key=clean_path)
     @openapi_schema({
         "type": "function",
         "function": {
@@ -151,6 +249,7 @@ class SandboxFilesTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error creating file: {str(e)}")
 
+    @tool_concurrency(resource="sandbox", key_arg="file_path", normalize_key=clean_path)
     @openapi_schema({
         "type": "function",
         "function": {
@@ -183,12 +282,31 @@ class SandboxFilesTool(SandboxToolsBase):
             
             file_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{file_path}"
+            old_str = old_str.expandtabs()
+            new_str = new_str.expandtabs()
+            
+            # Replace in place in the sandbox so the file never leaves it
+            result = await self._run_edit_helper({
+                "op": "replace",
+                "path": full_path,
+                "old": old_str,
+                "new": new_str,
+                "snippet_lines": self.SNIPPET_LINES,
+            })
+            if result and result.get("ok"):
+                self.fs_cache.invalidate(full_path)
+                return self.success_response("Replacement successful.")
+            if result and result.get("error") == "not_found":
+                return self.fail_response(f"File '{file_path}' does not exist")
+            if result and result.get("error") == "no_match":
+                return self.fail_response(f"String '{old_str}' not found in file")
+            if result and result.get("error") == "multiple":
+                return self.fail_response(f"Multiple occurrences found in lines {result.get('lines')}. Please ensure string is unique")
+            
             if not await self._file_exists(full_path):
                 return self.fail_response(f"File '{file_path}' does not exist")
             
             content = (await self.sandbox.fs.download_file(full_path)).decode()
-            old_str = old_str.expandtabs()
-            new_str = new_str.expandtabs()
             
             occurrences = content.count(old_str)
             if occurrences == 0:
@@ -218,6 +336,7 @@ class SandboxFilesTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error replacing string: {str(e)}")
 
+    @tool_concurrency(resource="sandbox", key_arg="file_path", normalize_key=clean_path)
     @openapi_schema({
         "type": "function",
         "function": {
@@ -307,6 +426,7 @@ class SandboxFilesTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error rewriting file: {str(e)}")
 
+    @tool_concurrency(resource="sandbox", key_arg="file_path", normalize_key=clean_path)
     @openapi_schema({
         "type": "function",
         "function": {
@@ -408,6 +528,7 @@ class SandboxFilesTool(SandboxToolsBase):
             logger.error(f"Error calling Morph/OpenRouter API: {error_message}", exc_info=True)
             return None, error_message
 
+    @tool_concurrency(resource="sandbox", key_arg="target_file", normalize_key=clean_path)
     @openapi_schema({
         "type": "function",
         "function": {
@@ -514,7 +635,14 @@ class SandboxFilesTool(SandboxToolsBase):
                     "updated_content": original_content
                 }))
 
-            await self.sandbox.fs.upload_file(new_content.encode(), full_path)
+            write_error = await self._write_file_edit(full_path, original_content, new_content)
+            if write_error:
+                return ToolResult(success=False, output=json.dumps({
+                    "message": f"Failed to save '{target_file}': {write_error}",
+                    "file_path": target_file,
+                    "original_content": original_content,
+                    "updated_content": None
+                }))
             
             return ToolResult(success=True, output=json.dumps({
                 "message": f"File '{target_file}' edited successfully.",
@@ -1,12 +1,17 @@
 import asyncio
+import hashlib
+import json
 from typing import Optional, List
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, tool_concurrency
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
 from core.utils.config import config
 from core.knowledge_base.validation import FileNameValidator, ValidationError
 from core.utils.logger import logger
 
+KB_MANIFEST_FILENAME = ".kb_manifest.json"
+KB_SYNC_CONCURRENCY = 8
+
 @tool_metadata(
     display_name="Knowledge Base",
     description="Store and retrieve information from your personal knowledge library",
@@ -125,6 +130,7 @@ class SandboxKbTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error installing kb: {str(e)}")
 
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -236,6 +242,7 @@ class SandboxKbTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error performing cleanup: {str(e)}")
 
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -299,59 +306,83 @@ class SandboxKbTool(SandboxToolsBase):
                     file_path,
                     file_size,
                     mime_type,
+                    updated_at,
                     knowledge_base_folders (
                         name
                     )
                 )
             """).eq("agent_id", agent_id).eq("enabled", True).execute()
             
-            if not result.data:
-                return self.success_response({
-                    "message": "No knowledge base files to sync",
-                    "synced_files": 0,
-                    "kb_directory": "~/knowledge-base-global"
-                })
-            
-            # Create knowledge base directory in sandbox
             kb_dir = "knowledge-base-global"
             await self.sandbox.process.exec(f"mkdir -p ~/{kb_dir}")
-            await self.sandbox.process.exec(f"rm -rf ~/{kb_dir}/*")
-            
-            synced_files = 0
-            folder_structure = {}
             
-            for assignment in result.data:
-                if not assignment.get('knowledge_base_entries'):
+            # Desired state: relative path -> source signature of the entry
+            desired = {}
+            for assignment in result.data or []:
+                entry = assignment.get('knowledge_base_entries')
+                if not entry:
                     continue
-                    
-                entry = assignment['knowledge_base_entries']
                 folder_name = entry['knowledge_base_folders']['name']
-                filename = entry['filename']
-                file_path = entry['file_path']  # S3 path
-                
-                try:
-                    # Download file from S3
-                    file_response = await client.storage.from_('file-uploads').download(file_path)
-                    
-                    if not file_response:
-                        continue
-                    
-                    # Create folder structure in sandbox
-                    folder_path = f"~/{kb_dir}/{folder_name}"
-                    await self.sandbox.process.exec(f"mkdir -p '{folder_path}'")
-                    
-                    # Upload file to sandbox
-                    file_destination = f"{kb_dir}/{folder_name}/{filename}"
-                    await self.sandbox.fs.upload_file(file_response, file_destination)
-                    
-                    synced_files += 1
-                    
-                    if folder_name not in folder_structure:
-                        folder_structure[folder_name] = []
-                    folder_structure[folder_name].append(filename)
-                    
-                except Exception as e:
-                    continue
+                relative_path = f"{folder_name}/{entry['filename']}"
+                desired[relative_path] = {
+                    "entry_id": assignment['entry_id'],
+                    "file_path": entry['file_path'],
+                    "signature": f"{entry['file_path']}:{entry['file_size']}:{entry.get('updated_at')}",
+                }
+            
+            manifest = await self._load_kb_manifest(kb_dir)
+            if manifest is None:
+                # No manifest from a previous sync: start from a clean directory once
+                await self.sandbox.process.exec(f"rm -rf ~/{kb_dir}/*")
+                manifest = {"files": {}}
+            previous_files = manifest.get("files", {})
+            
+            to_transfer = [
+                path for path, info in desired.items()
+                if previous_files.get(path, {}).get("signature") != info["signature"]
+            ]
+            to_remove = [path for path in previous_files if path not in desired]
+            
+            semaphore = asyncio.Semaphore(KB_SYNC_CONCURRENCY)
+            # Changed files are collected here and written to the sandbox in one archive
+            uploads = {}
+            
+            async def transfer(relative_path: str) -> Optional[dict]:
+                info = desired[relative_path]
+                async with semaphore:
+                    try:
+                        file_response = await client.storage.from_('file-uploads').download(info["file_path"])
+                        if not file_response:
+                            return None
+                        uploads[relative_path] = file_response
+                        return {
+                            "entry_id": info["entry_id"],
+                            "signature": info["signature"],
+                            "sha256": hashlib.sha256(file_response).hexdigest(),
+                        }
+                    except Exception as e:
+                        logger.warning(f"Failed to sync knowledge base file {relative_path}: {e}")
+                        return None
+            
+            transferred = await asyncio.gather(*(transfer(path) for path in to_transfer))
+            
+            synced = {path: info for path, info in previous_files.items() if path in desired and path not in to_transfer}
+            for path, file_info in zip(to_transfer, transferred):
+                if file_info:
+                    synced[path] = file_info
+            
+            folder_structure = {}
+            for path in sorted(synced):
+                folder_name, filename = path.rsplit('/', 1)
+                folder_structure.setdefault(folder_name, []).append(filename)
+            synced_files = len(synced)
+            
+            if not desired and not previous_files:
+                return self.success_response({
+                    "message": "No knowledge base files to sync",
+                    "synced_files": 0,
+                    "kb_directory": f"~/{kb_dir}"
+                })
             
             # Create README
             readme_content = f"""# Global Knowledge Base
@@ -375,11 +406,24 @@ This directory contains your agent's knowledge base files, synced from the cloud
 Agent ID: {agent_id}
 """
             
-            await self.sandbox.fs.upload_file(readme_content.encode('utf-8'), f"{kb_dir}/README.md")
+            # Only rewrite files that changed so kb does not re-embed unchanged content
+            readme_bytes = readme_content.encode('utf-8')
+            readme_hash = hashlib.sha256(readme_bytes).hexdigest()
+            if manifest.get("readme_sha256") != readme_hash:
+                uploads["README.md"] = readme_bytes
+            
+            new_manifest = {"files": synced, "readme_sha256": readme_hash}
+            if new_manifest != manifest:
+                uploads[KB_MANIFEST_FILENAME] = json.dumps(new_manifest, indent=2).encode('utf-8')
+            
+            await self.upload_files_bulk(uploads, f"~/{kb_dir}", remove=to_remove)
             
             return self.success_response({
                 "message": f"Successfully synced {synced_files} files to knowledge base",
                 "synced_files": synced_files,
+                "transferred_files": sum(1 for info in transferred if info),
+                "removed_files": len(to_remove),
+                "unchanged_files": synced_files - sum(1 for info in transferred if info),
                 "kb_directory": f"~/{kb_dir}",
                 "folder_structure": folder_structure,
                 "agent_id": agent_id
@@ -388,6 +432,15 @@ Agent ID: {agent_id}
         except Exception as e:
             return self.fail_response(f"Failed to sync knowledge base: {str(e)}")
 
+    async def _load_kb_manifest(self, kb_dir: str) -> Optional[dict]:
+        """Load the sync manifest from the sandbox, or None if there is none."""
+        try:
+            content = await self.sandbox.fs.download_file(f"{kb_dir}/{KB_MANIFEST_FILENAME}")
+            manifest = json.loads(content.decode('utf-8') if isinstance(content, bytes) else content)
+            return manifest if isinstance(manifest, dict) else None
+        except Exception:
+            return None
+
     @openapi_schema({
         "type": "function",
         "function": {
@@ -592,7 +645,8 @@ Agent ID: {agent_id}
                 "filename": final_filename,
                 "folder_name": folder_name,
                 "file_size": len(file_content),
-                "summary": result.get('summary', 'Processing...')
+                "processing_status": result.get('processing_status', 'pending'),
+                "summary": "Queued for processing; the file becomes searchable once its summary is generated"
             }
             
             # Add info about filename changes
@@ -777,6 +831,7 @@ Agent ID: {agent_id}
         except Exception as e:
             return self.fail_response(f"Failed to enable/disable item: {str(e)}")
 
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
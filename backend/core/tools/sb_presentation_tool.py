@@ -1,5 +1,5 @@
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
-from core.sandbox.tool_base import SandboxToolsBase
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, tool_concurrency
+from core.sandbox.tool_base import SandboxToolsBase, archive_directory
 from core.agentpress.thread_manager import ThreadManager
 from core.utils.logger import logger
 from typing import List, Dict, Optional, Union
@@ -8,8 +8,12 @@ import os
 from datetime import datetime
 import re
 import asyncio
+import shlex
 import httpx
 
+SLIDE_MEASURE_TIMEOUT = 30
+SLIDE_MEASURE_TIMEOUT_PER_SLIDE = 5
+
 @tool_metadata(
     display_name="Presentations",
     description="Create and manage stunning presentation slides",
@@ -124,56 +128,25 @@ class SandboxPresentationTool(SandboxToolsBase):
             return ""
 
     async def _copy_template_to_workspace(self, template_name: str, presentation_name: str) -> str:
-        """Copy entire template directory structure to workspace using os.walk
+        """Copy entire template directory structure to workspace as a single archive
         
         Returns:
             The presentation path in the workspace
         """
         await self._ensure_sandbox()
-        await self._ensure_presentations_dir()
         
         template_path = os.path.join(self.templates_dir, template_name)
         safe_name = self._sanitize_filename(presentation_name)
         presentation_path = f"{self.workspace_path}/{self.presentations_dir}/{safe_name}"
         
-        # Ensure presentation directory exists
-        await self._ensure_presentation_dir(presentation_name)
-        
-        # Use os.walk to recursively copy all files
-        copied_files = []
-        for root, dirs, files in os.walk(template_path):
-            # Calculate relative path from template root
-            rel_path = os.path.relpath(root, template_path)
-            
-            # Create corresponding directory in workspace (if not root)
-            if rel_path != '.':
-                target_dir = os.path.join(presentation_path, rel_path)
-                target_dir_path = target_dir.replace('\\', '/')  # Normalize path separators
-                try:
-                    await self.sandbox.fs.create_folder(target_dir_path, "755")
-                except:
-                    pass  # Directory might already exist
-            else:
-                target_dir_path = presentation_path
-            
-            # Copy all files
-            for file in files:
-                source_file = os.path.join(root, file)
-                rel_file_path = os.path.relpath(source_file, template_path)
-                target_file = os.path.join(presentation_path, rel_file_path).replace('\\', '/')
-                
-                try:
-                    with open(source_file, 'rb') as f:
-                        file_content = f.read()
-                    await self.sandbox.fs.upload_file(file_content, target_file)
-                    copied_files.append(rel_file_path)
-                except Exception as e:
-                    # Log error but continue with other files
-                    print(f"Error copying {rel_file_path}: {str(e)}")
+        # The archive is cached per template content, so this is one upload and one extract
+        _, archive = await asyncio.to_thread(archive_directory, template_path)
+        await self.upload_archive(archive, presentation_path)
         
         # Update metadata.json with correct paths for the new presentation
-        metadata = await self._load_presentation_metadata(presentation_path)
+        # (the copied metadata.json is the template's, so read it locally)
         template_metadata = self._load_template_metadata(template_name)
+        metadata = dict(template_metadata) or await self._load_presentation_metadata(presentation_path)
         
         # Update presentation name and preserve slides structure
         metadata["presentation_name"] = presentation_name
@@ -235,6 +208,7 @@ class SandboxPresentationTool(SandboxToolsBase):
         return style_info
 
 
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -639,6 +613,7 @@ class SandboxPresentationTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Failed to create slide: {str(e)}")
 
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -775,6 +750,7 @@ class SandboxPresentationTool(SandboxToolsBase):
 
 
 
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -867,11 +843,43 @@ class SandboxPresentationTool(SandboxToolsBase):
             return self.fail_response(f"Failed to delete presentation: {str(e)}")
 
 
+    async def _measure_slides(self, slide_paths: List[str]) -> List[Dict]:
+        """Render slides in one headless browser session in the sandbox and measure their height.
+        
+        Returns one result per path, in order; see core/sandbox/measure_slides.py.
+        """
+        args = " ".join(shlex.quote(path) for path in slide_paths)
+        response = await self.run_sandbox_script(
+            "measure_slides.py", args, timeout=SLIDE_MEASURE_TIMEOUT + SLIDE_MEASURE_TIMEOUT_PER_SLIDE * len(slide_paths)
+        )
+        output = (getattr(response, "result", None) or getattr(response, "output", "") or "").strip()
+        if response.exit_code != 0 or not output:
+            raise Exception(f"Validation script failed: {output or 'no output'}")
+        return json.loads(output.splitlines()[-1])
+
+    def _slide_validation_result(self, slide_number: int, slide_info: Dict, dimensions: Dict) -> Dict:
+        """Pass/fail summary for one measured slide"""
+        validation_passed = not dimensions["overflows"]
+        result = {
+            "slide_number": slide_number,
+            "slide_title": slide_info["title"],
+            "actual_content_height": dimensions["scrollHeight"],
+            "target_height": 1080,
+            "validation_passed": validation_passed
+        }
+        if validation_passed:
+            result["message"] = f"✓ Slide {slide_number} '{slide_info['title']}' validation passed. Content height: {dimensions['scrollHeight']}px"
+        else:
+            result["message"] = f"✗ Slide {slide_number} '{slide_info['title']}' validation failed. Content height: {dimensions['scrollHeight']}px exceeds 1080px limit by {dimensions['excessHeight']}px"
+            result["excess_height"] = dimensions["excessHeight"]
+        return result
+
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
             "name": "validate_slide",
-            "description": "Validate a slide by reading its HTML code and checking if the content height exceeds 1080px. Use this tool to ensure slides fit within the standard presentation dimensions before finalizing them. This helps maintain proper slide formatting and prevents content overflow issues.",
+            "description": "Validate a slide by reading its HTML code and checking if the content height exceeds 1080px. Use this tool to ensure slides fit within the standard presentation dimensions before finalizing them. This helps maintain proper slide formatting and prevents content overflow issues. To check every slide of a presentation, use validate_presentation instead.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -910,118 +918,93 @@ class SandboxPresentationTool(SandboxToolsBase):
             
             # Get slide info
             slide_info = metadata["slides"][str(slide_number)]
-            slide_filename = slide_info["filename"]
+            slide_path = f"{presentation_path}/{slide_info['filename']}"
             
-            # Create a Python script to measure the actual rendered height using Playwright
-            measurement_script = f'''
-import asyncio
-import json
-from playwright.async_api import async_playwright
-
-async def measure_slide_height():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=['--no-sandbox', '--disable-setuid-sandbox']
-        )
-        page = await browser.new_page(viewport={{"width": 1920, "height": 1080}})
-        
-        # Load the HTML file
-        await page.goto('file:///workspace/{self.presentations_dir}/{safe_name}/{slide_filename}')
-        
-        # Wait for page to load
-        await page.wait_for_load_state('networkidle')
-        
-        # Measure the actual content height
-        dimensions = await page.evaluate("""
-            () => {{
-                const body = document.body;
-                const html = document.documentElement;
-                
-                // Get the actual scroll height (total content height)
-                const scrollHeight = Math.max(
-                    body.scrollHeight, body.offsetHeight,
-                    html.clientHeight, html.scrollHeight, html.offsetHeight
-                );
-                
-                // Get viewport height
-                const viewportHeight = window.innerHeight;
-                
-                // Check if content overflows
-                const overflows = scrollHeight > 1080;
-                
-                return {{
-                    scrollHeight: scrollHeight,
-                    viewportHeight: viewportHeight,
-                    overflows: overflows,
-                    excessHeight: scrollHeight - 1080
-                }};
-            }}
-        """)
-        
-        await browser.close()
-        return dimensions
-
-result = asyncio.run(measure_slide_height())
-print(json.dumps(result))
-'''
-            
-            # Write the script to a temporary file in the sandbox
-            script_path = f"{self.workspace_path}/.validate_slide_temp.py"
-            await self.sandbox.fs.upload_file(measurement_script.encode(), script_path)
-            
-            # Execute the script
             try:
-                result = await self.sandbox.process.exec(
-                    f"/bin/sh -c 'cd /workspace && python3 .validate_slide_temp.py'",
-                    timeout=30
-                )
-                
-                # Parse the result
-                output = (getattr(result, "result", None) or getattr(result, "output", "") or "").strip()
-                if not output:
-                    raise Exception("No output from validation script")
-                
-                dimensions = json.loads(output)
-                
-                # Clean up the temporary script
-                try:
-                    await self.sandbox.fs.delete_file(script_path)
-                except:
-                    pass
-                
+                dimensions = (await self._measure_slides([slide_path]))[0]
+                if "error" in dimensions:
+                    raise Exception(dimensions["error"])
             except Exception as e:
-                # Clean up on error
-                try:
-                    await self.sandbox.fs.delete_file(script_path)
-                except:
-                    pass
                 return self.fail_response(f"Failed to measure slide dimensions: {str(e)}")
             
-            # Analyze results - simple pass/fail
-            validation_passed = not dimensions["overflows"]
-            
             validation_results = {
                 "presentation_name": presentation_name,
                 "presentation_path": presentation_path,
-                "slide_number": slide_number,
-                "slide_title": slide_info["title"],
-                "actual_content_height": dimensions["scrollHeight"],
-                "target_height": 1080,
-                "validation_passed": validation_passed
+                **self._slide_validation_result(slide_number, slide_info, dimensions)
+            }
+            return self.success_response(validation_results)
+            
+        except Exception as e:
+            return self.fail_response(f"Failed to validate slide: {str(e)}")
+
+    @tool_concurrency(read_only=True, resource="sandbox")
+    @openapi_schema({
+        "type": "function",
+        "function": {
+            "name": "validate_presentation",
+            "description": "Validate all slides of a presentation at once, checking for each slide whether its content height exceeds 1080px. Much faster than calling validate_slide for every slide; use it after creating or updating several slides.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "presentation_name": {
+                        "type": "string",
+                        "description": "Name of the presentation to validate"
+                    }
+                },
+                "required": ["presentation_name"]
             }
+        }
+    })
+    async def validate_presentation(self, presentation_name: str) -> ToolResult:
+        """Validate every slide of a presentation in a single browser session"""
+        try:
+            await self._ensure_sandbox()
             
-            # Add pass/fail message
-            if validation_passed:
-                validation_results["message"] = f"✓ Slide {slide_number} '{slide_info['title']}' validation passed. Content height: {dimensions['scrollHeight']}px"
+            if not presentation_name:
+                return self.fail_response("Presentation name is required.")
+            
+            safe_name = self._sanitize_filename(presentation_name)
+            presentation_path = f"{self.workspace_path}/{self.presentations_dir}/{safe_name}"
+            
+            metadata = await self._load_presentation_metadata(presentation_path)
+            slides = sorted(metadata.get("slides", {}).items(), key=lambda item: int(item[0]))
+            if not slides:
+                return self.fail_response(f"No slides found in presentation '{presentation_name}'")
+            
+            try:
+                measurements = await self._measure_slides([f"{presentation_path}/{info['filename']}" for _, info in slides])
+            except Exception as e:
+                return self.fail_response(f"Failed to measure slide dimensions: {str(e)}")
+            
+            results = []
+            for (slide_number, slide_info), dimensions in zip(slides, measurements):
+                if "error" in dimensions:
+                    results.append({
+                        "slide_number": int(slide_number),
+                        "slide_title": slide_info["title"],
+                        "validation_passed": False,
+                        "message": f"⚠️ Slide {slide_number} '{slide_info['title']}' could not be measured: {dimensions['error']}"
+                    })
+                else:
+                    results.append(self._slide_validation_result(int(slide_number), slide_info, dimensions))
+            
+            failed = [result["slide_number"] for result in results if not result["validation_passed"]]
+            if failed:
+                summary = f"{len(failed)} of {len(results)} slides failed validation: {', '.join(str(n) for n in failed)}"
             else:
-                validation_results["message"] = f"✗ Slide {slide_number} '{slide_info['title']}' validation failed. Content height: {dimensions['scrollHeight']}px exceeds 1080px limit by {dimensions['excessHeight']}px"
-                validation_results["excess_height"] = dimensions["excessHeight"]
+                summary = f"✓ All {len(results)} slides passed validation"
             
-            return self.success_response(validation_results)
+            return self.success_response({
+                "presentation_name": presentation_name,
+                "presentation_path": presentation_path,
+                "message": summary,
+                "all_passed": not failed,
+                "failed_slides": failed,
+                "slides": results
+            })
             
         except Exception as e:
-            return self.fail_response(f"Failed to validate slide: {str(e)}")
+            return self.fail_response(f"Failed to validate presentation: {str(e)}")
 
     @openapi_schema({
         "type": "function",
@@ -1,12 +1,24 @@
 import asyncio
-from typing import Optional, Dict, Any
+import re
+from typing import Optional, Dict, Any, Tuple
 import time
 import asyncio
 from uuid import uuid4
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, tool_concurrency
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
 
+# Blocking commands stream their pane output into a log file here and write their
+# exit code to a sentinel file when they finish
+COMMAND_RUN_DIR = "/tmp/.command_runs"
+# Only the tail of very long outputs is read back and returned
+MAX_COMMAND_OUTPUT_BYTES = 100_000
+POLL_WAIT_MIN = 0.1
+POLL_WAIT_INITIAL = 0.5
+POLL_WAIT_MAX = 5.0
+
+ANSI_ESCAPE_RE = re.compile(r'\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])')
+
 @tool_metadata(
     display_name="Terminal & Commands",
     description="Run commands, install packages, and execute scripts in your workspace",
@@ -46,6 +58,7 @@ class SandboxShellTool(SandboxToolsBase):
             except Exception as e:
                 print(f"Warning: Failed to cleanup session {session_name}: {str(e)}")
 
+    @tool_concurrency(resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -115,45 +128,28 @@ class SandboxShellTool(SandboxToolsBase):
             wrapped_command = command.replace('"', '\\"')
             
             if blocking:
-                # For blocking execution, use a more reliable approach
-                # Add a unique marker to detect command completion
-                marker = f"COMMAND_DONE_{str(uuid4())[:8]}"
-                completion_command = self._format_completion_command(command, marker)
-                wrapped_completion_command = completion_command.replace('"', '\\"')
-                
-                # Send the command with completion marker
-                await self._execute_raw_command(f'tmux send-keys -t {session_name} "{wrapped_completion_command}" Enter')
+                run_id = str(uuid4())[:8]
+                log_file = f"{COMMAND_RUN_DIR}/{run_id}.log"
+                exit_file = f"{COMMAND_RUN_DIR}/{run_id}.exit"
+                # The exit code is written to a temp file and renamed so it appears atomically
+                sentinel = f"echo \\$? > {exit_file}.tmp && mv {exit_file}.tmp {exit_file}"
+                completion_command = self._format_completion_command(wrapped_command, sentinel)
                 
-                start_time = time.time()
-                final_output = ""
+                # Pipe pane output to the log and send the command in a single round trip
+                await self._execute_raw_command(
+                    f"mkdir -p {COMMAND_RUN_DIR} && "
+                    f"tmux pipe-pane -t {session_name} 'cat >> {log_file}' && "
+                    f'tmux send-keys -t {session_name} "{completion_command}" Enter'
+                )
                 
-                while (time.time() - start_time) < timeout:
-                    # Wait a shorter interval for more responsive checking
-                    await asyncio.sleep(0.5)
-                    
-                    # Check if session still exists (command might have exited)
-                    check_result = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'ended'")
-                    if "ended" in check_result.get("output", ""):
-                        break
-                        
-                    # Get current output and check for our completion marker
-                    output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-                    current_output = output_result.get("output", "")
-
-                    if self._is_command_completed(current_output, marker):
-                        final_output = current_output
-                        break
-                
-                # If we didn't get the marker, capture whatever output we have
-                if not final_output:
-                    output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-                    final_output = output_result.get("output", "")
+                final_output, exit_code = await self._wait_for_command(session_name, log_file, exit_file, timeout)
                 
                 # Kill the session after capture
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                await self._execute_raw_command(f"tmux kill-session -t {session_name}; rm -f {log_file} {exit_file} {exit_file}.tmp")
                 
                 return self.success_response({
                     "output": final_output,
+                    "exit_code": exit_code,
                     "session_name": session_name,
                     "cwd": cwd,
                     "completed": True
@@ -161,6 +157,8 @@ class SandboxShellTool(SandboxToolsBase):
             else:
                 # Send command to tmux session for non-blocking execution
                 await self._execute_raw_command(f'tmux send-keys -t {session_name} "{wrapped_command}" Enter')
+                # The command keeps changing files after this returns
+                self.fs_cache.mark_background_writers()
                 
                 # For non-blocking, just return immediately
                 return self.success_response({
@@ -179,6 +177,80 @@ class SandboxShellTool(SandboxToolsBase):
                     pass
             return self.fail_response(f"Error executing command: {str(e)}")
 
+    async def _wait_for_command(self, session_name: str, log_file: str, exit_file: str, timeout: int) -> Tuple[str, Optional[int]]:
+        """Wait for a blocking command, reading only the log bytes written since the last poll.
+        
+        Each poll is one sandbox call that waits in the sandbox until the exit
+        sentinel appears (or the session ends), then reports the status, the log
+        size and the new bytes. The wait grows while the command keeps running.
+        
+        Returns:
+            Tuple of (cleaned output, exit code or None if the command did not finish)
+        """
+        start_time = time.time()
+        offset = 0
+        skipped = 0
+        chunks = []
+        exit_code = None
+        wait = POLL_WAIT_INITIAL
+        
+        while True:
+            remaining = timeout - (time.time() - start_time)
+            # Out of time: one last read without waiting (timeout 0 would mean no timeout at all)
+            poll_wait = max(POLL_WAIT_MIN, min(wait, remaining)) if remaining > 0 else None
+            status, offset, new_output, gap = await self._poll_command_log(session_name, log_file, exit_file, offset, poll_wait)
+            skipped += gap
+            if new_output:
+                chunks.append(new_output)
+                # Keep only what can be returned
+                while len(chunks) > 1 and sum(len(c) for c in chunks[1:]) > MAX_COMMAND_OUTPUT_BYTES:
+                    skipped += len(chunks.pop(0))
+            
+            if status.lstrip('-').isdigit():
+                exit_code = int(status)
+                break
+            if status == "ended" or remaining <= 0:
+                break
+            wait = min(wait * 2, POLL_WAIT_MAX)
+        
+        output = self._clean_terminal_output(''.join(chunks))[-MAX_COMMAND_OUTPUT_BYTES:]
+        if skipped:
+            output = f"[... earlier output truncated ...]\n{output}"
+        return output, exit_code
+    
+    async def _poll_command_log(self, session_name: str, log_file: str, exit_file: str, offset: int, wait: Optional[float]) -> Tuple[str, int, str, int]:
+        """Long-poll a blocking command once; with wait=None, read without waiting.
+        
+        Returns:
+            Tuple of (status, new offset, new output, bytes skipped). Status is the
+            exit code once the sentinel exists, else "running" or "ended".
+        """
+        wait_command = ""
+        if wait is not None:
+            wait_command = f"timeout {wait:.1f} sh -c 'until [ -f {exit_file} ] || ! tmux has-session -t {session_name} 2>/dev/null; do sleep 0.2; done'; "
+        result = await self._execute_raw_command(
+            wait_command +
+            # Give the pane pipe a moment to flush the last lines after the sentinel appears
+            f"[ -f {exit_file} ] && sleep 0.2; "
+            f"status=$(cat {exit_file} 2>/dev/null || (tmux has-session -t {session_name} 2>/dev/null && echo running) || echo ended); "
+            f"size=$(stat -c %s {log_file} 2>/dev/null || echo 0); "
+            f"start=$(( size - {offset} > {MAX_COMMAND_OUTPUT_BYTES} ? size - {MAX_COMMAND_OUTPUT_BYTES} : {offset} )); "
+            f"echo \"$status $size $start\"; "
+            f"tail -c +$((start + 1)) {log_file} 2>/dev/null | head -c $((size - start))"
+        )
+        header, _, body = result.get("output", "").partition("\n")
+        parts = header.split()
+        if len(parts) != 3:
+            return "running", offset, "", 0
+        status, size, start = parts[0], int(parts[1]), int(parts[2])
+        return status, size, body, start - offset
+    
+    def _clean_terminal_output(self, output: str) -> str:
+        """Strip escape sequences and carriage-return redraws from raw pane output."""
+        output = ANSI_ESCAPE_RE.sub('', output)
+        lines = output.replace('\r\n', '\n').split('\n')
+        return '\n'.join(line.rstrip('\r').rsplit('\r', 1)[-1] for line in lines)
+
     async def _execute_raw_command(self, command: str) -> Dict[str, Any]:
         """Execute a raw command directly in the sandbox."""
         # Ensure session exists for raw commands
@@ -208,6 +280,7 @@ class SandboxShellTool(SandboxToolsBase):
             "exit_code": response.exit_code
         }
 
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -264,6 +337,7 @@ class SandboxShellTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error checking command output: {str(e)}")
 
+    @tool_concurrency(resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -304,6 +378,7 @@ class SandboxShellTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error terminating command: {str(e)}")
 
+    @tool_concurrency(read_only=True, resource="sandbox")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -347,97 +422,19 @@ class SandboxShellTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error listing commands: {str(e)}")
 
-    def _format_completion_command(self, command: str, marker: str) -> str:
-        """Format command with completion marker, handling heredocs properly."""
-        import re
-        
+    def _format_completion_command(self, command: str, completion: str) -> str:
+        """Append a completion step to a command, handling heredocs properly."""
         # Check if command contains heredoc syntax
         # Look for patterns like: << EOF, << 'EOF', << "EOF", <<EOF
         heredoc_pattern = r'<<\s*[\'"]?\w+[\'"]?'
         
         if re.search(heredoc_pattern, command):
-            # For heredoc commands, add the completion marker on a new line
+            # For heredoc commands, add the completion step on a new line
             # This ensures it executes after the heredoc completes
-            return f"{command}\necho {marker}"
+            return f"{command}\n{completion}"
         else:
             # For regular commands, use semicolon separator
-            return f"{command} ; echo {marker}"
-
-    def _is_command_completed(self, current_output: str, marker: str) -> bool:
-        """
-        Check if command execution is completed by comparing marker from end to start.
-        
-        Args:
-            current_output: Current output content
-            marker: Completion marker
-            
-        Returns:
-            bool: True if command completed, False otherwise
-        """
-        if not current_output or not marker:
-            return False
-
-        # Find the last complete marker match position to start comparison
-        # Avoid terminal prompt output at the end
-        marker_end_pos = -1
-        for i in range(len(current_output) - len(marker), -1, -1):
-            if current_output[i:i+len(marker)] == marker:
-                marker_end_pos = i + len(marker) - 1
-                break
-        
-        # Start comparison from found marker position or end of output
-        if marker_end_pos != -1:
-            output_idx = marker_end_pos
-            marker_idx = len(marker) - 1
-        else:
-            output_idx = len(current_output) - 1
-            marker_idx = len(marker) - 1
-        
-        # Compare characters from end to start
-        while marker_idx >= 0 and output_idx >= 0:
-            # Skip newlines in current_output
-            if current_output[output_idx] == '\n':
-                output_idx -= 1
-                continue
-                
-            # Compare characters
-            if current_output[output_idx] != marker[marker_idx]:
-                return False
-                
-            # Continue comparison
-            output_idx -= 1
-            marker_idx -= 1
-        
-        # If marker not fully matched
-        if marker_idx >= 0:
-            return False
-            
-        # Check if preceded by "echo " (command just started)
-        check_count = 0
-        echo_chars = "echo "
-        echo_idx = len(echo_chars) - 1
-        
-        while output_idx >= 0 and check_count < 5:
-            # Skip newlines
-            if current_output[output_idx] == '\n':
-                output_idx -= 1
-                continue
-                
-            check_count += 1
-            
-            # Check for "echo " pattern
-            if echo_idx >= 0 and current_output[output_idx] == echo_chars[echo_idx]:
-                echo_idx -= 1
-            else:
-                echo_idx = len(echo_chars) - 1
-                
-            output_idx -= 1
-            
-        # If "echo " found, command just started
-        if echo_idx < 0:
-            return False
-            
-        return True
+            return f"{command} ; {completion}"
 
     async def cleanup(self):
         """Clean up all sessions."""
@@ -1,12 +1,18 @@
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, tool_concurrency
 from core.sandbox.tool_base import SandboxToolsBase
 from core.utils.logger import logger
+from core.utils.cache import invalidate_thread_summary
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 from enum import Enum
+import asyncio
 import json
+import os
 import uuid
 
+# Agents update tasks after almost every step; changes are written at most this often
+FLUSH_INTERVAL_SECONDS = float(os.getenv("TASK_LIST_FLUSH_INTERVAL", 2.0))
+
 class TaskStatus(str, Enum):
     PENDING = "pending"
     COMPLETED = "completed"
@@ -31,6 +37,7 @@ class Task(BaseModel):
     weight=5,
     visible=True
 )
+@tool_concurrency(resource="task_list")
 class TaskListTool(SandboxToolsBase):
     """Task management system for organizing and tracking tasks. It contains the action plan for the agent to follow.
     
@@ -44,86 +51,160 @@ class TaskListTool(SandboxToolsBase):
         super().__init__(project_id, thread_manager)
         self.thread_id = thread_id
         self.task_list_message_type = "task_list"
+        # In-memory task list for this run; loaded on first use
+        self._sections: Optional[List[Section]] = None
+        self._tasks: Optional[List[Task]] = None
+        self._message_id: Optional[str] = None
+        # Last state reported to the frontend, used to compute change deltas
+        self._reported_sections: Dict[str, Dict[str, Any]] = {}
+        self._reported_tasks: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._load_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        thread_manager.add_flush_callback(self.flush)
     
     async def _load_data(self) -> tuple[List[Section], List[Task]]:
-        """Load sections and tasks from storage"""
-        try:
-            client = await self.thread_manager.db.client
-            result = await client.table('messages').select('*')\
-                .eq('thread_id', self.thread_id)\
-                .eq('type', self.task_list_message_type)\
-                .order('created_at', desc=True).limit(1).execute()
-            
-            if result.data and result.data[0].get('content'):
-                content = result.data[0]['content']
-                if isinstance(content, str):
-                    content = json.loads(content)
-                
-                sections = [Section(**s) for s in content.get('sections', [])]
-                tasks = [Task(**t) for t in content.get('tasks', [])]
+        """Get sections and tasks, loading them from storage on first use in this run"""
+        if self._tasks is not None:
+            return self._sections, self._tasks
+        
+        async with self._load_lock:
+            if self._tasks is not None:
+                return self._sections, self._tasks
+            try:
+                client = await self.thread_manager.db.client
+                result = await client.table('messages').select('message_id, content')\
+                    .eq('thread_id', self.thread_id)\
+                    .eq('type', self.task_list_message_type)\
+                    .order('created_at', desc=True).limit(1).execute()
                 
-                # Handle migration from old format
-                if not sections and 'sections' in content:
-                    # Create sections from old nested format
-                    for old_section in content['sections']:
-                        section = Section(title=old_section['title'])
-                        sections.append(section)
-                        
-                        # Update tasks to reference section ID
-                        for old_task in old_section.get('tasks', []):
-                            task = Task(
-                                content=old_task['content'],
-                                status=TaskStatus(old_task.get('status', 'pending')),
-                                section_id=section.id
-                            )
-                            if 'id' in old_task:
-                                task.id = old_task['id']
-                            tasks.append(task)
+                # Empty lists when there is no task list yet - no default section
+                sections, tasks = [], []
+                if result.data:
+                    self._message_id = result.data[0]['message_id']
+                if result.data and result.data[0].get('content'):
+                    content = result.data[0]['content']
+                    if isinstance(content, str):
+                        content = json.loads(content)
+                    
+                    sections = [Section(**s) for s in content.get('sections', [])]
+                    tasks = [Task(**t) for t in content.get('tasks', [])]
+                    
+                    # Handle migration from old format
+                    if not sections and 'sections' in content:
+                        # Create sections from old nested format
+                        for old_section in content['sections']:
+                            section = Section(title=old_section['title'])
+                            sections.append(section)
+                            
+                            # Update tasks to reference section ID
+                            for old_task in old_section.get('tasks', []):
+                                task = Task(
+                                    content=old_task['content'],
+                                    status=TaskStatus(old_task.get('status', 'pending')),
+                                    section_id=section.id
+                                )
+                                if 'id' in old_task:
+                                    task.id = old_task['id']
+                                tasks.append(task)
                 
+                self._sections, self._tasks = sections, tasks
+                self._reported_sections = {s.id: s.model_dump() for s in sections}
+                self._reported_tasks = {t.id: t.model_dump() for t in tasks}
                 return sections, tasks
-            
-            # Return empty lists - no default section
-            return [], []
-            
-        except Exception as e:
-            logger.error(f"Error loading data: {e}")
-            return [], []
+                
+            except Exception as e:
+                # Not cached, so the next call retries the load
+                logger.error(f"Error loading data: {e}")
+                return [], []
     
-    async def _save_data(self, sections: List[Section], tasks: List[Task]):
-        """Save sections and tasks to storage"""
-        try:
-            client = await self.thread_manager.db.client
-            
+    async def _save_data(self, sections: List[Section], tasks: List[Task]) -> Dict[str, Any]:
+        """Make sections and tasks the current state and schedule persisting it.
+        
+        Returns the changes since the previous state.
+        """
+        self._sections, self._tasks = sections, tasks
+        self._dirty = True
+        self._schedule_flush()
+        return self._collect_changes()
+    
+    def _collect_changes(self) -> Dict[str, Any]:
+        """Diff the current state against the last reported one"""
+        sections = {s.id: s.model_dump() for s in self._sections}
+        tasks = {t.id: t.model_dump() for t in self._tasks}
+        changes = {
+            "sections": self._diff(self._reported_sections, sections),
+            "tasks": self._diff(self._reported_tasks, tasks)
+        }
+        self._reported_sections, self._reported_tasks = sections, tasks
+        return changes
+    
+    @staticmethod
+    def _diff(before: Dict[str, Dict[str, Any]], after: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "created": [item for item_id, item in after.items() if item_id not in before],
+            "updated": [item for item_id, item in after.items() if item_id in before and before[item_id] != item],
+            "deleted": [item_id for item_id in before if item_id not in after]
+        }
+    
+    def _schedule_flush(self) -> None:
+        if self._flush_task and not self._flush_task.done():
+            return
+        
+        async def _delayed_flush():
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            # Detach before flushing so close() never cancels a write in flight
+            self._flush_task = None
+            try:
+                await self.flush()
+            except Exception:
+                # Still dirty; retried on the next change or at the end of the run
+                pass
+        
+        self._flush_task = asyncio.create_task(_delayed_flush())
+    
+    async def flush(self):
+        """Persist the task list if it changed since the last write"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            self._flush_task = None
+        
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
             content = {
-                'sections': [section.model_dump() for section in sections],
-                'tasks': [task.model_dump() for task in tasks]
+                'sections': [section.model_dump() for section in self._sections],
+                'tasks': [task.model_dump() for task in self._tasks]
             }
             
-            # Find existing message
-            result = await client.table('messages').select('message_id')\
-                .eq('thread_id', self.thread_id)\
-                .eq('type', self.task_list_message_type)\
-                .order('created_at', desc=True).limit(1).execute()
-            
-            if result.data:
-                # Update existing
-                await client.table('messages').update({'content': content})\
-                    .eq('message_id', result.data[0]['message_id']).execute()
-            else:
-                # Create new
-                await client.table('messages').insert({
-                    'thread_id': self.thread_id,
-                    'type': self.task_list_message_type,
-                    'content': content,
-                    'is_llm_message': False,
-                    'metadata': {}
-                }).execute()
-            
-        except Exception as e:
-            logger.error(f"Error saving data: {e}")
-            raise
+            try:
+                client = await self.thread_manager.db.client
+                if self._message_id:
+                    # Update existing
+                    await client.table('messages').update({'content': content})\
+                        .eq('message_id', self._message_id).execute()
+                else:
+                    # Create new
+                    result = await client.table('messages').insert({
+                        'thread_id': self.thread_id,
+                        'type': self.task_list_message_type,
+                        'content': content,
+                        'is_llm_message': False,
+                        'metadata': {}
+                    }).execute()
+                    if result.data:
+                        self._message_id = result.data[0]['message_id']
+                    await invalidate_thread_summary(self.thread_id)
+                
+            except Exception as e:
+                self._dirty = True
+                logger.error(f"Error saving data: {e}")
+                raise
     
-    def _format_response(self, sections: List[Section], tasks: List[Task]) -> Dict[str, Any]:
+    def _format_response(self, sections: List[Section], tasks: List[Task],
+                         changes: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Format data for response"""
         # Group display tasks by section
         section_map = {s.id: s for s in sections}
@@ -151,9 +232,12 @@ class TaskListTool(SandboxToolsBase):
             "total_tasks": len(tasks),  # Always use original task count
             "total_sections": len(sections)
         }
+        if changes is not None:
+            response["changes"] = changes
         
         return response
 
+    @tool_concurrency(read_only=True, resource="task_list")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -337,9 +421,9 @@ class TaskListTool(SandboxToolsBase):
                     existing_tasks.append(new_task)
                     created_tasks += 1
             
-            await self._save_data(existing_sections, existing_tasks)
+            changes = await self._save_data(existing_sections, existing_tasks)
             
-            response_data = self._format_response(existing_sections, existing_tasks)
+            response_data = self._format_response(existing_sections, existing_tasks, changes)
             
             return ToolResult(success=True, output=json.dumps(response_data, indent=2))
             
@@ -433,9 +517,9 @@ class TaskListTool(SandboxToolsBase):
                 
                 updated_count += 1
             
-            await self._save_data(sections, tasks)
+            changes = await self._save_data(sections, tasks)
             
-            response_data = self._format_response(sections, tasks)
+            response_data = self._format_response(sections, tasks, changes)
             
             return ToolResult(success=True, output=json.dumps(response_data, indent=2))
             
@@ -551,9 +635,9 @@ class TaskListTool(SandboxToolsBase):
                 remaining_tasks = [t for t in remaining_tasks if t.section_id not in section_id_set]
                 deleted_sections = len(sections) - len(remaining_sections)
             
-            await self._save_data(remaining_sections, remaining_tasks)
+            changes = await self._save_data(remaining_sections, remaining_tasks)
             
-            response_data = self._format_response(remaining_sections, remaining_tasks)
+            response_data = self._format_response(remaining_sections, remaining_tasks, changes)
             
             return ToolResult(success=True, output=json.dumps(response_data, indent=2))
             
@@ -588,9 +672,9 @@ class TaskListTool(SandboxToolsBase):
             sections = []
             tasks = []
             
-            await self._save_data(sections, tasks)
+            changes = await self._save_data(sections, tasks)
             
-            response_data = self._format_response(sections, tasks)
+            response_data = self._format_response(sections, tasks, changes)
             
             return ToolResult(success=True, output=json.dumps(response_data, indent=2))
             
@@ -0,0 +1,149 @@
+"""
+Shared HTTP client and response cache for search and scraping tools.
+
+Search tools used to open a new httpx.AsyncClient (and new TCP/TLS
+connections) for every call, and agents repeat the same queries and URLs
+across turns and threads. This module provides:
+
+- get_search_http_client(): one pooled client for all search providers
+- cached_fetch(): a Redis-backed response cache keyed by provider and
+  normalized request, with in-process coalescing so concurrent identical
+  requests (e.g. from parallel tool execution) reach the provider once
+
+Cache failures never fail a request; the provider is called instead.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from core.services import redis
+from core.utils.logger import logger
+
+MAX_CONNECTIONS = int(os.getenv("SEARCH_HTTP_MAX_CONNECTIONS", 50))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SEARCH_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+KEEPALIVE_EXPIRY = float(os.getenv("SEARCH_HTTP_KEEPALIVE_EXPIRY", 60.0))
+DEFAULT_TIMEOUT = 30.0
+
+# Set SEARCH_CACHE_TTL=0 to disable caching
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 60 * 60))
+SCRAPE_CACHE_TTL = int(os.getenv("SCRAPE_CACHE_TTL", 6 * 60 * 60))
+# Larger responses (e.g. scrapes with full HTML) are not cached
+MAX_CACHED_RESPONSE_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", 1024 * 1024))
+CACHE_KEY_PREFIX = "search_cache:"
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_client: Optional[httpx.AsyncClient] = None
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+def get_search_http_client() -> httpx.AsyncClient:
+    """Get the shared pooled HTTP client for search and scraping providers."""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        )
+        _client = httpx.AsyncClient(limits=limits, timeout=DEFAULT_TIMEOUT)
+    return _client
+
+
+def normalize_query(query: str) -> str:
+    """Case and whitespace differences don't change search results."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for cache keys: lowercase scheme and host, no default port or fragment, sorted query."""
+    try:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{parts.port}"
+        path = parts.path or "/"
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        return urlunsplit((scheme, host, path, query, ""))
+    except ValueError:
+        return url.strip()
+
+
+def cache_key(provider: str, request: Any) -> str:
+    digest = hashlib.sha256(json.dumps(request, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return f"{CACHE_KEY_PREFIX}{provider}:{digest}"
+
+
+async def _read_cache(key: str) -> Optional[Any]:
+    try:
+        raw = await redis.get(key)
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        logger.warning(f"Failed to read search cache {key}: {e}")
+        return None
+
+
+async def _write_cache(key: str, value: Any, ttl: int) -> None:
+    try:
+        payload = json.dumps(value, ensure_ascii=False)
+        if len(payload) > MAX_CACHED_RESPONSE_BYTES:
+            return
+        await redis.set(key, payload, ex=ttl)
+    except Exception as e:
+        logger.warning(f"Failed to write search cache {key}: {e}")
+
+
+async def cached_fetch(
+    provider: str,
+    request: Any,
+    fetch: Callable[[], Awaitable[Any]],
+    ttl: int = SEARCH_CACHE_TTL,
+    cache_if: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """Get a provider response from the cache, or fetch and cache it.
+
+    Args:
+        provider: Cache namespace, e.g. "tavily" or "firecrawl"
+        request: JSON-serializable request identity; normalize queries and URLs first
+        fetch: Calls the provider; errors propagate and are never cached
+        ttl: Cache lifetime in seconds; 0 disables caching (coalescing still applies)
+        cache_if: Decides whether a successful response may be cached, e.g. not when empty
+    """
+    key = cache_key(provider, request)
+
+    pending = _in_flight.get(key)
+    if pending is not None:
+        logger.debug(f"Joining in-flight {provider} request")
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        cached = await _read_cache(key) if ttl > 0 else None
+        if cached is not None:
+            logger.debug(f"{provider} response served from cache")
+            result = cached
+        else:
+            result = await fetch()
+            if ttl > 0 and (cache_if is None or cache_if(result)):
+                await _write_cache(key, result, ttl)
+        future.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Waiters see the error; mark it retrieved so it isn't logged again when nobody waited
+        future.exception()
+        raise
+    finally:
+        _in_flight.pop(key, None)
@@ -1,10 +1,13 @@
 from tavily import AsyncTavilyClient
 import httpx
 from dotenv import load_dotenv
-from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata, tool_concurrency
 from core.utils.config import config
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
+from core.tools.utils.search_cache import (
+    SCRAPE_CACHE_TTL, cached_fetch, get_search_http_client, normalize_query, normalize_url
+)
 import json
 import datetime
 import asyncio
@@ -40,6 +43,7 @@ class SandboxWebSearchTool(SandboxToolsBase):
         # Tavily asynchronous search client
         self.tavily_client = AsyncTavilyClient(api_key=self.tavily_api_key)
 
+    @tool_concurrency(read_only=True)
     @openapi_schema({
         "type": "function",
         "function": {
@@ -94,12 +98,17 @@ class SandboxWebSearchTool(SandboxToolsBase):
 
             # Execute the search with Tavily
             logging.info(f"Executing web search for query: '{query}' with {num_results} results")
-            search_response = await self.tavily_client.search(
-                query=query,
-                max_results=num_results,
-                include_images=True,
-                include_answer="advanced",
-                search_depth="advanced",
+            search_response = await cached_fetch(
+                "tavily",
+                {"query": normalize_query(query), "max_results": num_results},
+                lambda: self.tavily_client.search(
+                    query=query,
+                    max_results=num_results,
+                    include_images=True,
+                    include_answer="advanced",
+                    search_depth="advanced",
+                ),
+                cache_if=lambda response: bool(response.get('results') or (response.get('answer') or '').strip()),
             )
             
             # Check if we have actual results or an answer
@@ -268,21 +277,22 @@ class SandboxWebSearchTool(SandboxToolsBase):
         try:
             # ---------- Firecrawl scrape endpoint ----------
             logging.info(f"Sending request to Firecrawl for URL: {url}")
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"Bearer {self.firecrawl_api_key}",
-                    "Content-Type": "application/json",
-                }
-                # Determine formats to request based on include_html flag
-                formats = ["markdown"]
-                if include_html:
-                    formats.append("html")
-                
-                payload = {
-                    "url": url,
-                    "formats": formats
-                }
-                
+            client = get_search_http_client()
+            headers = {
+                "Authorization": f"Bearer {self.firecrawl_api_key}",
+                "Content-Type": "application/json",
+            }
+            # Determine formats to request based on include_html flag
+            formats = ["markdown"]
+            if include_html:
+                formats.append("html")
+            
+            payload = {
+                "url": url,
+                "formats": formats
+            }
+            
+            async def _scrape() -> dict:
                 # Use longer timeout and retry logic for more reliability
                 max_retries = 3
                 timeout_seconds = 30
@@ -300,7 +310,7 @@ class SandboxWebSearchTool(SandboxToolsBase):
                         response.raise_for_status()
                         data = response.json()
                         logging.info(f"Successfully received response from Firecrawl for {url}")
-                        break
+                        return data
                     except (httpx.ReadTimeout, httpx.ConnectTimeout, httpx.ReadError) as timeout_err:
                         retry_count += 1
                         logging.warning(f"Request timed out (attempt {retry_count}/{max_retries}): {str(timeout_err)}")
@@ -313,6 +323,14 @@ class SandboxWebSearchTool(SandboxToolsBase):
                         # Don't retry on non-timeout errors
                         logging.error(f"Error during scraping: {str(e)}")
                         raise e
+            
+            data = await cached_fetch(
+                "firecrawl",
+                {"url": normalize_url(url), "formats": formats},
+                _scrape,
+                ttl=SCRAPE_CACHE_TTL,
+                cache_if=lambda data: bool(data.get("data", {}).get("markdown")),
+            )
 
             # Format the response
             title = data.get("data", {}).get("metadata", {}).get("title", "")
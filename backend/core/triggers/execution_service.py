@@ -5,6 +5,7 @@ from typing import Dict, Any, Tuple, Optional
 
 from core.services.supabase import DBConnection
 from core.services import redis
+from core.utils.cache import invalidate_thread_summary
 from core.utils.logger import logger, structlog
 from core.utils.config import config, EnvMode
 from run_agent_background import run_agent_background
@@ -86,10 +87,10 @@ class SessionManager:
         client = await self._db.client
         
         try:
-            from core.sandbox.sandbox import create_sandbox, delete_sandbox
+            from core.sandbox.sandbox import delete_sandbox
+            from core.sandbox.pool import create_project_sandbox
             
-            sandbox_pass = str(uuid.uuid4())
-            sandbox = await create_sandbox(sandbox_pass, project_id)
+            sandbox, sandbox_pass = await create_project_sandbox(project_id)
             sandbox_id = sandbox.id
             
             vnc_link = await sandbox.get_preview_link(6080)
@@ -356,6 +357,7 @@ class AgentExecutor:
         }).execute()
         
         agent_run_id = agent_run.data[0]['id']
+        await invalidate_thread_summary(thread_id)
         
         await self._register_agent_run(agent_run_id)
         
@@ -1,6 +1,9 @@
 import json
 from typing import Any
 from core.services.redis import get_client
+from core.utils.logger import logger
+
+THREAD_SUMMARY_TTL = 30
 
 
 class _cache:
@@ -24,3 +27,26 @@ class _cache:
 
 
 Cache = _cache()
+
+
+# Thread detail summaries; invalidated on message inserts and agent run status changes
+async def get_cached_thread_summary(thread_id: str):
+    try:
+        return await Cache.get(f"thread_summary:{thread_id}")
+    except Exception as e:
+        logger.warning(f"Failed to read thread summary cache for {thread_id}: {e}")
+        return None
+
+
+async def cache_thread_summary(thread_id: str, summary: Any):
+    try:
+        await Cache.set(f"thread_summary:{thread_id}", summary, ttl=THREAD_SUMMARY_TTL)
+    except Exception as e:
+        logger.warning(f"Failed to cache thread summary for {thread_id}: {e}")
+
+
+async def invalidate_thread_summary(thread_id: str):
+    try:
+        await Cache.invalidate(f"thread_summary:{thread_id}")
+    except Exception as e:
+        logger.warning(f"Failed to invalidate thread summary for {thread_id}: {e}")
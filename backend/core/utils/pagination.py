@@ -1,11 +1,15 @@
-from typing import List, Dict, Any, Optional, TypeVar, Generic, Callable, Awaitable
+from typing import List, Dict, Any, Optional, TypeVar, Generic, Callable, Awaitable, Tuple, Literal
 from pydantic import BaseModel
 from dataclasses import dataclass
 from core.utils.logger import logger
+from datetime import datetime
 import math
+import uuid
 
 T = TypeVar('T')
 
+CountMode = Literal['exact', 'estimated', 'none']
+
 class PaginationMeta(BaseModel):
     current_page: int
     page_size: int
@@ -182,4 +186,75 @@ class PaginationService:
             return json.loads(cursor_json)
         except Exception as e:
             logger.warning(f"Failed to parse cursor: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def create_keyset_cursor(item: Dict[str, Any], id_field: str, sort_field: str = 'created_at') -> str:
+        """Create a cursor pointing just past the given row in a (sort_field, id_field) ordering."""
+        return PaginationService.create_cursor(str(item[id_field]), sort_field, item[sort_field])
+
+    @staticmethod
+    def apply_keyset(
+        query: Any,
+        cursor: Optional[str],
+        id_field: str,
+        sort_field: str = 'created_at',
+        descending: bool = True
+    ) -> Any:
+        """
+        Order a query by (sort_field, id_field) and, given a cursor, keep only rows after it.
+        Unlike offsets, the cost of a page does not grow with its depth.
+        """
+        query = query.order(sort_field, desc=descending).order(id_field, desc=descending)
+        if not cursor:
+            return query
+        
+        cursor_data = PaginationService.parse_cursor(cursor)
+        if not isinstance(cursor_data, dict) or cursor_data.get('sort_field') != sort_field:
+            raise ValueError("Invalid pagination cursor")
+        # Both values are interpolated into the filter, so only a UUID and a timestamp are accepted
+        try:
+            item_id = str(uuid.UUID(str(cursor_data.get('id'))))
+            sort_value = datetime.fromisoformat(str(cursor_data.get('sort_value'))).isoformat()
+        except ValueError:
+            raise ValueError("Invalid pagination cursor")
+        
+        op = 'lt' if descending else 'gt'
+        return query.or_(
+            f'{sort_field}.{op}."{sort_value}",and({sort_field}.eq."{sort_value}",{id_field}.{op}.{item_id})'
+        )
+
+    @staticmethod
+    async def fetch_keyset_page(
+        query: Any,
+        limit: int,
+        cursor: Optional[str],
+        id_field: str,
+        sort_field: str = 'created_at',
+        descending: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Fetch one keyset page. The query must select id_field and sort_field.
+
+        Returns:
+            Tuple of (items, next_cursor); next_cursor is None on the last page
+        """
+        query = PaginationService.apply_keyset(query, cursor, id_field, sort_field, descending)
+        result = await query.limit(limit + 1).execute()
+        items = result.data or []
+        
+        if len(items) > limit:
+            items = items[:limit]
+            return items, PaginationService.create_keyset_cursor(items[-1], id_field, sort_field)
+        return items, None
+
+    @staticmethod
+    async def count_rows(query: Any, mode: CountMode = 'exact') -> Optional[int]:
+        """
+        Count rows for a `select(..., count=mode, head=True)` query.
+        'estimated' uses the planner's estimate for large results; 'none' skips counting.
+        """
+        if mode == 'none':
+            return None
+        result = await query.execute()
+        return result.count if result.count is not None else 0
@@ -0,0 +1,131 @@
+"""
+Token-bucket rate limiting for calls to external APIs.
+
+Limiters are shared by name across the process, so every tool instance and
+agent run on a worker draws from the same budget instead of each retrying
+into 429s on its own. With shared=True the bucket lives in Redis and is
+shared by all workers; if Redis is unavailable the limiter falls back to the
+process-local bucket.
+
+A 429 from the provider should be reported with penalize(), which pauses all
+callers of the limiter for the Retry-After period.
+"""
+
+import asyncio
+import time
+from typing import Dict
+
+from core.services import redis
+from core.utils.logger import logger
+
+KEY_PREFIX = "rate_limit:"
+
+# Refills the bucket from the time elapsed since the last call, then takes a
+# token; returns 0 when granted, else the milliseconds until one is available.
+# Uses the Redis server clock so workers on different hosts agree.
+TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now_time = redis.call('TIME')
+local now = now_time[1] * 1000 + math.floor(now_time[2] / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'paused_until')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+local paused_until = tonumber(state[3]) or 0
+if paused_until > now then
+    return paused_until - now
+end
+
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 60000)
+return wait
+"""
+
+PAUSE_SCRIPT = """
+local now_time = redis.call('TIME')
+local now = now_time[1] * 1000 + math.floor(now_time[2] / 1000)
+local until_ms = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('HGET', KEYS[1], 'paused_until')) or 0
+if until_ms > current then
+    redis.call('HSET', KEYS[1], 'paused_until', until_ms)
+end
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[1]) + 60000)
+return until_ms
+"""
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, name: str, rate: float, capacity: float = 1.0, shared: bool = False):
+        self.name = name
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.shared = shared
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a call may be made."""
+        if self.shared:
+            try:
+                await self._acquire_shared()
+                return
+            except Exception as e:
+                logger.warning(f"Shared rate limiter {self.name} unavailable, using local bucket: {e}")
+        await self._acquire_local()
+
+    async def _acquire_local(self) -> None:
+        # The lock makes waiters take tokens in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self._paused_until > now:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def _acquire_shared(self) -> None:
+        client = await redis.get_client()
+        while True:
+            wait_ms = await client.eval(TAKE_TOKEN_SCRIPT, 1, f"{KEY_PREFIX}{self.name}", self.rate, self.capacity)
+            if not wait_ms:
+                return
+            await asyncio.sleep(int(wait_ms) / 1000)
+
+    async def penalize(self, seconds: float) -> None:
+        """Pause all callers for `seconds`, e.g. after a 429 with Retry-After."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        if self.shared:
+            try:
+                client = await redis.get_client()
+                await client.eval(PAUSE_SCRIPT, 1, f"{KEY_PREFIX}{self.name}", int(seconds * 1000))
+            except Exception as e:
+                logger.warning(f"Failed to pause shared rate limiter {self.name}: {e}")
+
+
+_limiters: Dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(name: str, rate: float, capacity: float = 1.0, shared: bool = False) -> TokenBucket:
+    """Get the process-wide limiter for an API, creating it on first use."""
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limiter = TokenBucket(name, rate, capacity, shared)
+        _limiters[name] = limiter
+    return limiter
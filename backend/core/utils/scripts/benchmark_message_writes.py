@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Count database round trips for the messages written during one agent turn,
+with and without the batched MessageWriter.
+
+The turn mirrors what ResponseProcessor saves for parallel tool calls:
+llm_response_start, the assistant message, tool_started / tool result /
+tool_completed for each tool, the finish status and llm_response_end.
+Inserts go to an in-memory client that sleeps for the given latency, so no
+database is needed.
+
+Usage:
+    python -m core.utils.scripts.benchmark_message_writes [--tools 10] [--latency-ms 15]
+"""
+
+import argparse
+import asyncio
+import time
+
+from core.agentpress.message_writer import MessageWriter
+
+
+class _RecordingQuery:
+    def __init__(self, client, rows):
+        self.client = client
+        self.rows = rows if isinstance(rows, list) else [rows]
+
+    async def execute(self):
+        await asyncio.sleep(self.client.latency)
+        self.client.round_trips += 1
+        self.client.rows_written += len(self.rows)
+        return type("Result", (), {"data": [dict(row) for row in self.rows]})()
+
+
+class _RecordingTable:
+    def __init__(self, client):
+        self.client = client
+
+    def insert(self, rows):
+        return _RecordingQuery(self.client, rows)
+
+
+class _RecordingClient:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.round_trips = 0
+        self.rows_written = 0
+
+    def table(self, name):
+        return _RecordingTable(self)
+
+
+class _RecordingDB:
+    def __init__(self, latency: float):
+        self._client = _RecordingClient(latency)
+
+    @property
+    async def client(self):
+        return self._client
+
+
+async def simulate_turn(writer: MessageWriter, tools: int) -> None:
+    thread_id = "00000000-0000-0000-0000-000000000000"
+
+    def row(type, is_llm_message=False, **content):
+        return {'thread_id': thread_id, 'type': type, 'content': content,
+                'is_llm_message': is_llm_message, 'metadata': {}}
+
+    await writer.write(row('llm_response_start', llm_response_id='bench'))
+    assistant = await writer.write(row('assistant', True, role='assistant', content='...'))
+
+    async def run_tool(index: int):
+        await writer.write(row('status', status_type='tool_started', tool_index=index))
+        tool_result = await writer.write(row('tool', True, role='user', content='result'))
+        await writer.write(row('status', status_type='tool_completed', tool_index=index,
+                               linked_tool_result_message_id=tool_result['message_id'],
+                               assistant_message_id=assistant['message_id']))
+
+    await asyncio.gather(*(run_tool(i) for i in range(tools)))
+    await writer.write(row('status', status_type='finish', finish_reason='xml_tool_limit_reached'))
+    await writer.write(row('llm_response_end', llm_response_id='bench'))
+    await writer.close()
+
+
+async def measure(batching: bool, tools: int, latency: float):
+    db = _RecordingDB(latency)
+    writer = MessageWriter(db, batching=batching)
+    start = time.monotonic()
+    await simulate_turn(writer, tools)
+    client = await db.client
+    return client.round_trips, client.rows_written, time.monotonic() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark message write round trips per agent turn")
+    parser.add_argument("--tools", type=int, default=10, help="Parallel tool calls in the turn")
+    parser.add_argument("--latency-ms", type=float, default=15.0, help="Simulated latency per insert")
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    for label, batching in (("unbatched", False), ("batched", True)):
+        round_trips, rows, elapsed = await measure(batching, args.tools, latency)
+        print(f"{label:>10}: {rows} messages, {round_trips} round trips, {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Exercise the warm sandbox pool against an in-memory fake Daytona backend.
+
+Fills a pool, then lets concurrent "projects" take sandboxes from it and
+checks that every project gets a distinct, started, labelled sandbox and that
+projects beyond the pool size fall back to a cold create. Sandbox creation and
+service start-up are simulated with sleeps, so no Daytona account or Redis is
+needed.
+
+Usage:
+    python -m core.utils.scripts.simulate_sandbox_pool [--pool-size 3] [--projects 5]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from daytona_sdk import SandboxState
+
+from core.sandbox.pool import MemoryPoolStore, SandboxPool
+
+
+class _FakeResponse:
+    def __init__(self, exit_code: int, result: str = ""):
+        self.exit_code = exit_code
+        self.result = result
+
+
+class _FakeProcess:
+    def __init__(self, sandbox: "_FakeSandbox"):
+        self.sandbox = sandbox
+
+    async def create_session(self, session_id):
+        pass
+
+    async def execute_session_command(self, session_id, request):
+        # supervisord brings the services up a little later
+        self.sandbox.ready_at = time.monotonic() + self.sandbox.backend.startup_delay
+
+    async def exec(self, command, timeout=None):
+        # The readiness probe loops inside the sandbox until services respond
+        wait = self.sandbox.ready_at - time.monotonic()
+        if wait > (timeout or 0):
+            await asyncio.sleep(timeout)
+            return _FakeResponse(1)
+        await asyncio.sleep(max(0.0, wait))
+        return _FakeResponse(0)
+
+
+class _FakeSandbox:
+    def __init__(self, backend: "_FakeDaytona"):
+        self.backend = backend
+        self.id = str(uuid.uuid4())
+        self.state = SandboxState.STARTED
+        self.labels = {}
+        self.ready_at = float("inf")
+        self.process = _FakeProcess(self)
+
+    async def set_labels(self, labels):
+        self.labels = labels
+
+
+class _FakeDaytona:
+    def __init__(self, create_delay: float, startup_delay: float):
+        self.create_delay = create_delay
+        self.startup_delay = startup_delay
+        self.sandboxes = {}
+        self.created = 0
+
+    async def create(self, params):
+        await asyncio.sleep(self.create_delay)
+        sandbox = _FakeSandbox(self)
+        self.sandboxes[sandbox.id] = sandbox
+        self.created += 1
+        return sandbox
+
+    async def get(self, sandbox_id):
+        return self.sandboxes[sandbox_id]
+
+    async def delete(self, sandbox):
+        self.sandboxes.pop(sandbox.id, None)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Simulate the warm sandbox pool with a fake Daytona backend")
+    parser.add_argument("--pool-size", type=int, default=3)
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--create-delay", type=float, default=0.5, help="Simulated sandbox create time (s)")
+    parser.add_argument("--startup-delay", type=float, default=1.0, help="Simulated service start-up time (s)")
+    args = parser.parse_args()
+
+    backend = _FakeDaytona(args.create_delay, args.startup_delay)
+    pool = SandboxPool(client=backend, store=MemoryPoolStore(), size=args.pool_size, snapshot="fake")
+
+    start = time.monotonic()
+    added = await pool.refill()
+    print(f"Filled pool with {added} sandboxes in {time.monotonic() - start:.2f}s")
+
+    async def new_project(index: int):
+        project_id = f"project-{index}"
+        start = time.monotonic()
+        pooled = await pool.acquire(project_id)
+        elapsed = time.monotonic() - start
+        if pooled:
+            assert pooled.sandbox.labels == {'id': project_id}
+            assert pooled.sandbox.state == SandboxState.STARTED
+            return pooled.sandbox.id, elapsed
+        return None, elapsed
+
+    results = await asyncio.gather(*(new_project(i) for i in range(args.projects)))
+    assigned = [sandbox_id for sandbox_id, _ in results if sandbox_id]
+    assert len(assigned) == len(set(assigned)), "a pooled sandbox was handed out twice"
+
+    for index, (sandbox_id, elapsed) in enumerate(results):
+        source = f"pooled {sandbox_id[:8]}" if sandbox_id else "pool empty, cold create"
+        print(f"project-{index}: {source} ({elapsed * 1000:.0f} ms)")
+
+    if pool._refill_task:
+        await pool._refill_task
+    print(f"Pool refilled to {await pool.store.size('fake')} sandboxes; {backend.created} created in total")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
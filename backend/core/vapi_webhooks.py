@@ -4,11 +4,16 @@ from core.utils.logger import logger
 from core.services.supabase import DBConnection
 from core.billing.config import TOKEN_PRICE_MULTIPLIER
 from core.vapi_config import vapi_config
+from core.services import redis
+from core.utils.cache import invalidate_thread_summary
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import json
 import hmac
 import hashlib
 
+TRANSCRIPT_HWM_KEY_PREFIX = "vapi_transcript_hwm:"
+
 class VapiWebhookHandler:
 
     def __init__(self):
@@ -96,8 +101,6 @@ class VapiWebhookHandler:
             raise HTTPException(status_code=500, detail=str(e))
     
     async def _handle_conversation_update(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        from core.agentpress.thread_manager import ThreadManager
-        
         call_id = self._extract_call_id(payload)
         call = self._extract_call_data(payload)
         
@@ -115,24 +118,18 @@ class VapiWebhookHandler:
         
         status = "in-progress" if transcript_data else call.get("status", "in-progress")
         
-        update_data = {
-            "transcript": transcript_data,
-            "status": status,
-            "updated_at": "now()"
-        }
+        # Every update carries the whole conversation; only lines past the high-water mark are new
+        high_water = await self._get_transcript_high_water(call_id)
+        if high_water is not None and high_water >= len(transcript_data):
+            return {"status": "success"}
         
         try:
-            result = await client.table("vapi_calls")\
-                .select("*")\
-                .eq("call_id", call_id)\
-                .execute()
+            append = await self._append_transcript(client, call_id, transcript_data, high_water or 0, status)
+            if append.get("found") and append["appended_from"] < (high_water or 0):
+                # Stale high-water mark; resync from the stored length and retry once
+                append = await self._append_transcript(client, call_id, transcript_data, append["appended_from"], status)
             
-            if result.data:
-                await client.table("vapi_calls")\
-                    .update(update_data)\
-                    .eq("call_id", call_id)\
-                    .execute()
-            else:
+            if not append.get("found"):
                 new_call = {
                     "call_id": call_id,
                     "phone_number": call.get("customer", {}).get("number"),
@@ -142,16 +139,46 @@ class VapiWebhookHandler:
                     "started_at": call.get("createdAt")
                 }
                 await client.table("vapi_calls").insert(new_call).execute()
+                append = {"thread_id": None, "length": len(transcript_data), "appended_from": 0, "appended": len(transcript_data)}
         
         except Exception as e:
             logger.error(f"Database operation failed for call {call_id}: {e}")
             return {"status": "error", "message": str(e)}
         
-        if transcript_data:
-            await self._stream_transcript_to_thread(call_id, transcript_data)
+        await self._set_transcript_high_water(call_id, append["length"])
+        
+        if append["appended"] and append.get("thread_id"):
+            start = append["appended_from"]
+            await self._stream_transcript_to_thread(
+                call_id, append["thread_id"], start, transcript_data[start:start + append["appended"]]
+            )
         
         return {"status": "success"}
     
+    async def _append_transcript(self, client, call_id: str, transcript_data: List[Dict[str, Any]],
+                                 from_index: int, status: str) -> Dict[str, Any]:
+        result = await client.rpc("append_vapi_call_transcript", {
+            "p_call_id": call_id,
+            "p_lines": transcript_data[from_index:],
+            "p_from_index": from_index,
+            "p_status": status
+        }).execute()
+        return result.data or {"found": False}
+    
+    async def _get_transcript_high_water(self, call_id: str) -> Optional[int]:
+        try:
+            value = await redis.get(f"{TRANSCRIPT_HWM_KEY_PREFIX}{call_id}")
+            return int(value) if value is not None else None
+        except Exception as e:
+            logger.warning(f"Failed to read transcript high-water mark for call {call_id}: {e}")
+            return None
+    
+    async def _set_transcript_high_water(self, call_id: str, length: int) -> None:
+        try:
+            await redis.set(f"{TRANSCRIPT_HWM_KEY_PREFIX}{call_id}", str(length), ex=redis.REDIS_KEY_TTL)
+        except Exception as e:
+            logger.warning(f"Failed to store transcript high-water mark for call {call_id}: {e}")
+    
     def _process_messages(self, messages: List[Dict]) -> List[Dict]:
         transcript = []
         for msg in messages:
@@ -467,54 +494,48 @@ class VapiWebhookHandler:
             logger.error(f"Error getting user_id for thread {thread_id}: {e}")
             return None
     
-    async def _stream_transcript_to_thread(self, call_id: str, transcript_data: List[Dict[str, Any]]) -> None:
-        try:
-            thread_id = await self._get_thread_id_for_call(call_id)
-            if not thread_id:
-                return
-            
-            client = await self.db.client
-            existing_result = await client.table("messages").select("metadata").eq("thread_id", thread_id).execute()
+    async def _stream_transcript_to_thread(self, call_id: str, thread_id: str, start_index: int,
+                                           new_lines: List[Dict[str, Any]]) -> None:
+        """Mirror newly appended transcript lines into the thread with a single insert."""
+        # Rows of one multi-row insert would share a created_at; offset them to keep the order
+        batch_time = datetime.now(timezone.utc)
+        rows = []
+        for offset, msg in enumerate(new_lines):
+            role = msg.get("role", "")
+            message_text = msg.get("message", "")
             
-            existing_indices = set()
-            if existing_result.data:
-                for msg in existing_result.data:
-                    metadata = msg.get("metadata", {})
-                    if (metadata.get("call_id") == call_id and 
-                        metadata.get("message_index") is not None):
-                        existing_indices.add(metadata["message_index"])
+            if not message_text.strip() or role == "system":
+                continue
             
-            from core.agentpress.thread_manager import ThreadManager
-            thread_manager = ThreadManager()
+            formatted_content = (
+                f"🤖 **AI Assistant**: {message_text}"
+                if role == "assistant"
+                else f"👤 **Caller**: {message_text}"
+            )
             
-            for idx, msg in enumerate(transcript_data):
-                if idx not in existing_indices:
-                    role = msg.get("role", "")
-                    message_text = msg.get("message", "")
-                    
-                    if not message_text.strip() or role == "system":
-                        continue
-                    
-                    formatted_content = (
-                        f"🤖 **AI Assistant**: {message_text}"
-                        if role == "assistant"
-                        else f"👤 **Caller**: {message_text}"
-                    )
-                    
-                    await thread_manager.add_message(
-                        thread_id=thread_id,
-                        type="assistant",
-                        content=formatted_content,
-                        is_llm_message=False,
-                        metadata={
-                            "call_id": call_id,
-                            "message_index": idx,
-                            "role": role,
-                            "timestamp": msg.get("timestamp"),
-                            "is_realtime_transcript": True,
-                            "source": "vapi_webhook"
-                        }
-                    )
+            rows.append({
+                "thread_id": thread_id,
+                "type": "assistant",
+                "content": formatted_content,
+                "is_llm_message": False,
+                "created_at": (batch_time + timedelta(microseconds=len(rows))).isoformat(),
+                "metadata": {
+                    "call_id": call_id,
+                    "message_index": start_index + offset,
+                    "role": role,
+                    "timestamp": msg.get("timestamp"),
+                    "is_realtime_transcript": True,
+                    "source": "vapi_webhook"
+                }
+            })
+        
+        if not rows:
+            return
+        
+        try:
+            client = await self.db.client
+            await client.table("messages").insert(rows).execute()
+            await invalidate_thread_summary(thread_id)
         except Exception as e:
             logger.error(f"Failed to stream transcript to thread: {e}")
     
@@ -0,0 +1,35 @@
+"""
+Gunicorn server hooks for the API (loaded with -c in the Dockerfile).
+
+The API runs several workers, so Prometheus samples are aggregated through
+PROMETHEUS_MULTIPROC_DIR: the directory is emptied when the server starts,
+the master serves the aggregate on API_METRICS_PORT (an internal port, not
+the public API port), and the samples of exited workers are marked dead.
+"""
+
+import glob
+import os
+
+
+def on_starting(server):
+    # Runs once per server start (not on reload), before any worker is forked
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.remove(path)
+
+
+def when_ready(server):
+    from core.services import metrics
+
+    if not metrics.MULTIPROC_DIR:
+        server.log.warning("PROMETHEUS_MULTIPROC_DIR is not set; API metrics are not exported")
+        return
+    metrics.start_metrics_server(metrics.API_METRICS_PORT)
+
+
+def child_exit(server, worker):
+    from core.services import metrics
+
+    metrics.mark_process_dead(worker.pid)
@@ -18,7 +18,10 @@ from core.services import redis
 from dramatiq.brokers.redis import RedisBroker
 import os
 from core.services.langfuse import langfuse
+from core.services import llm_transport
+from core.services import metrics
 from core.utils.retry import retry
+from core.utils.cache import invalidate_thread_summary
 
 import sentry_sdk
 from typing import Dict, Any
@@ -29,6 +32,19 @@ redis_port = int(os.getenv('REDIS_PORT', 6379))
 logger.info(f"🔧 Configuring Dramatiq broker with Redis at {redis_host}:{redis_port}")
 redis_broker = RedisBroker(host=redis_host, port=redis_port, middleware=[dramatiq.middleware.AsyncIO()])
 
+
+class WorkerMetricsMiddleware(dramatiq.Middleware):
+    """Expose /metrics from worker processes (not from the API, which only enqueues)."""
+
+    def after_process_boot(self, broker):
+        metrics.start_metrics_server(metrics.WORKER_METRICS_PORT)
+
+    def after_worker_shutdown(self, broker, worker):
+        metrics.mark_process_dead(os.getpid())
+
+
+redis_broker.add_middleware(WorkerMetricsMiddleware())
+
 dramatiq.set_broker(redis_broker)
 
 _initialized = False
@@ -49,6 +65,11 @@ async def initialize():
     await retry(lambda: redis.initialize_async())
     await db.initialize()
 
+    try:
+        await llm_transport.warm_up()
+    except Exception as e:
+        logger.warning(f"LLM connection warmup failed: {e}")
+
     _initialized = True
     logger.info(f"✅ Worker initialized successfully with instance ID: {instance_id}")
 
@@ -58,6 +79,26 @@ async def check_health(key: str):
     structlog.contextvars.clear_contextvars()
     await redis.set(key, "healthy", ex=redis.REDIS_KEY_TTL)
 
+@dramatiq.actor(max_retries=3, min_backoff=30 * 1000, max_backoff=10 * 60 * 1000, time_limit=15 * 60 * 1000)
+async def process_kb_entry_background(entry_id: str):
+    """Extract, summarise and index an uploaded knowledge base file.
+
+    Failed entries are retried with exponential backoff; they stay 'failed'
+    with the last error once the retries are exhausted.
+    """
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(kb_entry_id=entry_id)
+
+    await initialize()
+
+    from core.knowledge_base.file_processor import FileProcessor
+    result = await FileProcessor().process_entry(entry_id)
+    if not result.get('success'):
+        logger.warning(f"Knowledge base entry {entry_id} processing failed: {result.get('error')}")
+        if result.get('retryable'):
+            # Let the Retries middleware schedule another attempt
+            raise RuntimeError(f"Knowledge base entry {entry_id} processing failed: {result.get('error')}")
+
 @dramatiq.actor
 async def run_agent_background(
     agent_run_id: str,
@@ -116,6 +157,7 @@ async def run_agent_background(
     total_responses = 0
     pubsub = None
     stop_checker = None
+    agent_gen = None
     stop_signal_received = False
     
     # Create cancellation event to signal LLM to stop
@@ -211,6 +253,9 @@ async def run_agent_background(
                          logger.error(f"Agent run failed: {error_message}")
                      break
 
+        # Closing the generator flushes buffered status messages before the run is marked done
+        await agent_gen.aclose()
+
         # If loop finished without explicit completion/error/stop signal, mark as completed
         if final_status == "running":
              final_status = "completed"
@@ -264,6 +309,10 @@ async def run_agent_background(
             logger.warning(f"Failed to publish ERROR signal: {str(e)}")
 
     finally:
+        if agent_gen:
+            try: await agent_gen.aclose()
+            except Exception as e: logger.warning(f"Error closing agent generator for {agent_run_id}: {e}")
+
         # Cleanup stop checker task
         if stop_checker and not stop_checker.done():
             stop_checker.cancel()
@@ -357,6 +406,9 @@ async def update_agent_run_status(
                 update_result = await client.table('agent_runs').update(update_data).eq("id", agent_run_id).execute()
 
                 if hasattr(update_result, 'data') and update_result.data:
+                    run_thread_id = update_result.data[0].get('thread_id')
+                    if run_thread_id:
+                        await invalidate_thread_summary(run_thread_id)
                     # logger.debug(f"Successfully updated agent run {agent_run_id} status to '{status}' (retry {retry})")
 
                     # Verify the update
@@ -0,0 +1,33 @@
+BEGIN;
+
+-- Passages extracted from knowledge base files, used for retrieval at prompt time
+CREATE TABLE IF NOT EXISTS knowledge_base_entry_chunks (
+    chunk_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    entry_id UUID NOT NULL REFERENCES knowledge_base_entries(entry_id) ON DELETE CASCADE,
+    account_id UUID NOT NULL REFERENCES basejump.accounts(id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    token_count INTEGER NOT NULL DEFAULT 0,
+    -- Optional embedding vector (JSON array of floats), only set when an embedding model is configured
+    embedding JSONB,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+
+    UNIQUE(entry_id, chunk_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_kb_entry_chunks_entry_id ON knowledge_base_entry_chunks(entry_id);
+
+ALTER TABLE knowledge_base_entry_chunks ENABLE ROW LEVEL SECURITY;
+
+DO $$ BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_policies WHERE policyname = 'kb_entry_chunks_account_access' AND tablename = 'knowledge_base_entry_chunks') THEN
+        CREATE POLICY kb_entry_chunks_account_access ON knowledge_base_entry_chunks
+            FOR ALL USING (basejump.has_role_on_account(account_id) = true);
+    END IF;
+END $$;
+
+GRANT ALL ON knowledge_base_entry_chunks TO authenticated, service_role;
+
+COMMENT ON TABLE knowledge_base_entry_chunks IS 'Retrieval passages for knowledge base entries, built by the file processor';
+
+COMMIT;
@@ -0,0 +1,11 @@
+ALTER TABLE knowledge_base_entries
+ADD COLUMN IF NOT EXISTS processing_status VARCHAR(20) NOT NULL DEFAULT 'completed'
+    CHECK (processing_status IN ('pending', 'processing', 'completed', 'failed')),
+ADD COLUMN IF NOT EXISTS processing_error TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_kb_entries_processing_status
+ON knowledge_base_entries(processing_status)
+WHERE processing_status <> 'completed';
+
+COMMENT ON COLUMN knowledge_base_entries.processing_status IS 'Background extraction/summarisation state of the uploaded file';
+COMMENT ON COLUMN knowledge_base_entries.processing_error IS 'Error from the last failed processing attempt';
@@ -0,0 +1,74 @@
+-- Append-only transcript ingestion for Vapi conversation updates.
+-- Appends the lines of p_lines that are not yet stored (p_lines starts at transcript
+-- index p_from_index) and reports which range was appended, so concurrent webhooks
+-- never write the same line twice and callers only mirror newly appended lines.
+CREATE OR REPLACE FUNCTION append_vapi_call_transcript(
+    p_call_id TEXT,
+    p_lines JSONB,
+    p_from_index INTEGER,
+    p_status TEXT DEFAULT 'in-progress'
+) RETURNS JSONB
+SECURITY DEFINER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_transcript JSONB;
+    v_thread_id UUID;
+    v_length INTEGER;
+    v_skip INTEGER;
+    v_new_lines JSONB;
+BEGIN
+    SELECT COALESCE(transcript, '[]'::jsonb), thread_id
+    INTO v_transcript, v_thread_id
+    FROM public.vapi_calls
+    WHERE call_id = p_call_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('found', false);
+    END IF;
+
+    IF jsonb_typeof(v_transcript) <> 'array' THEN
+        v_transcript := '[]'::jsonb;
+    END IF;
+
+    v_length := jsonb_array_length(v_transcript);
+
+    -- The caller's high-water mark is ahead of what is stored; let it resync
+    IF p_from_index > v_length THEN
+        RETURN jsonb_build_object(
+            'found', true,
+            'thread_id', v_thread_id,
+            'length', v_length,
+            'appended_from', v_length,
+            'appended', 0
+        );
+    END IF;
+
+    v_skip := v_length - p_from_index;
+
+    SELECT COALESCE(jsonb_agg(line ORDER BY idx), '[]'::jsonb)
+    INTO v_new_lines
+    FROM jsonb_array_elements(p_lines) WITH ORDINALITY AS t(line, idx)
+    WHERE idx > v_skip;
+
+    IF jsonb_array_length(v_new_lines) > 0 THEN
+        UPDATE public.vapi_calls
+        SET transcript = v_transcript || v_new_lines,
+            status = p_status
+        WHERE call_id = p_call_id;
+    END IF;
+
+    RETURN jsonb_build_object(
+        'found', true,
+        'thread_id', v_thread_id,
+        'length', v_length + jsonb_array_length(v_new_lines),
+        'appended_from', v_length,
+        'appended', jsonb_array_length(v_new_lines)
+    );
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION append_vapi_call_transcript(TEXT, JSONB, INTEGER, TEXT) TO service_role;
+
+COMMENT ON FUNCTION append_vapi_call_transcript IS 'Appends only new transcript lines to a Vapi call and returns the appended range';
@@ -0,0 +1,6 @@
+-- Composite indexes backing keyset pagination on (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_threads_account_created_keyset
+ON threads(account_id, created_at DESC, thread_id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_messages_thread_created_keyset
+ON messages(thread_id, created_at, message_id);
@@ -0,0 +1,78 @@
+-- Everything the thread page needs in one round trip: the thread, its project,
+-- the message count and the most recent agent runs.
+CREATE OR REPLACE FUNCTION get_thread_summary(
+    p_thread_id UUID,
+    p_runs_limit INTEGER DEFAULT 20
+) RETURNS JSONB
+SECURITY DEFINER
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+    v_thread RECORD;
+    v_project JSONB;
+    v_message_count BIGINT;
+    v_runs JSONB;
+BEGIN
+    SELECT thread_id, project_id, account_id, metadata, is_public, created_at, updated_at
+    INTO v_thread
+    FROM public.threads
+    WHERE thread_id = p_thread_id;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    IF v_thread.project_id IS NOT NULL THEN
+        SELECT jsonb_build_object(
+            'project_id', p.project_id,
+            'name', p.name,
+            'description', p.description,
+            'sandbox', p.sandbox,
+            'is_public', p.is_public,
+            'icon_name', p.icon_name,
+            'created_at', p.created_at,
+            'updated_at', p.updated_at
+        )
+        INTO v_project
+        FROM public.projects p
+        WHERE p.project_id = v_thread.project_id;
+    END IF;
+
+    SELECT COUNT(*) INTO v_message_count
+    FROM public.messages
+    WHERE thread_id = p_thread_id;
+
+    SELECT COALESCE(jsonb_agg(r ORDER BY r.created_at DESC), '[]'::jsonb)
+    INTO v_runs
+    FROM (
+        SELECT id, status, started_at, completed_at, error, agent_id, agent_version_id, created_at
+        FROM public.agent_runs
+        WHERE thread_id = p_thread_id
+        ORDER BY created_at DESC
+        LIMIT p_runs_limit
+    ) r;
+
+    RETURN jsonb_build_object(
+        'thread', jsonb_build_object(
+            'thread_id', v_thread.thread_id,
+            'project_id', v_thread.project_id,
+            'account_id', v_thread.account_id,
+            'metadata', v_thread.metadata,
+            'is_public', v_thread.is_public,
+            'created_at', v_thread.created_at,
+            'updated_at', v_thread.updated_at
+        ),
+        'project', v_project,
+        'message_count', v_message_count,
+        'recent_agent_runs', v_runs
+    );
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_thread_summary(UUID, INTEGER) TO service_role;
+
+CREATE INDEX IF NOT EXISTS idx_agent_runs_thread_created
+ON agent_runs(thread_id, created_at DESC);
+
+COMMENT ON FUNCTION get_thread_summary IS 'Thread, project, message count and recent agent runs for the thread detail view';
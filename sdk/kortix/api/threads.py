@@ -1,8 +1,10 @@
 from dataclasses import dataclass, asdict
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncGenerator
 import httpx
 from datetime import datetime
 
+from .utils import stream_from_url
+
 # Import from shared models
 from ..models import (
     Role,
@@ -124,10 +126,12 @@ class Message:
 
 @dataclass
 class PaginationInfo:
-    page: int
     limit: int
-    total: int
-    pages: int
+    page: Optional[int] = None
+    total: Optional[int] = None
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 @dataclass
@@ -139,6 +143,7 @@ class ThreadsResponse:
 @dataclass
 class MessagesResponse:
     messages: List[Message]
+    pagination: Optional[PaginationInfo] = None
 
 
 @dataclass
@@ -317,12 +322,18 @@ class ThreadsClient:
         self,
         page: int = 1,
         limit: int = 1000,
+        cursor: Optional[str] = None,
+        use_cursor: bool = False,
+        count: str = "exact",
     ) -> ThreadsResponse:
         """Get all threads for the current user with associated project data.
 
         Args:
-            page: Page number (1-based)
+            page: Page number (1-based), ignored with cursor pagination
             limit: Number of items per page (max 1000)
+            cursor: pagination.next_cursor from the previous page
+            use_cursor: Use keyset pagination; pass cursor=None for the first page
+            count: Total count mode: 'exact', 'estimated' or 'none'
 
         Returns:
             ThreadsResponse containing paginated threads
@@ -330,7 +341,12 @@ class ThreadsClient:
         params = {
             "page": page,
             "limit": limit,
+            "count": count,
         }
+        if use_cursor or cursor:
+            params["paginate_by"] = "cursor"
+        if cursor:
+            params["cursor"] = cursor
 
         response = await self.client.get("/threads", params=params)
         data = self._handle_response(response)
@@ -363,16 +379,17 @@ class ThreadsClient:
 
         return ThreadsResponse(threads=threads, pagination=pagination)
 
-    async def get_thread(self, thread_id: str) -> Thread:
+    async def get_thread(self, thread_id: str, count: str = "exact") -> Thread:
         """Get a specific thread by ID with complete related data.
 
         Args:
             thread_id: The thread ID
+            count: Message count mode: 'exact', 'estimated' or 'none'
 
         Returns:
             Thread with complete data including project, message count, and recent agent runs
         """
-        response = await self.client.get(f"/threads/{thread_id}")
+        response = await self.client.get(f"/threads/{thread_id}", params={"count": count})
         data = self._handle_response(response)
 
         # Handle nested project data
@@ -394,25 +411,40 @@ class ThreadsClient:
         )
 
     async def get_thread_messages(
-        self, thread_id: str, order: str = "desc"
+        self,
+        thread_id: str,
+        order: str = "desc",
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> MessagesResponse:
-        """Get ALL messages for a thread.
+        """Get messages for a thread: all of them, or one page when limit is set.
 
         Args:
             thread_id: The thread ID
             order: Order by created_at: 'asc' or 'desc'
+            limit: Page size (max 1000); omit to fetch every message
+            cursor: pagination.next_cursor from the previous page
 
         Returns:
-            MessagesResponse containing all messages
+            MessagesResponse containing the messages, with pagination when paged
         """
-        params = {"order": order}
+        params: Dict[str, Any] = {"order": order}
+        if limit:
+            params["limit"] = limit
+        if cursor:
+            params["cursor"] = cursor
         response = await self.client.get(
             f"/threads/{thread_id}/messages", params=params
         )
         data = self._handle_response(response)
 
         messages = [from_dict(Message, msg_data) for msg_data in data["messages"]]
-        return MessagesResponse(messages=messages)
+        pagination = (
+            from_dict(PaginationInfo, data["pagination"])
+            if data.get("pagination")
+            else None
+        )
+        return MessagesResponse(messages=messages, pagination=pagination)
 
     async def add_message_to_thread(self, thread_id: str, message: str) -> Message:
         """Add a simple message to a thread.
@@ -554,6 +586,20 @@ class ThreadsClient:
         url = f"{self.base_url}/agent-run/{agent_run_id}/stream"
         return url
 
+    async def stream_agent_run(self, agent_run_id: str) -> AsyncGenerator[str, None]:
+        """Stream agent run response lines over this client's connection pool.
+
+        Args:
+            agent_run_id: The agent run ID
+
+        Yields:
+            Each non-empty line of the stream
+        """
+        async for line in stream_from_url(
+            f"/agent-run/{agent_run_id}/stream", client=self.client
+        ):
+            yield line
+
 
 def create_threads_client(
     base_url: str,
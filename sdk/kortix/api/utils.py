@@ -1,30 +1,46 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 import httpx
 
 
-async def stream_from_url(url: str, **kwargs) -> AsyncGenerator[str, None]:
+STREAM_TIMEOUT = httpx.Timeout(
+    connect=30.0,  # 30 seconds to establish connection
+    read=300.0,  # 300 seconds to read data (good for streaming)
+    write=30.0,  # 30 seconds to write data
+    pool=30.0,  # 30 seconds to get connection from pool
+)
+
+
+async def stream_from_url(
+    url: str, client: Optional[httpx.AsyncClient] = None, **kwargs
+) -> AsyncGenerator[str, None]:
     """
     Helper function that takes a URL and returns an async generator yielding lines.
 
     Args:
         url: The URL to stream from
+        client: Optional client whose connection pool should be reused
         **kwargs: Additional arguments to pass to httpx.AsyncClient.stream()
 
     Yields:
         str: Each line from the streaming response
     """
-    # Configure timeout settings to prevent ReadTimeout errors
-    timeout = httpx.Timeout(
-        connect=30.0,  # 30 seconds to establish connection
-        read=300.0,  # 300 seconds to read data (good for streaming)
-        write=30.0,  # 30 seconds to write data
-        pool=30.0,  # 30 seconds to get connection from pool
-    )
-
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        async with client.stream("GET", url, **kwargs) as response:
-            response.raise_for_status()
-
-            async for line in response.aiter_lines():
-                if line.strip():  # Only yield non-empty lines
-                    yield line.strip()
+    if client is not None:
+        async for line in _stream_lines(client, url, **kwargs):
+            yield line
+        return
+
+    async with httpx.AsyncClient(timeout=STREAM_TIMEOUT) as owned_client:
+        async for line in _stream_lines(owned_client, url, **kwargs):
+            yield line
+
+
+async def _stream_lines(
+    client: httpx.AsyncClient, url: str, **kwargs
+) -> AsyncGenerator[str, None]:
+    kwargs.setdefault("timeout", STREAM_TIMEOUT)
+    async with client.stream("GET", url, **kwargs) as response:
+        response.raise_for_status()
+
+        async for line in response.aiter_lines():
+            if line.strip():  # Only yield non-empty lines
+                yield line.strip()
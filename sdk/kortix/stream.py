@@ -0,0 +1,210 @@
+import json
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Dict, List, Optional, Any, Union
+
+
+def _parse_json(value: Any) -> Optional[Any]:
+    if isinstance(value, (dict, list)):
+        return value
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+# --- Typed stream events ---
+@dataclass
+class TextDelta:
+    """Newly available assistant text, in sequence order."""
+
+    text: str
+
+
+@dataclass
+class ToolStarted:
+    function_name: Optional[str]
+    tool_index: Optional[int]
+    tool_call_id: Optional[str] = None
+
+
+@dataclass
+class ToolCompleted:
+    """A tool finished. status_type is tool_completed, tool_failed or tool_error."""
+
+    function_name: Optional[str]
+    tool_index: Optional[int]
+    success: bool
+    status_type: str
+    message: Optional[str] = None
+    tool_call_id: Optional[str] = None
+
+
+@dataclass
+class ToolResult:
+    function_name: Optional[str]
+    success: bool
+    output: Any
+    message_id: Optional[str] = None
+
+
+@dataclass
+class AssistantMessage:
+    """A complete, saved assistant message."""
+
+    message_id: str
+    content: str
+
+
+@dataclass
+class StatusEvent:
+    status_type: str
+    finish_reason: Optional[str] = None
+    message: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+StreamEvent = Union[
+    TextDelta, ToolStarted, ToolCompleted, ToolResult, AssistantMessage, StatusEvent
+]
+
+TOOL_STATUS_TYPES = ("tool_completed", "tool_failed", "tool_error")
+
+
+class TextReassembler:
+    """
+    Incrementally reassembles streamed assistant text from sequenced chunks.
+
+    In-order chunks are appended directly; out-of-order chunks wait in a
+    buffer keyed by sequence until the gap before them is filled.
+    """
+
+    def __init__(self):
+        self._next_sequence: Optional[int] = None
+        self._pending: Dict[int, str] = {}
+        self._parts: List[str] = []
+
+    @property
+    def text(self) -> str:
+        """Contiguous text so far (joined lazily and compacted)."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def add(self, sequence: int, text: str) -> str:
+        """Add a chunk and return the text that became contiguous because of it."""
+        if self._next_sequence is None:
+            self._next_sequence = sequence
+        if sequence < self._next_sequence or sequence in self._pending:
+            # Duplicate or already-released chunk
+            return ""
+
+        self._pending[sequence] = text
+        released = []
+        while self._next_sequence in self._pending:
+            released.append(self._pending.pop(self._next_sequence))
+            self._next_sequence += 1
+
+        delta = "".join(released)
+        if delta:
+            self._parts.append(delta)
+        return delta
+
+    def flush(self) -> str:
+        """Release buffered chunks past any gaps, in sequence order."""
+        if not self._pending:
+            return ""
+        ordered = [self._pending[seq] for seq in sorted(self._pending)]
+        self._next_sequence = max(self._pending) + 1
+        self._pending.clear()
+        delta = "".join(ordered)
+        if delta:
+            self._parts.append(delta)
+        return delta
+
+    def reset(self):
+        self._next_sequence = None
+        self._pending.clear()
+        self._parts = []
+
+
+async def iter_events(lines: AsyncGenerator[str, None]) -> AsyncGenerator[StreamEvent, None]:
+    """
+    Convert raw "data: ..." stream lines into typed events.
+
+    Assistant text chunks are reassembled incrementally, so each chunk costs
+    O(chunk) regardless of stream length.
+    """
+    reassembler = TextReassembler()
+
+    async for line in lines:
+        line = line.strip()
+        if not line.startswith("data: "):
+            continue
+
+        data = _parse_json(line[6:])
+        if not isinstance(data, dict):
+            continue
+
+        event_type = data.get("type", "unknown")
+
+        if event_type == "assistant":
+            message_id = data.get("message_id")
+            sequence = data.get("sequence")
+
+            if message_id is None and sequence is not None:
+                parsed = _parse_json(data.get("content", "")) or {}
+                chunk_text = parsed.get("content") if isinstance(parsed, dict) else None
+                if not chunk_text:
+                    continue
+                delta = reassembler.add(sequence, chunk_text)
+                if delta:
+                    yield TextDelta(text=delta)
+
+            elif message_id is not None:
+                delta = reassembler.flush()
+                if delta:
+                    yield TextDelta(text=delta)
+                parsed = _parse_json(data.get("content", "")) or {}
+                content = parsed.get("content", "") if isinstance(parsed, dict) else ""
+                yield AssistantMessage(message_id=message_id, content=content or "")
+                reassembler.reset()
+
+        elif event_type == "status":
+            details = _parse_json(data.get("content", "{}")) or {}
+            if not isinstance(details, dict):
+                details = {}
+            status_type = details.get("status_type") or data.get("status") or "unknown"
+
+            if status_type == "tool_started":
+                yield ToolStarted(
+                    function_name=details.get("function_name"),
+                    tool_index=details.get("tool_index"),
+                    tool_call_id=details.get("tool_call_id"),
+                )
+            elif status_type in TOOL_STATUS_TYPES:
+                yield ToolCompleted(
+                    function_name=details.get("function_name"),
+                    tool_index=details.get("tool_index"),
+                    success=status_type == "tool_completed",
+                    status_type=status_type,
+                    message=details.get("message"),
+                    tool_call_id=details.get("tool_call_id"),
+                )
+            else:
+                yield StatusEvent(
+                    status_type=status_type,
+                    finish_reason=details.get("finish_reason"),
+                    message=details.get("message") or data.get("message"),
+                    data={**data, **details},
+                )
+
+        elif event_type == "tool":
+            parsed = _parse_json(data.get("content", "")) or {}
+            tool_execution = parsed.get("tool_execution", {}) if isinstance(parsed, dict) else {}
+            result = tool_execution.get("result", {}) or {}
+            yield ToolResult(
+                function_name=tool_execution.get("function_name"),
+                success=bool(result.get("success", False)),
+                output=result.get("output") if result.get("success") else result.get("error"),
+                message_id=data.get("message_id"),
+            )
@@ -1,7 +1,7 @@
 from typing import AsyncGenerator
 
 from .api.threads import ThreadsClient
-from .api.utils import stream_from_url
+from .stream import StreamEvent, iter_events
 
 
 class Thread:
@@ -33,9 +33,10 @@ class AgentRun:
         self._agent_run_id = agent_run_id
 
     async def get_stream(self) -> AsyncGenerator[str, None]:
-        stream_url = self._thread._client.get_agent_run_stream_url(self._agent_run_id)
-        stream = stream_from_url(stream_url, headers=self._thread._client.headers)
-        return stream
+        return self._thread._client.stream_agent_run(self._agent_run_id)
+
+    async def get_events(self) -> AsyncGenerator[StreamEvent, None]:
+        return iter_events(await self.get_stream())
 
 
 class KortixThread:
@@ -3,6 +3,8 @@ import re
 import xml.dom.minidom
 from typing import AsyncGenerator, Optional, Any
 
+from .stream import TextReassembler
+
 
 # --- ANSI Colors ---
 class Colors:
@@ -151,25 +153,12 @@ async def print_stream(stream: AsyncGenerator[str, None]):
     Follows the same output format as stream_test.py.
     """
     stream_started = False
-    chunks = []  # Store chunks to sort by sequence
+    text = TextReassembler()  # Reassembles chunks by sequence incrementally
+    scanned_tail = ""  # End of the text already scanned, so tags split across chunks are found
     parsing_state = "text"  # "text", "in_function_call", "function_call_ended"
     current_function_name = None
     invoke_name_regex = re.compile(r'<invoke\s+name="([^"]+)"')
-
-    def rebuild_full_text():
-        """Rebuild full text from sorted chunks like the original processor"""
-        # Sort chunks by sequence
-        sorted_chunks = sorted(chunks, key=lambda c: c.get("sequence", 0))
-
-        full_text_parts = []
-        for chunk in sorted_chunks:
-            content = chunk.get("content", "")
-            if content:
-                parsed_content = try_parse_json(content)
-                if parsed_content and "content" in parsed_content:
-                    full_text_parts.append(parsed_content["content"])
-
-        return "".join(full_text_parts)
+    scan_overlap = 256
 
     async for line in stream:
         line = line.strip()
@@ -217,30 +206,35 @@ async def print_stream(stream: AsyncGenerator[str, None]):
 
                 # Assistant chunks (message_id is null, has sequence) - accumulate text
                 if message_id is None and sequence is not None:
-                    # Add chunk to collection
-                    chunks.append(data)
+                    parsed_chunk = try_parse_json(content)
+                    if not parsed_chunk or "content" not in parsed_chunk:
+                        continue
+                    delta = text.add(sequence, parsed_chunk["content"] or "")
+                    if not delta:
+                        continue
 
-                    # Rebuild full text from all chunks
-                    full_text = rebuild_full_text()
+                    # Only scan the newly contiguous text plus a small overlap
+                    window = scanned_tail + delta
+                    scanned_tail = window[-scan_overlap:]
 
                     # Check for function call detection
                     if parsing_state == "text":
-                        if "<function_calls>" in full_text:
+                        if "<function_calls>" in window:
                             parsing_state = "in_function_call"
                             print(
                                 f"\n{Colors.YELLOW}🔧 [TOOL USE DETECTED]{Colors.ENDC}"
                             )
 
-                    elif parsing_state == "in_function_call":
+                    if parsing_state == "in_function_call":
                         if current_function_name is None:
-                            match = invoke_name_regex.search(full_text)
+                            match = invoke_name_regex.search(window)
                             if match:
                                 current_function_name = match.group(1)
                                 print(
                                     f'{Colors.BLUE}⚡ [TOOL UPDATE] Calling function: {Colors.BOLD}"{current_function_name}"{Colors.ENDC}'
                                 )
 
-                        if "</function_calls>" in full_text:
+                        if "</function_calls>" in window:
                             parsing_state = "function_call_ended"
                             print(f"{Colors.YELLOW}⏳ [TOOL USE WAITING]{Colors.ENDC}")
                             current_function_name = None
@@ -265,7 +259,8 @@ async def print_stream(stream: AsyncGenerator[str, None]):
                             )
 
                     # Reset state for next message
-                    chunks = []
+                    text.reset()
+                    scanned_tail = ""
                     parsing_state = "text"
                     current_function_name = None
 